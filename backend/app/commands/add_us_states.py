@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import delete
 
 from db import engine
+from tools.data_version import bumps_data_version
 from models import USState
 
 US_STATES_DATA = [
@@ -71,6 +72,7 @@ US_STATES_DATA = [
     { "name": "Wyoming", "abbreviation": "WY"},
 ]
 
+@bumps_data_version
 async def populate():
     async_session = sessionmaker(
         engine, expire_on_commit=False, class_=AsyncSession
@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+
+import asyncio
+import sys
+import click
+sys.path.append("/app")
+
+from tools.data_version import bump_data_version
+
+@click.command()
+@click.option('--source', type=str, default="manual", help="What changed the data; recorded alongside the new version")
+def main(source):
+    """
+    Increments the data version, e.g. after the data was changed by something
+    other than the import commands (which increment it themselves), such as
+    the ogr2ogr geometry load in start_app.sh.
+    """
+    version = asyncio.run(bump_data_version(source=source))
+    click.echo(f"Data version is now {version}")
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import engine
+from tools.data_version import bumps_data_version
 
 from models import County
 from models.disparity_index import (
@@ -69,6 +70,7 @@ COLUMNS_TO_MEASURES = {
     "LC Rank": "Lung Cancer Index"
 }
 
+@bumps_data_version
 async def import_disparities_index(excel_path, delete_before_import=True):
     """
     Imports the cancer disparity index file in these steps:
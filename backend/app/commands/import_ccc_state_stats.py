@@ -15,6 +15,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import engine
+from tools.data_version import bumps_data_version
 
 from models.ccc_state_stats import (
     StateCancerIncidenceStats,
@@ -85,6 +86,7 @@ async def import_measure(rows, model, session):
     # bulk insert all objects
     session.add_all(obj_list)
 
+@bumps_data_version
 async def import_ccc_state_stats(excel_path, delete_before_import=True):
     """
     Imports the state average data compiled by Colorado Cancer Center.
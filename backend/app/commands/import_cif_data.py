@@ -21,6 +21,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from settings import LIMIT_TO_STATE
 
 from db import engine
+from tools.data_version import bumps_data_version
 from models import (
     CancerIncidenceCounty,
     CancerMortalityCounty,
@@ -134,6 +135,7 @@ async def import_file(file, session, model=None, delete_before_import=True, dont
         session.add_all(obj_list)
 
 
+@bumps_data_version
 async def import_cif_data(data_folder, dont_limit_states=False, warn_on_missing_model=False):
     """Imports all *_long_*.csv files from the CIF data folder into the database."""
 
@@ -17,6 +17,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import engine
+from tools.data_version import bumps_data_version
 
 from models.geom import County
 from models.hpv import (
@@ -57,6 +58,7 @@ VACCINE_TO_GENDER = {
     "Patients (Males Only) UTD for HPV": "Male"
 }
 
+@bumps_data_version
 async def import_hpv_data(sheets, delete_before_import=True):
     """
     Given a set of sheets with CDPHE HPV vaccination info, imports them one by one into the database.
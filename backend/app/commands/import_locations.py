@@ -12,10 +12,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import delete
 
 from db import engine
+from tools.data_version import bumps_data_version
 from models import LocationCategory, Location
 
 from tools.strings import slugify
 
+@bumps_data_version
 async def populate_locations(location_categories, locations):
     async_session = sessionmaker(
         engine, expire_on_commit=False, class_=AsyncSession
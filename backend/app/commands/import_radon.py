@@ -16,6 +16,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import engine
+from tools.data_version import bumps_data_version
 
 from models.radon import (
     RadonCounty, RadonTract
@@ -89,6 +90,7 @@ RADON_SHEETS_META = [
     }
 ]
 
+@bumps_data_version
 async def import_radon(excel_path, delete_before_import=True):
     """
     Imports the county and tract sheets within the radon data spreadsheet.
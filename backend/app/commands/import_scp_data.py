@@ -15,6 +15,8 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import engine
+from tools.data_version import bumps_data_version
+from tools.queries import refresh_default_factor_slices
 
 from models.scp import (
     SCPDeathsCounty, SCPIncidenceCounty
@@ -117,9 +119,17 @@ async def import_scp_dataset(model, csv_path:Path, aac_col: str, aar_col:str, de
         # bulk insert all objects
         session.add_all(obj_list)
 
+        # rebuild the model's default-factor slice from the new rows, in the
+        # same transaction so the slice never disagrees with the table
+        await session.flush()
+        refreshed = await refresh_default_factor_slices(session, [model])
+        if refreshed:
+            tqdm.write(f" - Refreshed the default-factor slice of {model.__tablename__}")
+
         # commit session at the end
         await session.commit()
 
+@bumps_data_version
 async def import_all_files(folder):
     for input_file in INPUT_FILES:
         try:
@@ -15,6 +15,7 @@ from tqdm import tqdm
 sys.path.append("/app")
 
 from db import engine
+from tools.data_version import bumps_data_version
 from models.uccc_responders import UCCCRespondersCounty
 from models.geom import County
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -53,6 +54,7 @@ async def import_into_model(session, model, label, records):
     tqdm.write("")
 
 
+@bumps_data_version
 async def import_uccc_responser_data(uccc_reponders_sheet, delete_before_import=True):
     """
     Imports health-region uccc_responser data from an Excel sheet into the database.
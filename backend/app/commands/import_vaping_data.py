@@ -13,6 +13,7 @@ from tqdm import tqdm
 sys.path.append("/app")
 
 from db import engine
+from tools.data_version import bumps_data_version
 from models.vaping import StateYouthVapingStats, VapingHealthRegion
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -70,6 +71,7 @@ async def import_into_model(async_session, model, label, records):
         await session.commit()
 
 
+@bumps_data_version
 async def import_vaping_data(youth_regional_csv, adult_regional_sheet, delete_before_import=True):
     """
     Imports health-region vaping data from an Excel sheet into the database.
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+import asyncio
+import sys
+import click
+sys.path.append("/app")
+
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import engine
+from tools.data_version import bumps_data_version
+from tools.queries import refresh_default_factor_slices
+
+@bumps_data_version
+async def refresh_default_slices():
+    async_session = sessionmaker(
+        engine, expire_on_commit=False, class_=AsyncSession
+    )
+
+    async with async_session() as session:
+        for table in await refresh_default_factor_slices(session):
+            click.echo(f"Refreshed the default-factor slice of {table}")
+
+        await session.commit()
+
+@click.command()
+def main():
+    """
+    Recreates the default-factor slice of each factored cancer table from the
+    table's current contents. The importers refresh the slices of the tables
+    they load, so this is only needed after the tables are changed some other
+    way (or to create the slices for the first time.)
+    """
+    asyncio.run(refresh_default_slices())
+
+if __name__ == "__main__":
+    main()
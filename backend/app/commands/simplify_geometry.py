@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+import asyncio
+import sys
+import click
+sys.path.append("/app")
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sqlmodel import delete
+
+from db import engine
+from tools.data_version import bumps_data_version
+from models import County, Tract, HealthRegion, SimplifiedGeometry
+from models.geom import GEOMETRY_DETAIL_TOLERANCES
+
+GEOMETRY_MODELS = [County, Tract, HealthRegion]
+
+# the most that a region's area can change by simplifying it along with its
+# neighbors, as a fraction of its original area, before it falls back to being
+# simplified by itself
+SIMPLIFY_MAX_AREA_CHANGE = 0.5
+
+# the most that the union of a layer's simplified regions can differ from the
+# union of the original ones (by area, as a fraction of the original) before
+# we warn that simplifying it left gaps
+SIMPLIFY_MAX_COVERAGE_ERROR = 0.01
+
+# simplifying each polygon on its own (e.g., with ST_SimplifyPreserveTopology)
+# would leave gaps and overlaps between neighboring regions, since each side of
+# a shared boundary would be simplified differently. instead, we:
+# 1. break the boundaries of all the regions into edges that are shared by at
+#    most two regions, meeting at nodes where three or more regions meet,
+# 2. simplify each edge, which keeps its endpoints (and so the nodes) fixed,
+# 3. re-node the simplified edges, since edges simplified separately can
+#    cross or touch each other, and rebuild polygons ("faces") from them, and
+# 4. assign each face to the region that contains a point inside it or,
+#    failing that, to the region it overlaps the most.
+# a region that doesn't get any faces (e.g., one smaller than the tolerance),
+# or whose area changes by more than SIMPLIFY_MAX_AREA_CHANGE, falls back to
+# simplifying its original geometry by itself.
+SIMPLIFY_LAYER_SQL = """
+WITH boundaries AS (
+    SELECT (ST_Dump(ST_Boundary(wkb_geometry))).geom AS geom
+    FROM {layer}
+),
+edges AS (
+    SELECT (ST_Dump(ST_LineMerge(ST_Node(ST_Collect(geom))))).geom AS geom
+    FROM boundaries
+),
+simplified_edges AS (
+    SELECT ST_SimplifyPreserveTopology(geom, :tolerance) AS geom
+    FROM edges
+),
+faces AS (
+    SELECT row_number() OVER () AS id, geom
+    FROM (
+        SELECT (ST_Dump(ST_Polygonize(ST_Node(ST_Collect(geom))))).geom AS geom
+        FROM simplified_edges
+    ) AS polygonized
+),
+assigned_faces AS (
+    SELECT DISTINCT ON (faces.id) faces.id, region.ogc_fid, faces.geom
+    FROM faces
+    JOIN {layer} AS region ON ST_Intersects(region.wkb_geometry, faces.geom)
+    ORDER BY
+        faces.id,
+        ST_Intersects(region.wkb_geometry, ST_PointOnSurface(faces.geom)) DESC,
+        ST_Area(ST_Intersection(region.wkb_geometry, faces.geom)) DESC,
+        region.ogc_fid
+),
+assigned AS (
+    SELECT ogc_fid, ST_Multi(ST_Union(geom)) AS geom
+    FROM assigned_faces
+    GROUP BY ogc_fid
+)
+SELECT
+    region.ogc_fid,
+    CASE
+        WHEN assigned.geom IS NOT NULL AND
+            ABS(ST_Area(assigned.geom) - ST_Area(region.wkb_geometry))
+                <= :max_area_change * ST_Area(region.wkb_geometry)
+        THEN assigned.geom
+        ELSE ST_Multi(ST_SimplifyPreserveTopology(region.wkb_geometry, :tolerance))
+    END AS wkb_geometry
+FROM {layer} AS region
+LEFT JOIN assigned ON assigned.ogc_fid = region.ogc_fid
+"""
+
+INSERT_SIMPLIFIED_SQL = """
+INSERT INTO simplified_geometry (layer, detail, ogc_fid, wkb_geometry)
+SELECT :layer, :detail, ogc_fid, wkb_geometry
+FROM ({simplified}) AS simplified
+"""
+
+# the area by which the union of a layer's simplified regions at a detail level
+# differs from the union of its original regions, as a fraction of the latter
+COVERAGE_ERROR_SQL = """
+WITH original AS (
+    SELECT ST_Union(wkb_geometry) AS geom FROM {layer}
+),
+simplified AS (
+    SELECT ST_Union(wkb_geometry) AS geom
+    FROM simplified_geometry
+    WHERE layer = :layer AND detail = :detail
+)
+SELECT ST_Area(ST_SymDifference(original.geom, simplified.geom)) / NULLIF(ST_Area(original.geom), 0)
+FROM original, simplified
+"""
+
+@bumps_data_version
+async def simplify_geometry():
+    async_session = sessionmaker(
+        engine, expire_on_commit=False, class_=AsyncSession
+    )
+
+    async with async_session() as session:
+        for model in GEOMETRY_MODELS:
+            layer = model.__tablename__
+
+            result = await session.execute(
+                delete(SimplifiedGeometry).where(SimplifiedGeometry.layer == layer)
+            )
+            click.echo(f"Deleted {result.rowcount} simplified {layer} rows")
+
+            for detail, tolerance in GEOMETRY_DETAIL_TOLERANCES.items():
+                # (the layer names come from our models, not user input, so
+                # they're safe to format into the query)
+                result = await session.execute(
+                    text(INSERT_SIMPLIFIED_SQL.format(simplified=SIMPLIFY_LAYER_SQL.format(layer=layer))),
+                    {
+                        "layer": layer, "detail": detail, "tolerance": tolerance,
+                        "max_area_change": SIMPLIFY_MAX_AREA_CHANGE,
+                    }
+                )
+                click.echo(f"Inserted {result.rowcount} {detail}-detail {layer} rows")
+
+                # check that the simplified regions still cover the same area,
+                # i.e. that simplifying them didn't open gaps between them
+                result = await session.execute(
+                    text(COVERAGE_ERROR_SQL.format(layer=layer)),
+                    {"layer": layer, "detail": detail}
+                )
+                error = result.scalar() or 0
+
+                if error > SIMPLIFY_MAX_COVERAGE_ERROR:
+                    click.echo(
+                        f"WARNING: the {detail}-detail {layer} regions' union differs "
+                        f"from the original's by {error:.2%} of its area", err=True
+                    )
+
+        await session.commit()
+
+@click.command()
+def main():
+    """
+    Produces the simplified versions of the geometry tables at each of the
+    detail levels in GEOMETRY_DETAIL_TOLERANCES, replacing any existing ones.
+    """
+    asyncio.run(simplify_geometry())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+"""
+Pre-renders the API's cached responses (map values, county summaries, and
+measure metadata) and the zip of all the data, so that the first visitors
+after an import don't have to wait for them to be computed.
+
+(The geometry responses are cached in each API worker's memory rather than
+in the cache backend, so there's nothing to warm for them here.)
+
+Requests are made to the app in-process, so the responses are produced and
+cached exactly as they would be for a real request.
+"""
+
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+import click
+import httpx
+sys.path.append("/app")
+
+from main import app
+from models import STATS_MODELS, FACTOR_DESCRIPTIONS
+from tools.queries import prime_model_factor_defaults
+
+
+# routes that don't take any parameters, by the namespace under which they're
+# reported
+STATIC_PATHS = {
+    "measures": ["/stats/measures"],
+    "locations": ["/locations"],
+    # (builds the zip of all the data, which is kept on disk)
+    "download-all": ["/stats/download-all"],
+}
+
+def default_filters_str(simple_model_name):
+    """
+    Produces the 'filters' argument that the frontend sends for a model's
+    default factor values, i.e. "<factor1>:<default1>;<factor2>:<default2>;...",
+    or None if the model has no factors with defaults.
+    """
+    factor_descs = FACTOR_DESCRIPTIONS.get(simple_model_name, {})
+
+    defaults = [
+        f"{factor}:{desc['default']}"
+        for factor, desc in factor_descs.items()
+        if desc.get("default") is not None
+    ]
+
+    return ";".join(defaults) if defaults else None
+
+async def enumerate_paths(client):
+    """
+    Produces a list of (namespace, path) tuples for each response to warm.
+    Some of the paths are derived from other responses (e.g., the measures for
+    each model), which are fetched (and thus warmed) along the way.
+    """
+    paths = [
+        (namespace, path)
+        for namespace, namespace_paths in STATIC_PATHS.items()
+        for path in namespace_paths
+    ]
+
+    # the measures for each model come from the /stats/measures response
+    response = await client.get("/stats/measures")
+    response.raise_for_status()
+    measures_meta = response.json()
+
+    for type in STATS_MODELS:
+        for simple_model_name, category in measures_meta.get(type, {}).get("categories", {}).items():
+            filters = default_filters_str(simple_model_name)
+
+            for measure in category["measures"]:
+                params = {"measure": measure}
+                paths.append(("fips-value", f"/stats/{type}/{simple_model_name}/fips-value?{urlencode(params)}"))
+
+                # the frontend always specifies the factors, so warm that variant too
+                if filters is not None:
+                    params["filters"] = filters
+                    paths.append(("fips-value", f"/stats/{type}/{simple_model_name}/fips-value?{urlencode(params)}"))
+
+    # one county summary per county
+    response = await client.get("/stats/county/geoids")
+    response.raise_for_status()
+
+    for county_fips in response.json()["geoids"]:
+        paths.append(("by-county", f"/stats/by-county/{county_fips}"))
+
+    return paths
+
+async def warm_cache(concurrency):
+    # the app's startup handlers connect it to the cache backend
+    await app.router.startup()
+
+    # (so that the fips-value responses are cached under their canonical keys
+    # from the start; see fips_value_key_builder())
+    await prime_model_factor_defaults()
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://warm-cache", timeout=None) as client:
+            click.echo("Enumerating responses to warm...")
+            paths = await enumerate_paths(client)
+            click.echo(f"Warming {len(paths)} responses with concurrency {concurrency}")
+
+            semaphore = asyncio.Semaphore(concurrency)
+            stats = defaultdict(lambda: {"count": 0, "errors": 0, "secs": 0.0, "max_secs": 0.0, "bytes": 0})
+
+            async def warm(namespace, path):
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    elapsed = time.perf_counter() - start
+
+                ns_stats = stats[namespace]
+                ns_stats["count"] += 1
+                ns_stats["secs"] += elapsed
+                ns_stats["max_secs"] = max(ns_stats["max_secs"], elapsed)
+                ns_stats["bytes"] += len(response.content)
+
+                if response.status_code != 200:
+                    ns_stats["errors"] += 1
+                    click.echo(f"{response.status_code} for {path}", err=True)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(warm(namespace, path) for namespace, path in paths))
+            total_secs = time.perf_counter() - start
+
+    finally:
+        await app.router.shutdown()
+
+    click.echo(f"\nWarmed {len(paths)} responses in {total_secs:.1f}s\n")
+    click.echo(f"{'namespace':<12} {'count':>7} {'errors':>7} {'avg secs':>9} {'max secs':>9} {'total MB':>9}")
+
+    for namespace, ns_stats in sorted(stats.items()):
+        click.echo(
+            f"{namespace:<12} {ns_stats['count']:>7} {ns_stats['errors']:>7} "
+            f"{ns_stats['secs'] / ns_stats['count']:>9.3f} {ns_stats['max_secs']:>9.3f} "
+            f"{ns_stats['bytes'] / 1e6:>9.2f}"
+        )
+
+    return sum(ns_stats["errors"] for ns_stats in stats.values())
+
+@click.command()
+@click.option('--concurrency', type=int, default=4, help="Max number of responses to render at once")
+def main(concurrency):
+    errors = asyncio.run(warm_cache(concurrency))
+
+    if errors:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
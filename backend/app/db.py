@@ -1,14 +1,26 @@
-from contextlib import contextmanager
+import asyncio
+from contextlib import contextmanager, asynccontextmanager
 import os
+import time
+import weakref
 
-from typing import AsyncGenerator, Generator
+from typing import Any, AsyncGenerator, Awaitable, Callable, Generator, Optional
 
-from settings import DATABASE_URL
+from settings import (
+    DATABASE_URL,
+    DB_USE_NULLPOOL,
+    DB_POOL_SIZE,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_MAX_CONCURRENT_QUERIES,
+)
 
 from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -16,17 +28,133 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 DB_ECHO_USAGE = os.environ.get("DB_ECHO_USAGE", False)
 
-# we disable pooling via poolclass=NullPool to prevent tests from crashing with
-# 'attached to a different loop', even though it appears to work fine in actual
-# use.
-# see here for more information:
-# https://docs.sqlalchemy.org/en/14/orm/extensions/asyncio.html#using-multiple-asyncio-event-loops
-# FIXME: see if disabling pooling impacts performance, and perhaps only
-#  disable it when running tests.
-engine = create_async_engine(
-    DATABASE_URL, echo=DB_ECHO_USAGE,
-    poolclass=NullPool,
-)
+
+# ============================================================================
+# === connection pooling
+# ============================================================================
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    An AsyncAdaptedQueuePool that keeps track of how long callers spend waiting
+    to check out a connection, so that pool saturation can be monitored.
+
+    The wait time includes the time spent establishing a new connection when
+    the pool has to grow into its overflow.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+
+def create_app_engine() -> AsyncEngine:
+    """
+    Creates an async engine configured according to the DB_* settings.
+
+    Pooling is disabled via poolclass=NullPool when DB_USE_NULLPOOL is set
+    (e.g., by the test harness), since pooled connections are bound to the
+    event loop on which they were created and tests tend to spin up a new loop
+    per test.
+    see here for more information:
+    https://docs.sqlalchemy.org/en/14/orm/extensions/asyncio.html#using-multiple-asyncio-event-loops
+    """
+    if DB_USE_NULLPOOL:
+        return create_async_engine(
+            DATABASE_URL, echo=DB_ECHO_USAGE,
+            poolclass=NullPool,
+        )
+
+    return create_async_engine(
+        DATABASE_URL, echo=DB_ECHO_USAGE,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_POOL_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+# the default engine, used by the import commands and anything else that
+# runs within a single event loop
+engine = create_app_engine()
+
+# pooled connections can't be shared across event loops, so each loop that
+# asks for a session gets its own engine. the first loop to ask claims the
+# default engine, which no other loop ever gets, even once the first loop is
+# gone (its pool may still hold connections bound to it); entries are dropped
+# when their loop is garbage-collected.
+_loop_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncEngine]" = weakref.WeakKeyDictionary()
+_default_engine_loop: "Optional[weakref.ref[asyncio.AbstractEventLoop]]" = None
+
+def get_engine() -> AsyncEngine:
+    """
+    Returns the engine whose pool belongs to the currently-running event loop,
+    creating one if this loop hasn't been seen before.
+    """
+    global _default_engine_loop
+
+    if DB_USE_NULLPOOL:
+        # without a pool there's no per-loop state to worry about
+        return engine
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        return _loop_engines[loop]
+    except KeyError:
+        if _default_engine_loop is None:
+            _default_engine_loop = weakref.ref(loop)
+
+        loop_engine = engine if _default_engine_loop() is loop else create_app_engine()
+        _loop_engines[loop] = loop_engine
+        return loop_engine
+
+def get_pool_stats() -> list[dict]:
+    """
+    Returns a list of statistics for each connection pool in this process,
+    one per event loop that has requested a session.
+    """
+    stats = []
+
+    for loop_engine in list(_loop_engines.values()) or [engine]:
+        pool = loop_engine.pool
+
+        if not isinstance(pool, InstrumentedQueuePool):
+            stats.append({"pool": type(pool).__name__})
+            continue
+
+        stats.append({
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # (sqlalchemy reports overflow as negative until the pool is full)
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": DB_POOL_MAX_OVERFLOW,
+            "wait_count": pool.wait_count,
+            "wait_total_secs": pool.wait_total,
+            "wait_avg_secs": (pool.wait_total / pool.wait_count) if pool.wait_count else 0.0,
+            "wait_max_secs": pool.wait_max,
+        })
+
+    return stats
+
+
+# ============================================================================
+# === sessions
+# ============================================================================
 
 async def init_db():
     """
@@ -40,13 +168,104 @@ async def init_db():
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
+# sessionmakers are tied to an engine, so we keep one per engine rather than
+# creating a new one for every request
+_sessionmakers: "weakref.WeakKeyDictionary[AsyncEngine, sessionmaker]" = weakref.WeakKeyDictionary()
+
+def get_sessionmaker() -> sessionmaker:
+    """
+    Returns a sessionmaker bound to the engine for the currently-running event
+    loop.
+    """
+    loop_engine = get_engine()
+
+    try:
+        return _sessionmakers[loop_engine]
+    except KeyError:
+        async_session = sessionmaker(
+            loop_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        _sessionmakers[loop_engine] = async_session
+        return async_session
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    async_session = get_sessionmaker()
+    async with async_session() as session:
+        yield session
+
+@asynccontextmanager
+async def session_scope() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Opens a standalone session outside of a request's dependencies, e.g. so
+    that queries can run concurrently on separate connections.
+    """
+    async_session = get_sessionmaker()
     async with async_session() as session:
         yield session
 
+async def gather_with_sessions(*funcs: Callable[[AsyncSession], Awaitable[Any]]) -> list[Any]:
+    """
+    Runs each of the given async functions concurrently, passing each its own
+    session (and thus its own pooled connection), and returns their results in
+    the same order as the functions.
+
+    A single AsyncSession can't run queries concurrently, which is why each
+    function gets its own. At most DB_MAX_CONCURRENT_QUERIES functions run at
+    once, so that a single request can't monopolize the pool.
+    """
+    semaphore = asyncio.Semaphore(DB_MAX_CONCURRENT_QUERIES)
+
+    async def run(func):
+        async with semaphore:
+            async with session_scope() as session:
+                return await func(session)
+
+    return await asyncio.gather(*(run(func) for func in funcs))
+
+
+class LazySession:
+    """
+    Stands in for an AsyncSession, but only creates the actual session the
+    first time one of its attributes is accessed (e.g., when execute() is
+    called).
+
+    FastAPI resolves a route's dependencies before the route runs, which means
+    that routes decorated with fastapi-cache's @cache() would otherwise create a
+    session even when the response is served from the cache. Routes that use
+    this via get_lazy_session() never touch the database on a cache hit.
+
+    Note that this isn't an instance of AsyncSession, so it shouldn't be passed
+    to libraries that check the session's type (e.g., fastapi-pagination).
+    """
+
+    def __init__(self):
+        self._session = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = get_sessionmaker()()
+        return getattr(self._session, name)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+async def get_lazy_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Like get_session(), but defers creating the session until it's first used;
+    see LazySession for details.
+    """
+    session = LazySession()
+    try:
+        yield session
+    finally:
+        await session.close()
+
 sync_engine = create_engine(
     DATABASE_URL.replace("asyncpg", "psycopg2"), echo=DB_ECHO_USAGE
 )
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from fastapi import FastAPI
@@ -5,14 +6,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi_pagination import  add_pagination
 
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.memcached import MemcachedBackend
 import aiomcache
 
-from routers import healthcheck, geometry, locations, statistics
+from routers import healthcheck, geometry, locations, statistics, tiles, lookup
 
-from tools.caching import request_key_builder
+from tools.caching import (
+    request_key_builder, DataVersionETagMiddleware, LayeredCacheBackend,
+    ChunkedMemcachedBackend, MemcachedLock, response_single_flight
+)
+from tools.data_version import poll_data_version
+from tools.queries import prime_model_factor_defaults
 
-from settings import IS_DEV, FRONTEND_DOMAIN
+from settings import IS_DEV, FRONTEND_DOMAIN, RESPONSE_CACHE_L1_MAX_BYTES
 
 # we'll just allow all origins for the time being
 ALLOW_ALL_ORIGINS = True
@@ -23,6 +28,19 @@ ALLOW_ALL_ORIGINS = True
 
 app = FastAPI()
 
+# routes whose responses depend only on the data, and thus can be tagged with
+# the data version and revalidated by clients
+VERSIONED_PATH_PREFIXES = (
+    "/stats", "/counties", "/tracts", "/healthregions", "/locations", "/tiles",
+    "/lookup"
+)
+
+# (added before CORSMiddleware so that CORS headers are applied to its 304s)
+app.add_middleware(
+    DataVersionETagMiddleware,
+    path_prefixes=VERSIONED_PATH_PREFIXES,
+)
+
 origins = [
     "http://localhost",
     "http://localhost:8001",
@@ -35,6 +53,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # lets the frontend read the metadata that accompanies binary fips-value
+    # responses, and the ETag
+    expose_headers=["ETag", "X-Data-Version", "X-Value-Columns", "X-Measure-Meta"],
 )
 
 # enables pagination plugin
@@ -52,17 +73,35 @@ class HealthCheckFilter(logging.Filter):
 @app.on_event("startup")
 async def startup():
     mc = aiomcache.Client("memcached", 11211)
+    # (hot responses are kept in each worker's memory, in front of memcached)
     FastAPICache.init(
-        MemcachedBackend(mc), prefix="fastapi-cache",
+        LayeredCacheBackend(ChunkedMemcachedBackend(mc), max_bytes=RESPONSE_CACHE_L1_MAX_BYTES),
+        prefix="fastapi-cache",
         key_builder=request_key_builder,
     )
+    # (so that only one worker computes each missing response at a time)
+    response_single_flight.lock = MemcachedLock(mc)
+
+    # keep the data version fresh in the background, so that checking it
+    # (e.g., to produce an ETag) doesn't require a query during a request;
+    # the factor defaults that fips-value's cache keys depend on are reloaded
+    # as soon as it changes, too
+    app.state.data_version_poller = asyncio.create_task(
+        poll_data_version(on_change=prime_model_factor_defaults)
+    )
 
     # Remove /healthcheck from access logs
     logging.getLogger("uvicorn.access").addFilter(HealthCheckFilter())
 
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.data_version_poller.cancel()
+
 
 # adds in routers that host geometry, statistics endpoints
 app.include_router(healthcheck.router)
 app.include_router(geometry.router)
 app.include_router(locations.router)
 app.include_router(statistics.router)
+app.include_router(tiles.router)
+app.include_router(lookup.router)
@@ -5,6 +5,7 @@ from .geom import (
     County,
     Tract,
     HealthRegion,
+    SimplifiedGeometry,
     USState,
 )
 from .locations import (
@@ -48,4 +49,5 @@ from .ccc_state_stats import (
 )
 from .uccc_responders import (
     UCCCRespondersCounty,
-)
\ No newline at end of file
+)
+from .data_version import DataVersion
@@ -6,6 +6,7 @@ but used elsewhere now, e.g. for the disparities index.
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 # ---------------------------------------------------------------------------
@@ -24,6 +25,17 @@ class BaseStatsModel(SQLModel):
         """
         return ()
 
+    @classmethod
+    def get_lookup_columns(cls):
+        """
+        Returns the columns that lookups of values (e.g., by the fips-value and
+        by-county routes) filter on and read, as a tuple of the region ID
+        column, the measure column, and tuples of the factor columns and of the
+        value columns. They determine the model's covering indexes; see
+        add_lookup_indexes().
+        """
+        return (cls.FIPS, cls.measure, cls.get_factors(), (cls.value,))
+
 class MeasuresByCounty(BaseStatsModel):
     FIPS : str = Field(index=True)
     County : str = Field(index=True)
@@ -55,6 +67,10 @@ class CancerStatsByCounty(BaseStatsModel):
     # average annual count (typically age-adjusted per 100k)
     AAC : float
 
+    @classmethod
+    def get_lookup_columns(cls):
+        return (cls.FIPS, cls.Site, cls.get_factors(), (cls.AAR, cls.AAC))
+
 class MeasuresByTract(MeasuresByCounty):
     Tract: Optional[str] = Field(index=True, nullable=True)
 
@@ -67,6 +83,10 @@ class MeasuresByHealthRegion(BaseStatsModel):
     def get_geom_field(self):
         return self.hs_region
 
+    @classmethod
+    def get_lookup_columns(cls):
+        return (cls.hs_region, cls.measure, cls.get_factors(), (cls.value,))
+
 
 # ---------------------------------------------------------------------------
 # -- metadata about the models
@@ -176,3 +196,49 @@ FACTOR_DESCRIPTIONS = {
     **HPV_FACTOR_DESCRIPTIONS,
     **UCCC_RESPONDERS_FACTOR_DESCRIPTIONS,
 }
+
+
+# ---------------------------------------------------------------------------
+# -- indexes
+# ---------------------------------------------------------------------------
+
+def add_lookup_indexes(model, by_region=False):
+    """
+    Adds covering indexes for the model's get_lookup_columns() to its table,
+    so that lookups of its values can be answered from an index alone (i.e.,
+    with an index-only scan):
+    - "ix_<table>_by_measure", keyed on the measure and factors, for
+      lookups of a measure's value in every region (e.g. fips-value), and
+    - if 'by_region' is true, "ix_<table>_by_region", keyed on the region,
+      measure, and factors, for lookups of every measure's value in a single
+      region (e.g. by-county).
+
+    The other columns that the lookups read (or filter on less selectively,
+    e.g. the state) are only INCLUDEd in the indexes' leaves.
+    """
+    region, measure, factors, values = model.get_lookup_columns()
+    column = lambda x: model.__table__.c[x.key]
+
+    indexes = [
+        Index(
+            f"ix_{model.__tablename__}_by_measure",
+            *map(column, (measure, *factors)),
+            postgresql_include=[x.key for x in (region, model.State, *values)],
+        )
+    ]
+
+    if by_region:
+        indexes.append(Index(
+            f"ix_{model.__tablename__}_by_region",
+            *map(column, (region, measure, *factors)),
+            postgresql_include=[x.key for x in (model.State, *values)],
+        ))
+
+    return indexes
+
+# (the SCP trend models share their tables with the SCP models, so we add the
+# indexes once per table rather than once per model. only county models are
+# looked up by region.)
+for type, family in STATS_MODELS.items():
+    for model in {model.__tablename__: model for model in family}.values():
+        add_lookup_indexes(model, by_region=(type == "county"))
@@ -0,0 +1,34 @@
+"""
+Models that track the version of the data in the database, so that anything
+derived from the data (e.g., cached responses, precomputed lookups) can tell
+when it's out of date.
+
+The version is a counter in a single-row table that's incremented whenever an
+import command finishes; see tools/data_version.py.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, func
+from sqlmodel import Field, SQLModel
+
+
+# the id of the single row in the data_version table
+DATA_VERSION_ID = 1
+
+
+class DataVersion(SQLModel, table=True):
+    __tablename__ = "data_version"
+
+    id: int = Field(default=DATA_VERSION_ID, primary_key=True, nullable=False)
+
+    # incremented every time the data changes
+    version: int = Field(default=1, nullable=False)
+
+    # when the version was last incremented, and by what
+    # (e.g., the name of the import command)
+    updated_at: Optional[datetime] = Field(
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=True)
+    )
+    source: Optional[str] = Field(default=None, nullable=True)
@@ -3,7 +3,7 @@ Models that represent regions, e.g. the US States, and/or geometry, e.g. county
 and tract boundaries
 """
 
-from typing import Any
+from typing import Any, Optional
 
 from geoalchemy2 import Geometry, WKBElement
 from geoalchemy2.shape import to_shape
@@ -71,6 +71,61 @@ class HealthRegion(GeometryTable, table=True):
     counties: str = Field(index=True)
 
 
+# ===========================================================================
+# === derived geometry
+# ===========================================================================
+
+# the simplified versions of the geometry that are available, and the tolerance
+# (in degrees, since the geometry is in EPSG:4326) with which each is produced;
+# "full" refers to the original geometry. roughly, "low" suits a statewide view
+# and "medium" a regional one.
+GEOMETRY_DETAIL_TOLERANCES = {
+    "low": 0.005,
+    "medium": 0.001,
+}
+
+# the maximum map zoom level at which each simplified level is used, for
+# clients that would rather specify a zoom level than a detail level
+GEOMETRY_DETAIL_MAX_ZOOM = {
+    "low": 7,
+    "medium": 9,
+}
+
+class SimplifiedGeometry(SQLModel, table=True):
+    """
+    Simplified versions of the geometry in the ogr2ogr-loaded tables above,
+    produced by commands/simplify_geometry.py whenever they're reloaded. Each
+    row holds the geometry for a single region at a single detail level.
+
+    (The geometry tables themselves are recreated each time they're loaded, so
+    the simplified geometry has to live in a separate table.)
+    """
+    __tablename__ = "simplified_geometry"
+
+    id: Optional[int] = Field(default=None, nullable=False, primary_key=True)
+
+    # the name of the geometry table, e.g. "county"
+    layer: str = Field(index=True)
+    # a key of GEOMETRY_DETAIL_TOLERANCES
+    detail: str = Field(index=True)
+    # the ogc_fid of the region in the geometry table
+    ogc_fid: int = Field(index=True)
+
+    wkb_geometry: Any = Field(
+        sa_column=Column(
+            Geometry(
+                srid=4326,
+                from_text='ST_GeomFromEWKT',
+                name='geometry',
+                spatial_index=False
+            )
+        )
+    )
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
 # ===========================================================================
 # === reference tables
 # ===========================================================================
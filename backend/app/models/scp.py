@@ -38,6 +38,11 @@ class SCPCountyModel(CancerStatsByCounty):
     def get_factors(cls):
         return (cls.sex, cls.stage, cls.race, cls.age)
 
+    @classmethod
+    def get_lookup_columns(cls):
+        # (the trend models read 'trend' from the same tables)
+        return (cls.FIPS, cls.Site, cls.get_factors(), (cls.AAR, cls.AAC, cls.trend))
+
 
 class SCPDeathsCounty(SCPCountyModel, table=True):
     class Config:
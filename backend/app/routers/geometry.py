@@ -2,61 +2,361 @@
 API endpoints that return geometry, e.g. county/tract boundaries.
 """
 
-from fastapi import Depends
-from fastapi_cache.decorator import cache
+import asyncio
+import gzip
+import json
+from typing import Literal, Optional
+
+import shapely
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import Text, and_, cast, func, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlmodel import select
-from sqlmodel.ext.asyncio.session import AsyncSession
 
-from db import get_session
+from db import session_scope
+from tools.caching import VersionedCache
+from tools.topojson import build_topology
 
 from models import (
     County,
     Tract,
     HealthRegion,
+    SimplifiedGeometry,
 )
+from models.geom import GEOMETRY_DETAIL_MAX_ZOOM
 from fastapi import APIRouter
 
 router = APIRouter()
 
 
+# ============================================================================
+# === geometry rendering
+# ============================================================================
+
+# the geometry responses are large and only change when the geometry is
+# reloaded, so each is rendered once per data version and kept gzipped
+_geometry_cache = VersionedCache()
+
+# the responses limited to other subsets of the fields (see
+# get_geometry_gzipped()), of which only the most recently used are kept,
+# since there are many possible subsets
+GEOMETRY_SUBSET_CACHE_MAX_ENTRIES = 8
+_geometry_subset_cache = VersionedCache(max_entries=GEOMETRY_SUBSET_CACHE_MAX_ENTRIES)
+
+GeometryDetail = Literal["low", "medium", "full"]
+GeometryFormat = Literal["json", "topojson"]
+
+def resolve_geometry_detail(detail: Optional[str], zoom: Optional[int]) -> str:
+    """
+    Determines the detail level for a geometry request: an explicit 'detail'
+    wins, then the coarsest level whose max zoom covers 'zoom' (see
+    GEOMETRY_DETAIL_MAX_ZOOM), and otherwise the full-resolution geometry.
+    """
+    if detail is not None:
+        return detail
+
+    if zoom is not None:
+        for level, max_zoom in sorted(GEOMETRY_DETAIL_MAX_ZOOM.items(), key=lambda x: x[1]):
+            if zoom <= max_zoom:
+                return level
+
+    return "full"
+
+def resolve_geometry_fields(model, fields: Optional[str]) -> tuple[str, ...]:
+    """
+    Parses a comma-delimited list of the given geometry model's fields to
+    include in a response, returning them in the model's field order; if
+    'fields' isn't specified, all of the model's fields are included. Raises a
+    400 error for fields the model doesn't have.
+    """
+    if fields is None:
+        return tuple(model.__fields__)
+
+    requested = {x.strip() for x in fields.split(",") if x.strip()}
+    unknown = requested - set(model.__fields__)
+
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields for {model.__tablename__}: {', '.join(sorted(unknown))}"
+        )
+
+    return tuple(name for name in model.__fields__ if name in requested)
+
+def _detail_geometry(model, detail):
+    """
+    Returns an expression for the given geometry model's geometry at the given
+    detail level, for use in a query passed through _join_detail_geometry().
+
+    For a 'detail' other than "full", the geometry comes from the matching rows
+    of SimplifiedGeometry, falling back to the original geometry for any
+    region that hasn't been simplified (e.g., before simplify_geometry.py has
+    been run.)
+    """
+    if detail == "full":
+        return model.wkb_geometry
+
+    return func.coalesce(SimplifiedGeometry.wkb_geometry, model.wkb_geometry)
+
+def _join_detail_geometry(query, model, detail):
+    """
+    Joins the simplified geometry that _detail_geometry() refers to, if any,
+    into a query that selects from the given geometry model.
+    """
+    if detail == "full":
+        return query
+
+    return query.outerjoin(
+        SimplifiedGeometry,
+        and_(
+            SimplifiedGeometry.ogc_fid == model.ogc_fid,
+            SimplifiedGeometry.layer == model.__tablename__,
+            SimplifiedGeometry.detail == detail,
+        )
+    )
+
+async def _render_geometry_json(model, session, detail, fields) -> bytes:
+    """
+    Renders every row of the given geometry model as a JSON list in a single
+    query, with the given fields (in the same order, and with the same
+    values) as the model's pydantic serialization. The geometry is converted
+    by PostGIS' ST_AsGeoJSON() into a JSON-encoded GeoJSON string, as
+    GeometryTable's json_encoders would.
+
+    If "wkb_geometry" isn't among the fields, the geometry isn't read at all.
+    """
+    geometry = _detail_geometry(model, detail)
+    columns = []
+
+    for name in fields:
+        # (the names are our own field names, so they're safe to inline)
+        columns += [
+            literal_column(f"'{name}'"),
+            func.ST_AsGeoJSON(geometry) if name == "wkb_geometry" else getattr(model, name)
+        ]
+
+    query = select(
+        cast(
+            func.json_agg(aggregate_order_by(func.json_build_object(*columns), model.ogc_fid)),
+            Text
+        )
+    ).select_from(model)
+
+    result = await session.execute(_join_detail_geometry(query, model, detail))
+    return (result.scalar() or "[]").encode()
+
+async def _render_geometry_topojson(model, session, detail, fields) -> bytes:
+    """
+    Renders every row of the given geometry model as a quantized TopoJSON
+    topology with a single object named after the model's table, in which
+    each geometry's id is its row's ogc_fid and its properties are the row's
+    other given fields. Boundaries shared by neighboring regions are stored
+    once.
+    """
+    names = [name for name in fields if name != "wkb_geometry"]
+
+    query = select(
+        model.ogc_fid,
+        *(getattr(model, name) for name in names),
+        func.ST_AsBinary(_detail_geometry(model, detail))
+    ).select_from(model).order_by(model.ogc_fid)
+
+    result = await session.execute(_join_detail_geometry(query, model, detail))
+    rows = result.all()
+
+    geometries = shapely.from_wkb([row[-1] for row in rows])
+    features = [
+        (row[0], dict(zip(names, row[1:-1])), geometry)
+        for row, geometry in zip(rows, geometries)
+    ]
+
+    # building the topology is CPU-bound, so keep it off the event loop
+    topology = await asyncio.to_thread(build_topology, {model.__tablename__: features})
+
+    return json.dumps(topology, separators=(",", ":")).encode()
+
+GEOMETRY_RENDERERS = {
+    "json": _render_geometry_json,
+    "topojson": _render_geometry_topojson,
+}
+
+def _project_geometry(format, gzipped: bytes, fields) -> bytes:
+    """
+    Limits a gzipped rendering from get_geometry_gzipped() to the given fields,
+    i.e. each JSON record to just those keys, or each TopoJSON geometry's
+    properties to those other than "wkb_geometry".
+    """
+    rendered = json.loads(gzip.decompress(gzipped))
+
+    if format == "json":
+        rendered = [{name: row[name] for name in fields} for row in rendered]
+    else:
+        for collection in rendered["objects"].values():
+            for geometry in collection["geometries"]:
+                geometry["properties"] = {
+                    name: geometry["properties"][name]
+                    for name in fields if name != "wkb_geometry"
+                }
+
+    return gzip.compress(json.dumps(rendered, separators=(",", ":")).encode())
+
+async def get_geometry_gzipped(model, detail="full", format="json", fields=None) -> bytes:
+    """
+    Returns the gzipped rendering of every row of the given geometry model at
+    the given detail level, either as a JSON list ("json"; see
+    _render_geometry_json()) or a TopoJSON topology ("topojson"; see
+    _render_geometry_topojson()), limited to the given fields (a tuple from
+    resolve_geometry_fields(); by default, all of them).
+
+    Each rendering of all of the model's fields (and, for JSON, of all of
+    them but the geometry, which is far cheaper to read without it) is
+    cached. Since 'fields' can be any subset of them, other subsets are
+    projected from those renderings, which means decoding and re-encoding the
+    whole response, and only the GEOMETRY_SUBSET_CACHE_MAX_ENTRIES most
+    recently used of them are kept.
+
+    The rendering is shared by concurrent callers, so it runs on a session of
+    its own rather than on any one request's.
+    """
+    fields = fields or tuple(model.__fields__)
+    rendered_fields = tuple(model.__fields__)
+
+    # without the geometry, every detail level renders the same JSON
+    if format == "json" and "wkb_geometry" not in fields:
+        detail = "full"
+        rendered_fields = tuple(name for name in rendered_fields if name != "wkb_geometry")
+
+    async def render():
+        async with session_scope() as session:
+            return gzip.compress(await GEOMETRY_RENDERERS[format](model, session, detail, rendered_fields))
+
+    gzipped = await _geometry_cache.get_or_compute((model, detail, format, rendered_fields), render)
+
+    if fields == rendered_fields:
+        return gzipped
+
+    async def project():
+        # projecting is CPU-bound, so keep it off the event loop
+        return await asyncio.to_thread(_project_geometry, format, gzipped, fields)
+
+    return await _geometry_subset_cache.get_or_compute((model, detail, format, fields), project)
+
+def geometry_openapi_responses(model) -> dict:
+    """
+    Describes the responses of a geometry route for the OpenAPI docs, since the
+    route returns the (possibly gzipped) bytes itself rather than a model.
+    """
+    return {
+        200: {
+            "model": list[model],
+            "description": (
+                f"A JSON list of {model.__name__} records, limited to the requested "
+                "`fields`; or, if `format` is \"topojson\", a TopoJSON topology. "
+                "Gzipped (with `Content-Encoding: gzip`) for clients that accept it."
+            ),
+        }
+    }
+
+def _geometry_response(request: Request, gzipped: bytes) -> Response:
+    """
+    Sends the gzipped JSON as-is to clients that accept gzip (i.e., nearly all
+    of them), and decompresses it for the rest.
+    """
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            gzipped, media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+
+    return Response(
+        gzip.decompress(gzipped), media_type="application/json",
+        headers={"Vary": "Accept-Encoding"}
+    )
+
+
 # ============================================================================
 # === geometry routes
 # ============================================================================
 
-@router.get("/counties", response_model=list[County])
-@cache()
-async def get_counties(session: AsyncSession = Depends(get_session)):
+@router.get("/counties", response_class=Response, responses=geometry_openapi_responses(County))
+async def get_counties(
+    request: Request,
+    detail: Optional[GeometryDetail] = None,
+    zoom: Optional[int] = None,
+    format: GeometryFormat = "json",
+    fields: Optional[str] = None,
+):
     """
     Returns metadata and geometry for counties. The geometry itself is in the
     `wkb_geometry` subkey for each element and is in JSON-encoded GeoJSON
     format.
+
+    The geometry can be simplified for lower zoom levels by specifying either
+    `detail` ("low", "medium", or "full", the default) or the map's `zoom`
+    level, from which a detail level is chosen. Neighboring regions' simplified
+    boundaries still line up exactly.
+
+    If `format` is "topojson", the response is instead a quantized TopoJSON
+    topology (with a single object, "county"), in which the boundaries shared
+    by neighboring counties are only stored once; each geometry's `id` is the
+    county's `ogc_fid`, and its properties are the county's other fields.
+
+    To fetch only some of each county's fields, e.g. for a list of counties,
+    specify them in `fields` as a comma-delimited list, e.g.
+    "us_fips,full,cent_lat,cent_long". If `wkb_geometry` isn't among them, the
+    geometry isn't read or sent at all.
     """
-    result = await session.execute(select(County))
-    counties = result.scalars().all()
-    return counties
+    return _geometry_response(
+        request,
+        await get_geometry_gzipped(
+            County, resolve_geometry_detail(detail, zoom), format,
+            resolve_geometry_fields(County, fields)
+        )
+    )
 
-@router.get("/tracts", response_model=list[Tract])
-@cache()
-async def get_tracts(session: AsyncSession = Depends(get_session)):
+@router.get("/tracts", response_class=Response, responses=geometry_openapi_responses(Tract))
+async def get_tracts(
+    request: Request,
+    detail: Optional[GeometryDetail] = None,
+    zoom: Optional[int] = None,
+    format: GeometryFormat = "json",
+    fields: Optional[str] = None,
+):
     """
     Returns metadata and geometry for tracts. The geometry itself is in the
-    `wkb_geometry` subkey and is in JSON-encoded GeoJSON format.
+    `wkb_geometry` subkey and is in JSON-encoded GeoJSON format. Accepts
+    `detail`, `zoom`, `format`, and `fields` as /counties does.
     """
-    result = await session.execute(select(Tract))
-    tracts = result.scalars().all()
-    return tracts
+    return _geometry_response(
+        request,
+        await get_geometry_gzipped(
+            Tract, resolve_geometry_detail(detail, zoom), format,
+            resolve_geometry_fields(Tract, fields)
+        )
+    )
 
-@router.get("/healthregions", response_model=list[HealthRegion])
-@cache()
-async def get_healthregions(session: AsyncSession = Depends(get_session)):
+@router.get("/healthregions", response_class=Response, responses=geometry_openapi_responses(HealthRegion))
+async def get_healthregions(
+    request: Request,
+    detail: Optional[GeometryDetail] = None,
+    zoom: Optional[int] = None,
+    format: GeometryFormat = "json",
+    fields: Optional[str] = None,
+):
     """
     Returns metadata and geometry for health regions, combinations of counties
     for which specific data is tracked. The geometry itself is in the
-    `wkb_geometry` subkey and is in JSON-encoded GeoJSON format.
+    `wkb_geometry` subkey and is in JSON-encoded GeoJSON format. Accepts
+    `detail`, `zoom`, `format`, and `fields` as /counties does.
     """
-    result = await session.execute(select(HealthRegion))
-    healthregions = result.scalars().all()
-    return healthregions
+    return _geometry_response(
+        request,
+        await get_geometry_gzipped(
+            HealthRegion, resolve_geometry_detail(detail, zoom), format,
+            resolve_geometry_fields(HealthRegion, fields)
+        )
+    )
 
 # @router.get("/edds", response_model=list[Tract])
 # async def get_tracts(session: AsyncSession = Depends(get_session)):
@@ -1,12 +1,42 @@
 """
 API endpoint for '/healthz' healthcheck, which just demonstrates that the API is
 up and running.
+
+Also exposes '/healthz/db-pool', which reports the state of the database
+connection pool(s) for monitoring, and '/healthz/cache', which reports the
+response cache's hit rates.
 """
 
 from fastapi import APIRouter
+from fastapi_cache import FastAPICache
+
+from db import get_pool_stats
+from tools.caching import LayeredCacheBackend, route_cache_stats
 
 router = APIRouter()
 
 @router.get("/healthz")
 async def healthcheck():
     return {"status": "ok"}
+
+@router.get("/healthz/db-pool")
+async def db_pool_stats():
+    """
+    Returns connection pool statistics (connections checked out, overflow,
+    time spent waiting for a connection) for each pool in this worker.
+    """
+    return {"pools": get_pool_stats()}
+
+@router.get("/healthz/cache")
+async def cache_stats():
+    """
+    Returns the response cache's hit and miss counts for this worker, for both
+    the in-memory tier and memcached, and the in-memory tier's size, along
+    with each cached route's hit and miss counts and hit rate.
+    """
+    backend = FastAPICache.get_backend()
+
+    return {
+        "tiers": backend.stats() if isinstance(backend, LayeredCacheBackend) else None,
+        "routes": route_cache_stats(),
+    }
@@ -4,12 +4,12 @@ and legislative district maps.
 """
 
 from fastapi import Depends
-from fastapi_cache.decorator import cache
 from pydantic import BaseModel
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from db import get_session
+from db import get_lazy_session
+from tools.caching import cache
 
 from models import (
     LocationCategory,
@@ -26,7 +26,7 @@ router = APIRouter()
 
 @router.get("/locations", response_model=dict[str, dict[str, str]])
 @cache()
-async def get_location_categories(session: AsyncSession = Depends(get_session)):
+async def get_location_categories(session: AsyncSession = Depends(get_lazy_session)):
     """
     Returns all location categories and IDs to associated locations.
     """
@@ -50,7 +50,7 @@ async def get_location_categories(session: AsyncSession = Depends(get_session)):
 
 @router.get("/locations/by-category/{category_id}", response_model=list[Location])
 @cache()
-async def get_locations(category_id: str, session: AsyncSession = Depends(get_session)):
+async def get_locations(category_id: str, session: AsyncSession = Depends(get_lazy_session)):
     """
     Returns all locations for a given category. The geometry itself is in the
     geometry_json field and is represented as a GeoJSON FeatureCollection.
@@ -67,7 +67,7 @@ async def get_locations(category_id: str, session: AsyncSession = Depends(get_se
 
 @router.get("/locations/{location_id}", response_model=Location)
 @cache()
-async def get_location_by_id(location_id: str, session: AsyncSession = Depends(get_session)):
+async def get_location_by_id(location_id: str, session: AsyncSession = Depends(get_lazy_session)):
     """
     Returns specific locations by ID. The geometry itself is in the
     geometry_json field and is represented as a GeoJSON FeatureCollection.
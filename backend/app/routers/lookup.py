@@ -0,0 +1,163 @@
+"""
+API endpoints that resolve locations to the regions that contain them, e.g.
+a user's position to their county, tract, and health region.
+"""
+
+import asyncio
+from typing import Any, Optional
+
+import numpy as np
+import shapely
+from fastapi import Query, HTTPException, APIRouter
+from pydantic import BaseModel, Field
+from sqlalchemy import func
+from sqlmodel import select
+
+from db import session_scope
+from tools.caching import VersionedCache
+
+from models import (
+    County,
+    Tract,
+    HealthRegion,
+)
+
+router = APIRouter(prefix="/lookup")
+
+
+# the geometry models that points are resolved against, by the name under
+# which their matches are returned
+LOOKUP_LAYERS = {
+    "county": County,
+    "tract": Tract,
+    "healthregion": HealthRegion,
+}
+
+# the most points that can be resolved in a single batch request
+LOOKUP_MAX_POINTS = 10000
+
+# ============================================================================
+# === spatial indexes
+# ============================================================================
+
+class RegionIndex:
+    """
+    An in-process spatial index (a shapely STRtree) over the regions of a
+    geometry model, along with each region's non-geometry fields.
+    """
+
+    def __init__(self, regions: list[dict[str, Any]], geometries):
+        self.regions = regions
+        self.tree = shapely.STRtree(geometries)
+
+    def query(self, points) -> list[Optional[dict[str, Any]]]:
+        """
+        Returns the region that contains each of the given shapely points, or
+        None for points that aren't in any region. A point on the boundary
+        between regions is resolved to the first of them.
+        """
+        point_idx, region_idx = self.tree.query(points, predicate="intersects")
+
+        # keep only the first match for each point
+        point_idx, first = np.unique(point_idx, return_index=True)
+
+        matches = [None] * len(points)
+        for i, r in zip(point_idx.tolist(), region_idx[first].tolist()):
+            matches[i] = self.regions[r]
+
+        return matches
+
+# the indexes are built from the geometry, so they're kept per data version
+_region_indexes = VersionedCache()
+
+async def get_region_index(model) -> RegionIndex:
+    """
+    Returns the spatial index over the regions of the given geometry model,
+    building it from the database if it isn't already cached.
+    """
+    async def load():
+        names = [name for name in model.__fields__ if name != "wkb_geometry"]
+
+        async with session_scope() as session:
+            result = await session.execute(
+                select(
+                    *(getattr(model, name) for name in names),
+                    func.ST_AsBinary(model.wkb_geometry)
+                ).order_by(model.ogc_fid)
+            )
+            rows = result.all()
+
+        regions = [dict(zip(names, row[:-1])) for row in rows]
+        geometries = shapely.from_wkb([row[-1] for row in rows])
+
+        # building the tree is CPU-bound, so keep it off the event loop
+        return await asyncio.to_thread(RegionIndex, regions, geometries)
+
+    return await _region_indexes.get_or_compute(model, load)
+
+async def lookup_points(lats: list[float], lons: list[float]) -> list[dict[str, Any]]:
+    """
+    Resolves each of the given points (in EPSG:4326) to the regions of each
+    of LOOKUP_LAYERS that contain it, in one vectorized query per layer.
+    """
+    points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+
+    results = [{"lat": lat, "lon": lon} for lat, lon in zip(lats, lons)]
+
+    for layer, model in LOOKUP_LAYERS.items():
+        index = await get_region_index(model)
+
+        for result, match in zip(results, index.query(points)):
+            result[layer] = match
+
+    return results
+
+
+# ============================================================================
+# === lookup routes
+# ============================================================================
+
+class PointLookupResult(BaseModel):
+    lat: float
+    lon: float
+    county: Optional[dict[str, Any]]
+    tract: Optional[dict[str, Any]]
+    healthregion: Optional[dict[str, Any]]
+
+class PointLookupRequestPoint(BaseModel):
+    lat: float = Field(ge=-90, le=90)
+    lon: float = Field(ge=-180, le=180)
+
+class PointsLookupRequest(BaseModel):
+    points: list[PointLookupRequestPoint]
+
+@router.get("/point", response_model=PointLookupResult)
+async def lookup_point(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+):
+    """
+    Returns the county, tract, and health region that contain the given point,
+    each with the same fields (other than the geometry) as in the /counties,
+    /tracts, and /healthregions responses. Regions that don't contain the
+    point, e.g. for a point outside the state, are null.
+    """
+    return (await lookup_points([lat], [lon]))[0]
+
+@router.post("/points", response_model=list[PointLookupResult])
+async def lookup_points_batch(
+    body: PointsLookupRequest,
+):
+    """
+    Like /lookup/point, but for a list of up to 10,000 points at once; the
+    results are in the same order as the points.
+    """
+    if len(body.points) > LOOKUP_MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {LOOKUP_MAX_POINTS} points can be looked up at once"
+        )
+
+    return await lookup_points(
+        [x.lat for x in body.points], [x.lon for x in body.points]
+    )
@@ -3,33 +3,48 @@ API endpoints that return statistics, e.g. cancer incidence/mortality,
 or sociodemographic measures.
 """
 
+import asyncio
+import glob
 import os
+import re
 import csv
-from io import StringIO, BytesIO
+import json
+from collections import defaultdict
+from functools import partial
+from io import StringIO
 import zipfile
 
-from typing import Any, Optional, Annotated
-from fastapi import Depends, Query, HTTPException, APIRouter
-from fastapi.responses import StreamingResponse
+from typing import Any, Literal, Optional, Annotated
+import numpy as np
+from fastapi import Depends, Query, HTTPException, APIRouter, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import func, case
+from sqlalchemy import func, case, cast, literal, literal_column, null, union_all, Float, String
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
-from fastapi_cache.decorator import cache
 
-from tools.queries import get_model_factor_defaults_clause, factor_default_clauses
+from tools.queries import (
+    get_model_factor_defaults_clause, get_model_factor_defaults, peek_model_factor_defaults,
+    get_category_factors_with_values, get_factor_source
+)
 from tools.strings import slugify, slug_modelname_sans_type, sanitize
-from tools.accessors import get_keys
+from tools.accessors import get_keys, omit
+from tools.caching import VersionedCache, ResponseJsonCoder, cache, request_key_builder, data_version_etag
+from tools.responses import ranged_file_response
+
+from tools.data_version import get_data_version
 
-from db import get_session
+from db import get_session, get_lazy_session, gather_with_sessions, session_scope
 
-from settings import LIMIT_TO_STATE
+from settings import LIMIT_TO_STATE, DB_MAX_CONCURRENT_QUERIES, DOWNLOAD_CACHE_DIR
 
 from models.base import MeasureUnit
 from models import (
     County,
+    Tract,
+    HealthRegion,
     STATS_MODELS,
     CANCER_MODELS,
     MEASURE_DESCRIPTIONS,
@@ -71,6 +86,146 @@ class FIPSMeasureResponse(BaseModel):
     order: Optional[list[str]]
     values: dict[str, FIPSValue]
 
+# ----------------------------------------------------------------
+# --- region IDs, for compact (binary) fips-value responses
+# ----------------------------------------------------------------
+
+# media type of the packed fips-value response; see get_dataset_fips()
+FIPS_VALUE_BINARY_MEDIA_TYPE = "application/octet-stream"
+
+# the column in each geometry table that identifies its regions, by type
+GEOID_FIELDS = {
+    "county": County.us_fips,
+    "tract": Tract.fips,
+    "healthregion": HealthRegion.hs_region,
+}
+
+def resolve_fips_value_format(request:Request, format:Optional[str]=None) -> str:
+    """
+    Determines whether a fips-value request wants a "json" or "binary"
+    response; an explicit 'format' takes precedence over the Accept header.
+    """
+    if format is not None:
+        return format
+
+    return (
+        "binary"
+        if FIPS_VALUE_BINARY_MEDIA_TYPE in request.headers.get("accept", "") else
+        "json"
+    )
+
+def fips_value_key_builder(type, model, simple_model_name):
+    """
+    Returns a key builder for the fips-value route of the given model, which
+    builds a cache key like request_key_builder(), plus the response format,
+    since the binary form of fips-value can be requested via the Accept header
+    rather than the query string.
+
+    For models with factors, 'filters' is replaced in the key by its canonical
+    form (see canonical_factor_filters()), so that e.g. reordered filters, or
+    filters that name the default values, share a key with the equivalent
+    request.
+
+    Building a key never queries the database, so cache hits don't either:
+    it only uses the model's effective defaults if they're already loaded for
+    the current data version (see prime_model_factor_defaults()).
+    """
+    factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name)
+
+    async def key_builder(func, namespace:str="", *, request:Request=None, kwargs:dict=None, **extra) -> str:
+        kwargs = kwargs or {}
+        params = None
+
+        if factor_labels and "measure" in kwargs:
+            factor_defaults = peek_model_factor_defaults(model, type)
+
+            filter_factors = canonical_factor_filters(
+                factor_labels, kwargs.get("filters"),
+                factor_defaults.get(kwargs["measure"], {}) if factor_defaults is not None else None
+            )
+
+            params = {
+                **request.query_params,
+                "filters": ";".join(f"{f}:{v}" for f, v in sorted(filter_factors.items())),
+            }
+
+        key = await request_key_builder(func, namespace, request=request, params=params)
+        format = resolve_fips_value_format(request, kwargs.get("format"))
+
+        return f"{key}:{format}"
+
+    return key_builder
+
+class GEOIDsResponse(BaseModel):
+    data_version: int
+    geoids: list[str]
+
+# the region IDs only change when the geometry is reloaded, so we keep the
+# sorted list (and each ID's position in it) per type until the data changes
+_geoids_cache = VersionedCache()
+
+async def get_sorted_geoids(type) -> tuple[list[str], dict[str, int]]:
+    """
+    Returns a sorted list of the region IDs for the given type (e.g., "county"),
+    along with a dict that maps each ID to its position in the list. Binary
+    fips-value responses are ordered by this list.
+    """
+    async def load():
+        geoid_field = GEOID_FIELDS[type]
+        async with session_scope() as session:
+            result = await session.execute(select(geoid_field).distinct())
+        geoids = sorted(x for x in result.scalars().all() if x is not None)
+        return geoids, {geoid: i for i, geoid in enumerate(geoids)}
+
+    return await _geoids_cache.get_or_compute(type, load)
+
+def pack_region_values(geoids:dict[str, int], objects, columns:list[str], convert=None) -> bytes:
+    """
+    Packs the given columns of the rows in 'objects' into little-endian float32
+    arrays, one after the other, each with one entry per region ID in 'geoids'
+    (a dict of region IDs to positions, from get_sorted_geoids()). Regions
+    without a value, and rows for regions that aren't in 'geoids', are NaN.
+
+    If specified, 'convert' is applied to each non-null value before it's
+    packed (e.g., to map ordinal strings to numbers); it may return None.
+    """
+    packed = np.full((len(columns), len(geoids)), np.nan, dtype="<f4")
+
+    for x in objects:
+        i = geoids.get(x["GEOID"])
+
+        if i is None:
+            continue
+
+        for c, col in enumerate(columns):
+            value = x[col]
+            if value is not None and convert is not None:
+                value = convert(value)
+            if value is not None:
+                packed[c, i] = value
+
+    return packed.tobytes()
+
+@router.get("/{type}/geoids", response_model=GEOIDsResponse)
+async def get_geoids(type: str):
+    """
+    Returns the sorted list of region IDs for the given type (e.g., "county"),
+    which gives the order of the values in a binary fips-value response.
+
+    Clients should hold onto the list for as long as 'data_version' matches the
+    X-Data-Version header of the binary responses they receive.
+    """
+    if type not in GEOID_FIELDS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Region type '{type}' not found"
+        )
+
+    data_version = await get_data_version()
+    geoids, _ = await get_sorted_geoids(type)
+
+    return GEOIDsResponse(data_version=data_version, geoids=geoids)
+
 # provides high-level information about the available categories and measures
 # by iterating over the STATS_MODELS dict
 
@@ -94,9 +249,66 @@ class StatsMetaResponse(BaseModel):
     label: str
     categories: dict[str, CategoryMetaResponse]
 
+async def _query_model_measures_meta(type, model, session):
+    """
+    Produces the entry for a single model (i.e. measure category) in the
+    /measures response: its label, and for each of its measures the measure's
+    metadata and the distinct values of each factor for that measure.
+
+    Issues two queries regardless of the number of measures or factors: one for
+    the distinct measures, and one for the factor values of every measure,
+    grouped by measure.
+    """
+    simple_model_name = slug_modelname_sans_type(model, type)
+
+    measure_descs = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
+    factor_descs = FACTOR_DESCRIPTIONS.get(simple_model_name, {})
+
+    if model in CANCER_MODELS or model in SCP_TRENDS_MODELS:
+        query = select(model.Site).distinct().order_by(model.Site)
+    else:
+        query = select(model.measure).distinct().order_by(model.measure)
+
+    # if LIMIT_TO_STATE is not None:
+    #     query = query.where(model.State == LIMIT_TO_STATE)
+
+    # query for measure categories within this measure
+    result = await session.execute(query)
+    measures = result.scalars().all()
+
+    # query for the distinct values of each factor, for all measures at once
+    factors_by_measure = await get_category_factors_with_values(
+        model, type, session, include_unlabeled=True
+    )
+
+    # measures that have no values for any factor don't come back from the
+    # above, so we give them an empty set of values for each factor
+    empty_factors = {
+        f: {
+            "label": str(fv["label"] or f),
+            "default": fv.get("default"),
+            "values": {}
+        }
+        for f, fv in factor_descs.items()
+    }
+
+    return {
+        "label": model.Config.label or simple_model_name,
+        "measures": {
+            measure: {
+                "label": measure_descs.get(measure, {}).get('label') or measure,
+                "unit": measure_descs.get(measure, {}).get('unit'),
+                "source": measure_descs.get(measure, {}).get('source'),
+                "source_url": measure_descs.get(measure, {}).get('source_url'),
+                "factors": factors_by_measure.get(measure, empty_factors)
+            }
+            for measure in measures
+        }
+    }
+
 @router.get("/measures", response_model=dict[str, StatsMetaResponse])
 @cache()
-async def get_measures(session: AsyncSession = Depends(get_session)):
+async def get_measures():
     f"""
     Gets all distinct values of 'measure' for all stats tables.
 
@@ -104,85 +316,30 @@ async def get_measures(session: AsyncSession = Depends(get_session)):
     for each factor.
     """
 
+    # the queries for each model are independent, so we run them concurrently,
+    # each on its own connection
+    models = [
+        (type, model)
+        for type, family in STATS_MODELS.items()
+        for model in family
+    ]
+    model_metas = await gather_with_sessions(*(
+        partial(_query_model_measures_meta, type, model)
+        for type, model in models
+    ))
+
     # stores measures by type (country vs. tract) and table
     all_measures = {}
 
-    for type, models in STATS_MODELS.items():
+    for type in STATS_MODELS:
         all_measures[type] = {
             "label": type.capitalize() if type != "healthregion" else "Health Statistic Region",
             "categories": {}
         }
 
-        for model in models:
-            simple_model_name = slug_modelname_sans_type(model, type)
-
-            measure_descs = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
-            factor_descs = FACTOR_DESCRIPTIONS.get(simple_model_name, {})
-
-            if model in CANCER_MODELS or model in SCP_TRENDS_MODELS:
-                query = select(model.Site).distinct().order_by(model.Site)
-            else:
-                query = select(model.measure).distinct().order_by(model.measure)
-
-            # if LIMIT_TO_STATE is not None:
-            #     query = query.where(model.State == LIMIT_TO_STATE)
-
-            # query for measure categories within this measure
-            result = await session.execute(query)
-
-            async def get_factors_with_values(model, measure):
-                """
-                Given a model (i.e. measure category) and a measure
-                (i.e, a specific value of the 'measure' field within the model),
-                produces a dict of factors and their distinct values for that
-                measure.
-                """
-
-                # run queries for the values of each factor for this model
-                factor_results = {}
-                for factor in factor_descs:
-                    # gets all distinct values for the factor, ordered
-                    # alphabetically
-                    factor_query = (
-                        select(getattr(model, factor).distinct())
-                            .order_by(getattr(model, factor))
-                    )
-
-                    # further filters down to the measure category, with different
-                    # handling for cancer models since they store the measure in
-                    # the "Site" column
-                    if model in CANCER_MODELS or model in SCP_TRENDS_MODELS:
-                        factor_query = factor_query.where(model.Site == measure)
-                    else:
-                        factor_query = factor_query.where(model.measure == measure)
-
-                    factor_results[factor] = await session.execute(factor_query)
-
-                return {
-                    f: {
-                        "label": str(fv["label"] or f),
-                        "default": fv.get("default"),
-                        "values": {
-                            x: fv.get("values", {}).get(x, x) or x
-                            for x in factor_results[f].scalars().all()
-                        }
-                    }
-                    for f, fv in factor_descs.items()
-                }
-
-            all_measures[type]["categories"][simple_model_name] = {
-                "label": model.Config.label or simple_model_name,
-                "measures": {
-                    measure: {
-                        "label": measure_descs.get(measure, {}).get('label') or measure,
-                        "unit": measure_descs.get(measure, {}).get('unit'),
-                        "source": measure_descs.get(measure, {}).get('source'),
-                        "source_url": measure_descs.get(measure, {}).get('source_url'),
-                        "factors": await get_factors_with_values(model, measure)
-                    }
-                    for measure in result.scalars().all()
-                }
-            }
+    for (type, model), model_meta in zip(models, model_metas):
+        simple_model_name = slug_modelname_sans_type(model, type)
+        all_measures[type]["categories"][simple_model_name] = model_meta
 
     return all_measures
 
@@ -223,89 +380,175 @@ class ByCountyResponse(BaseModel):
 # CCC models for state statistics.
 AUTOGENERATE_STATE_STATS = False
 
-async def _query_state_stats(session, model, factor_constraints, measure_label=None):
+# the CCC state-level statistics are small and only change when the data does,
+# so rather than querying them with every request we load them all once per
+# data version and look them up in memory
+_state_stats_cache = VersionedCache()
+
+async def _load_state_stats_index():
     """
-    Queries the state-level statistics for a given model. If measure_label is
-    unspecified, returns a dict of measure names to state values, where each
-    value is a dict containing the value and the source of the statistic. If
-    measure_label is specified, returns a single dict with the state value and
-    source.
+    Loads all state-level statistics from the CCC models into an index of the
+    following form, for use by _lookup_state_stats():
+    {
+        "cancer": { (<state model>, <site>): [<row dict with factors>, ...] },
+        "other": { <measure category>: { <measure>: <row dict> } }
+    }
+    """
+    async def load():
+        index = {"cancer": defaultdict(list), "other": defaultdict(dict)}
+
+        async with session_scope() as session:
+            for state_model in (StateCancerIncidenceStats, StateCancerMortalityStats):
+                result = await session.execute(
+                    select(
+                        state_model.site,
+                        state_model.state_avg,
+                        *state_model.get_factors()
+                    )
+                )
+                for x in result.mappings().all():
+                    index["cancer"][(state_model, x["site"])].append(dict(x))
+
+            result = await session.execute(
+                select(
+                    StateSociodemographicStats.measure_category,
+                    StateSociodemographicStats.measure,
+                    StateSociodemographicStats.state_avg,
+                )
+            )
+            for x in result.mappings().all():
+                index["other"][x["measure_category"]][x["measure"]] = dict(x)
+
+        return index
+
+    return await _state_stats_cache.get_or_compute("index", load)
+
+def _lookup_state_stats(index, model, factor_constraints, measure_label=None):
+    """
+    Looks up the state-level statistics for a given model in the index produced
+    by _load_state_stats_index(). If measure_label is unspecified, returns a
+    dict of measure names to state values, where each value is a dict
+    containing the value and the source of the statistic. If measure_label is
+    specified, returns a single dict with the state value and source (or an
+    empty dict if there's no value.)
 
     Notes:
-    - The factor_constraints argument is only used when querying cancer models,
-      since only the state-level cancer models have factors defined. (As of this
-      writing, many combinations of factors don't have state-level statistics in
-      the database, especially for mortality stats.)
+    - The factor_constraints argument is only used when looking up cancer
+      models, since only the state-level cancer models have factors defined. (As
+      of this writing, many combinations of factors don't have state-level
+      statistics in the database, especially for mortality stats.) If
+      measure_label is unspecified, it's of the form { <measure>: { <factor>:
+      <value> } } and only the measures in it are returned; otherwise, it's of
+      the form { <factor>: <value> }.
     - The source returned by this method will always be "ccc", i.e. "Colorado
-      Cancer Center", since this method just queries the Colorado Cancer Center
-      models for state-level statistics.
+      Cancer Center", since the index just contains the Colorado Cancer Center
+      models' state-level statistics.
 
-    :param session: a database session
-    :param model: the model class to query
-    :param factor_constraints: a dict of factor constraints to apply to the query; this is only used for cancer models
+    :param index: the state stats index, from _load_state_stats_index()
+    :param model: the model class for which to look up state values
+    :param factor_constraints: a dict of factor constraints; this is only used for cancer models
     :param measure_label: an optional label for the measure to filter by
     :return: a dict of measure names to state values + sources, or if measure_label is specified,
         a single dict with the information for that measure.
     """
-    # retrieve state values by querying CCC models
+    state_values = {}
+
     if model in [SCPIncidenceCounty, SCPDeathsCounty]:
         state_model = StateCancerIncidenceStats if model is SCPIncidenceCounty else StateCancerMortalityStats
 
-        # if we've specified a measure, we need to remap the value in such a way
-        # that it can be passed to factor_default_clauses(), which expects a dict
-        # of measures, then factor values for each measure
+        # if we've specified a measure, we need to remap the value so that it's
+        # a dict of measures, then factor values for each measure
         if measure_label is not None:
             factor_constraints = {
                 measure_label: factor_constraints
             }
 
-        state_query = (
-            select(
-                state_model.site.label("measure"),
-                state_model.state_avg.label("value"),
-            ).where(
-                factor_default_clauses(factor_constraints, state_model, state_model.site)
-            )
-        )
-
-         # if a measure (really, a site in this case) was specified, filter the query to that site
-        if measure_label is not None:
-            state_query = state_query.where(state_model.site == measure_label)
+        for site, factor_values in factor_constraints.items():
+            for x in index["cancer"].get((state_model, site), []):
+                if all(x.get(factor) == value for factor, value in factor_values.items()):
+                    state_values[site] = {
+                        "measure": site, "value": x["state_avg"], "stat_source": "ccc"
+                    }
 
     else:
-        state_model = StateSociodemographicStats
-        state_query = (
-            select(
-                state_model.measure.label("measure"),
-                state_model.state_avg.label("value"),
-            ).where(
-                state_model.measure_category == model.Config.label
-            )
-        )
-
-        # if a measure was specified, filter the query to that measure
-        if measure_label is not None:
-            state_query = state_query.where(state_model.measure == measure_label)
-
-    # query and produce a dict of state values
-    result = await session.execute(state_query)
-    state_values = {
-        x["measure"]: {**x, **{"stat_source": "ccc"}} for x in result.mappings().all()
-    }
+        for measure, x in index["other"].get(model.Config.label, {}).items():
+            if measure_label is None or measure == measure_label:
+                state_values[measure] = {
+                    "measure": measure, "value": x["state_avg"], "stat_source": "ccc"
+                }
 
     # again, if only a specific measure was requested, return just that measure
     # (note that rather than returning {measure: value}, we return just the value and its source)
-    if measure_label is not None and measure_label in state_values:
-        return state_values.get(measure_label)
+    if measure_label is not None:
+        return state_values.get(measure_label, {})
 
     return state_values
 
+def _county_measures_query(model, category, factor_defaults_clause=None, source=None):
+    """
+    Builds a query that aggregates each measure's value for the given model,
+    with columns "category", "measure", "value", and "aac" so that the queries
+    for different models can be combined via UNION ALL. "category" is the
+    literal value of 'category', and "aac" is NULL for non-cancer models.
+
+    Aggregating lets us use the same query both for the average over all
+    regions and, once filtered to a FIPS, the value for a single region (taking
+    the average or median for a single number just produces that number.)
+
+    If 'source' is given (see get_factor_source()), the rows are selected from
+    it rather than from the model itself.
+    """
+    source = source if source is not None else model
+
+    if model in CANCER_MODELS:
+        query = select(
+            cast(literal(category), String).label("category"),
+            source.Site.label("measure"),
+            func.avg(source.AAR).label("value"),
+            func.avg(source.AAC).label("aac")
+        ).group_by(source.Site)
+
+    elif model in SCP_TRENDS_MODELS:
+        # for trend models, since we're dealing with ordinal values
+        # stored as strings in the database, we have to do the following:
+        # 1. map string values to ordinal values so that they're ordered
+        # 2. take the median
+        # 3. map the ordinal values back to their string values
+        query = select(
+            cast(literal(category), String).label("category"),
+            source.Site.label("measure"),
+            func.percentile_cont(0.5).within_group(case(
+                (source.trend == 'falling', TREND_MAP['falling']),
+                (source.trend == 'stable', TREND_MAP['stable']),
+                (source.trend == 'rising', TREND_MAP['rising']),
+                else_=TREND_MAP_NONE
+            )).label("value"),
+            cast(null(), Float).label("aac")
+        ).group_by(source.Site).where(source.trend != "")
+
+    else:
+        query = select(
+            cast(literal(category), String).label("category"),
+            source.measure.label("measure"),
+            func.avg(source.value).label("value"),
+            cast(null(), Float).label("aac")
+        ).group_by(source.measure)
+
+    if factor_defaults_clause is not None:
+        query = query.where(factor_defaults_clause)
+
+    return query
+
 @router.get("/by-county/{county_fips}", response_model=ByCountyResponse)
 @cache()
-async def get_county_measures(county_fips:str, session: AsyncSession = Depends(get_session)):
+async def get_county_measures(county_fips:str, session: AsyncSession = Depends(get_lazy_session)):
     f"""
     For a given county specified by its FIPS, returns all statistics associated
     with the county as well as corresponding state-level statistics, when available.
+
+    Rather than querying each model in turn, the county's values for all models
+    are retrieved by a single UNION ALL query; the state-level values come from
+    an in-memory index that's loaded once per data version.
     """
 
     # store info about measure for the specified county
@@ -326,134 +569,152 @@ async def get_county_measures(county_fips:str, session: AsyncSession = Depends(g
     }
     type = "county"
 
-    for model in STATS_MODELS[type]:
-        simple_model_name = slug_modelname_sans_type(model, type)
-        measure_descs = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
+    models = {
+        slug_modelname_sans_type(model, type): model
+        for model in STATS_MODELS[type]
+    }
 
-        # =========================================================================
-        # === construct initial query objects for the current model
-        # =========================================================================
+    # =========================================================================
+    # === resolve factor values for each measure category
+    # =========================================================================
+
+    # if there are factors defined for a model, constrain its query to the
+    # default values for each factor, or a possible value if the default
+    # doesn't exist (e.g., if the default for sex is "All" but the data only has
+    # "Female" entries due to being a sex-linked cancer, e.g. ovarian cancer)
+    factor_defaults = dict(zip(
+        models.keys(),
+        await gather_with_sessions(*(
+            partial(get_model_factor_defaults_clause, model, type)
+            for model in models.values()
+        ))
+    ))
+
+    # models whose measures are all limited to their default factor values can
+    # be read from their (much smaller) default-factor slices instead
+    sources = dict(zip(
+        models.keys(),
+        await asyncio.gather(*(
+            get_factor_source(model, type, factor_defaults[category][0])
+            for category, model in models.items()
+        ))
+    ))
+
+    def measures_query(category, model):
+        source = sources[category]
+
+        # (a slice only holds the rows for the default factor values, so it
+        # doesn't need the clause that limits the model to them)
+        return _county_measures_query(
+            model, category,
+            factor_defaults[category][1] if source is model else None,
+            source=source
+        )
 
-        # since we need both the average values for all regions and individual
-        # values for the specified county, we have to issue two queries:
-        # 1. a query for the average values of all regions
-        # 2. a restricted query just for the specified region
-        # (of course, taking the average or median for a single number just
-        # produces that number, so we can use the same query for both.)
+    # =========================================================================
+    # === build queries over all models
+    # =========================================================================
+
+    county_query = union_all(*(
+        measures_query(category, model).where(sources[category].FIPS == county_fips)
+        for category, model in models.items()
+    )).order_by(literal_column("measure"))
+
+    async def query_county_values(session):
+        return (await session.execute(county_query)).mappings().all()
+
+    async def query_autogen_state_values(session):
+        # the same aggregates, but over all regions rather than just the county
+        autogen_query = union_all(*(
+            measures_query(category, model)
+            for category, model in models.items()
+        ))
+        return (await session.execute(autogen_query)).mappings().all()
+
+    (county_rows, *autogen_rows), state_stats_index = await asyncio.gather(
+        gather_with_sessions(
+            query_county_values,
+            *((query_autogen_state_values,) if AUTOGENERATE_STATE_STATS else ())
+        ),
+        _load_state_stats_index()
+    )
 
-        if model in CANCER_MODELS:
-            query = select(
-                model.Site.label("measure"),
-                func.avg(model.AAR).label("value"),
-                func.avg(model.AAC).label("aac")
-            ).group_by(model.Site).order_by(model.Site)
-
-        elif model in SCP_TRENDS_MODELS:
-            # for trend models, since we're dealing with ordinal values
-            # stored as strings in the database, we have to do the following:
-            # 1. map string values to ordinal values so that they're ordered
-            # 2. take the median
-            # 3. map the ordinal values back to their string values
-            query = select(
-                model.Site.label("measure"),
-                func.percentile_cont(0.5).within_group(case(
-                    (model.trend == 'falling', TREND_MAP['falling']),
-                    (model.trend == 'stable', TREND_MAP['stable']),
-                    (model.trend == 'rising', TREND_MAP['rising']),
-                    else_=TREND_MAP_NONE
-                )).label("value")
-            ).group_by(model.Site).where(model.trend != "").order_by(model.Site)
+    # =========================================================================
+    # === retrieve (or compute) state-level values
+    # =========================================================================
 
-        else:
-            query = select(
-                model.measure.label("measure"),
-                func.avg(model.value).label("value")
-            ).group_by(model.measure).order_by(model.measure)
-
-        # =========================================================================
-        # === resolve factor values for current measure category
-        # =========================================================================
-
-        # if there are factors defined for this model, constrain the query to
-        # the default values for each factor, or a possible value if the default
-        # doesn't exist (e.g., if the default for sex is "All" but the data only has
-        # "Female" entries due to being a sex-linked cancer, e.g. ovarian cancer)
-
-        factor_constraints, factor_defaults_clause = await get_model_factor_defaults_clause(model, type, session)
-        if factor_defaults_clause is not None:
-            query = query.where(factor_defaults_clause)
-
-        # =========================================================================
-        # === retrieve (or compute) state-level values
-        # =========================================================================
-
-        # retrieve state values by querying CCC models
-        state_values = await _query_state_stats(session, model, factor_constraints)
-
-        # if AUTOGENERATE_STATE_STATS is true, we'll compute the state values
-        # and merge them with the CCC-suplied values, preferring given values
-        # over computed ones if both exist
-        if AUTOGENERATE_STATE_STATS:
-            # issue the query before we filter down to a FIPS to get the average
-            # over all regions
-            result = await session.execute(query)
-            
-            # note that we retrieve stats by label, not by measure name,
-            # which is why we're pulling the label out of the metadata
-            autogen_state_values = {
-                (measure_descs.get(x["measure"], {}).get("label") or x["measure"]):
-                {**dict(zip(x.keys(), x)), **{"stat_source": "computed"}}
-                for x in result.all()
-            }
+    # state values from the CCC models, by category and then measure
+    state_values = {
+        category: _lookup_state_stats(state_stats_index, model, factor_defaults[category][0])
+        for category, model in models.items()
+    }
+
+    # if AUTOGENERATE_STATE_STATS is true, we'll compute the state values
+    # and merge them with the CCC-suplied values, preferring given values
+    # over computed ones if both exist
+    if AUTOGENERATE_STATE_STATS:
+        autogen_state_values = defaultdict(dict)
+
+        for x in autogen_rows[0]:
+            category, model = x["category"], models[x["category"]]
+            measure_descs = MEASURE_DESCRIPTIONS.get(category, {})
+            row = omit(x, "category")
 
             # map the trend values back to their human-readable labels
             if model in SCP_TRENDS_MODELS:
-                for x in autogen_state_values:
-                    autogen_state_values[x]["value"] = INVERTED_TREND_MAP.get(
-                        int(autogen_state_values[x]["value"]), ""
-                    )
+                row["value"] = INVERTED_TREND_MAP.get(int(row["value"]), "")
 
-            # merge existing state values and autogenerated values, preferring
-            # the given state values over the computed ones
-            state_values = {
-                **autogen_state_values,
-                **state_values
+            # note that we retrieve stats by label, not by measure name,
+            # which is why we're pulling the label out of the metadata
+            autogen_state_values[category][
+                measure_descs.get(x["measure"], {}).get("label") or x["measure"]
+            ] = {**row, **{"stat_source": "computed"}}
+
+        # merge existing state values and autogenerated values, preferring
+        # the given state values over the computed ones
+        for category in models:
+            state_values[category] = {
+                **autogen_state_values[category],
+                **state_values[category]
             }
 
-        # =========================================================================
-        # === final query, response generation
-        # =========================================================================
-
-        # limit the query to the specified county and query for measure
-        # categories within this measure
-        query = query.where(model.FIPS == county_fips)
-        result = await session.execute(query)
-
-        # process measures for this model, replacing 'label' with a human-readable
-        # version from the metadata, if available
-        measure_values = {
-            x["measure"]: {
-                # bring in unit + extra data, e.g. ordinal ordering for SCP trends
-                **measure_descs.get(x["measure"], {}),
-                # bring in all the fields in the row
-                **x,
-                # process columns that require special handling or cross-refs
-                **{
-                    "value": x["value"] if model not in SCP_TRENDS_MODELS else INVERTED_TREND_MAP.get(int(x["value"]), ""),
-                    "label": measure_descs.get(x["measure"], {}).get('label') or x["measure"],
-                    "state_value": state_values.get(measure_descs.get(x["measure"], {}).get('label'), {}).get("value", None),
-                    "state_aac": state_values.get(measure_descs.get(x["measure"], {}).get('label'), {}).get("aac", None),
-                    "state_stat_source": state_values.get(measure_descs.get(x["measure"], {}).get('label'), {}).get("stat_source", None),
-                    "factor_constraints": factor_constraints.get(x["measure"], {})
-                }
-            }
-            for x in result.all()
+    # =========================================================================
+    # === response generation
+    # =========================================================================
+
+    # add each model to the set of all measure categories, even if there's
+    # no data for this county
+    for category, model in models.items():
+        all_measures["categories"][category] = {
+            "label": model.Config.label or category,
+            "measures": {}
         }
 
-        # add it to the set of all measure categories
-        all_measures["categories"][simple_model_name] = {
-            "label": model.Config.label or simple_model_name,
-            "measures":  measure_values
+    # process measures for each model, replacing 'label' with a human-readable
+    # version from the metadata, if available
+    for x in county_rows:
+        category, model = x["category"], models[x["category"]]
+        measure_descs = MEASURE_DESCRIPTIONS.get(category, {})
+        factor_constraints = factor_defaults[category][0]
+        category_state_values = state_values[category]
+
+        # bring in all the fields in the row (only cancer models have 'aac')
+        row = omit(x, "category") if model in CANCER_MODELS else omit(x, "category", "aac")
+        measure_label = measure_descs.get(x["measure"], {}).get('label')
+
+        all_measures["categories"][category]["measures"][x["measure"]] = {
+            # bring in unit + extra data, e.g. ordinal ordering for SCP trends
+            **measure_descs.get(x["measure"], {}),
+            **row,
+            # process columns that require special handling or cross-refs
+            **{
+                "value": x["value"] if model not in SCP_TRENDS_MODELS else INVERTED_TREND_MAP.get(int(x["value"]), ""),
+                "label": measure_label or x["measure"],
+                "state_value": category_state_values.get(measure_label, {}).get("value", None),
+                "state_aac": category_state_values.get(measure_label, {}).get("aac", None),
+                "state_stat_source": category_state_values.get(measure_label, {}).get("stat_source", None),
+                "factor_constraints": factor_constraints.get(x["measure"], {})
+            }
         }
 
     return all_measures
@@ -482,6 +743,286 @@ def parse_filter_str(filters):
 class FactorsFilter(BaseModel):
     factors : dict[str,str]
 
+def apply_factor_filters(factor_labels, filters, factor_defaults) -> dict:
+    """
+    Determines the value of each of the factors in 'factor_labels' (a model's
+    entry in FACTOR_DESCRIPTIONS) that a fips-value request applies: the value
+    from 'filters' (a string parsed by parse_filter_str()) if it has one,
+    otherwise the measure's effective default from 'factor_defaults'.
+    """
+    # takes a string of the form "<factor1>:<value1>;<factor2>:<value2>;..."
+    # and produces a dict of factor-value pairs on which to filter
+    # (unless filters wasn't specified, in which case don't apply any filters)
+    filter_factors = parse_filter_str(filters) if filters is not None else {}
+
+    # filter each column of the model identified by the current factor, either
+    # to the supplied value, its default if available, or 'None'
+    return {
+        f: filter_factors.get(f, factor_defaults.get(f, fv.get("default", None)))
+        for f, fv in factor_labels.items()
+    }
+
+def canonical_factor_filters(factor_labels, filters, factor_defaults) -> dict:
+    """
+    Reduces 'filters' (a string parsed by parse_filter_str()) to the factors
+    in 'factor_labels' that it gives values for, other than those whose value
+    is the measure's effective default from 'factor_defaults', since a request
+    gets the defaults either way. Requests that apply the same factor values
+    thus have the same canonical filters.
+
+    If 'factor_defaults' is None, i.e. the effective defaults aren't known,
+    the factors that name their defaults can't be told apart, so they're kept.
+    """
+    filter_factors = parse_filter_str(filters) if filters is not None else {}
+
+    return {
+        f: filter_factors[f]
+        for f, fv in factor_labels.items()
+        if f in filter_factors and (
+            factor_defaults is None or
+            filter_factors[f] != factor_defaults.get(f, fv.get("default", None))
+        )
+    }
+
+async def resolve_applied_factors(type, model, simple_model_name, measure, filters) -> dict:
+    """
+    Determines the value of each of the model's factors that a fips-value
+    request for the given measure applies (see apply_factor_filters()), using
+    the measure's effective defaults. Factors that the model doesn't have are
+    ignored.
+
+    Raises an HTTPException if 'filters' is given for a model without factors.
+    """
+    # the model's factors, if it has any
+    factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name, None)
+
+    if factor_labels:
+        # the effective defaults for this measure, i.e. the default
+        # from the metadata if it occurs in the data, otherwise a
+        # value that does (cached until the data changes)
+        factor_defaults = (
+            await get_model_factor_defaults(model, type)
+        ).get(measure, {})
+
+        return apply_factor_filters(factor_labels, filters, factor_defaults)
+
+    elif filters is not None:
+        # FIXME: should we throw an error, as we do here, or should we just ignore unused params?
+        raise HTTPException(
+            status_code=400,
+            detail=f"The 'filters' argument was specified, but the model '{simple_model_name}' has no defined factors"
+        )
+
+    return {}
+
+async def build_fips_value_query(type, model, simple_model_name, measure, filters, session):
+    """
+    Builds the query for the rows of a fips-value response, i.e. the "GEOID"
+    and "value" (plus "aac", for cancer models) of each region for the given
+    measure, filtered to the factor values in 'filters' (a string parsed by
+    parse_filter_str()) or the measure's effective defaults.
+
+    Returns the query and a dict of the factor values that were applied.
+    Raises an HTTPException if 'filters' is given for a model without factors.
+
+    If the applied factor values are the measure's effective defaults, the
+    rows come from the model's default-factor slice, if it has one; see
+    get_factor_source().
+    """
+    # ----------------------------------------------------------------
+    # step 1. determine the factor values to apply
+    # ----------------------------------------------------------------
+
+    # the factor values that were actually applied, which we'll
+    # also use to look up the matching state-level statistics
+    applied_factors = await resolve_applied_factors(
+        type, model, simple_model_name, measure, filters
+    )
+
+    # either the model itself or, for its default factor values, an alias of
+    # the model over its much smaller default-factor slice
+    source = await get_factor_source(model, type, {measure: applied_factors})
+
+    # ----------------------------------------------------------------
+    # step 2. build the query for rows
+    # ----------------------------------------------------------------
+
+    # determine the geometry ID field for the model
+    try:
+        geom_field = getattr(model, 'get_geom_field')(self=source)
+    except AttributeError:
+        geom_field = source.FIPS
+
+    if model in SCP_TRENDS_MODELS:
+        # FIXME: ideally this should be a computed field on the model
+        # but sqlmodel doesn't support computed fields yet.
+        # note that the SCP 'trends' model is effectively a cancer
+        # model, so instead of "measure" it has "Site".
+        query = select(
+            (
+                geom_field.label("GEOID"),
+                # case(
+                #     (model.trend == 'falling', TREND_MAP['falling']),
+                #     (model.trend == 'stable', TREND_MAP['stable']),
+                #     (model.trend == 'rising', TREND_MAP['rising']),
+                #     else_=TREND_MAP_NONE
+                # ).label("value")
+                source.trend.label("value")
+            )
+        ).where(source.Site == measure)
+    elif model in CANCER_MODELS:
+        query = select((geom_field.label("GEOID"), source.AAR.label("value"), source.AAC.label("aac"))).where(source.Site == measure)
+    else:
+        query = select((geom_field.label("GEOID"), source.value)).where(source.measure == measure)
+
+    if LIMIT_TO_STATE is not None:
+        query = query.where(source.State == LIMIT_TO_STATE)
+
+    # (the factors are applied even when reading from the slice, which is
+    # cheap, so that a slice can never return rows for other factor values)
+    for f, value in applied_factors.items():
+        query = query.where(getattr(source, f) == value)
+
+    return query, applied_factors
+
+
+# ----------------------------------------------------------------
+# --- CSV exports of the stats models
+# ----------------------------------------------------------------
+
+# number of rows fetched from the database (and written to the CSV) at a time
+# when streaming a CSV export
+CSV_CHUNK_ROWS = 5000
+
+def _dataset_csv_query(type, model, measure=None):
+    """
+    Builds a query for the rows of the given model to include in its CSV
+    export, optionally limited to a single measure. The rows have the columns
+    "GEOID", "County" (for counties and tracts), "State", "measure", "value",
+    followed by each of the model's factors.
+    """
+    # determine the geometry ID field for the model
+    try:
+        geom_field = getattr(model, 'get_geom_field')(self=model)
+    except AttributeError:
+        geom_field = model.FIPS
+
+    if model in CANCER_MODELS or model in SCP_TRENDS_MODELS:
+        value_col = (
+            model.AAR.label("value") if model in CANCER_MODELS else model.trend.label("value")
+        )
+
+        # exports the 'Site' column as 'measure' for consistency with
+        # other models. also includes all the factors defined on the
+        # current model as additional columns.
+        query = select(
+            (geom_field.label("GEOID"), model.County, model.State, model.Site.label("measure"), value_col, *model.get_factors())
+        )
+
+        if measure is not None:
+            query = query.where(model.Site == measure)
+
+    else:
+        if type in ("county", "tract"):
+            query = select(
+                (geom_field.label("GEOID"), model.County, model.State, model.measure, model.value, *model.get_factors())
+            )
+        else:
+            query = select(
+                (geom_field.label("GEOID"), model.State, model.measure, model.value, *model.get_factors())
+            )
+
+        if measure is not None:
+            query = query.where(model.measure == measure)
+
+    if LIMIT_TO_STATE is not None:
+        query = query.where(model.State == LIMIT_TO_STATE)
+
+    return query
+
+def _dataset_csv_header(type, factor_labels):
+    """
+    Produces the header row for a CSV export of a model of the given type.
+    """
+    if type in ("county", "tract"):
+        header_cols = ["GEOID", "County", "State", "measure", "value"]
+    else:
+        header_cols = ["HSR Region", "State", "measure", "value"]
+
+    if factor_labels is not None:
+        header_cols += [str(x) for x in factor_labels.keys()]
+
+    return header_cols
+
+def _dataset_csv_fields(x, model_measure_meta, factor_labels):
+    """
+    Converts a row from _dataset_csv_query() into a list of CSV fields,
+    replacing the measure with its human-readable label, if available.
+    """
+    model_measure_label = (
+        model_measure_meta
+            .get(x["measure"], {})
+            .get("label") or x["measure"]
+    )
+
+    fields = [
+        x["GEOID"],
+        getattr(x, "County", None),
+        x["State"],
+        model_measure_label,
+        x["value"],
+    ]
+
+    # filter out Nones from fields
+    fields = [f for f in fields if f is not None]
+
+    if factor_labels is not None:
+        fields += [x[f] for f in factor_labels.keys()]
+
+    return fields
+
+async def stream_dataset_csv(type, model, measure=None):
+    """
+    Produces the CSV export of the given model (optionally limited to a single
+    measure) as an async iterator of string chunks.
+
+    The rows are read via a server-side cursor and written CSV_CHUNK_ROWS at a
+    time, so memory use doesn't depend on the size of the export. The iterator
+    opens (and closes) its own session, since it outlives the request handler
+    that creates it.
+    """
+    simple_model_name = slug_modelname_sans_type(model, type)
+
+    # get human labels for measures within this model, if available
+    model_measure_meta = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
+    # get factors associated with this model, if any
+    # (they'll be added as columns to the output)
+    factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name, None)
+
+    query = _dataset_csv_query(type, model, measure=measure)
+
+    fp = StringIO()
+    writer = csv.writer(fp)
+
+    def flush():
+        chunk = fp.getvalue()
+        fp.seek(0)
+        fp.truncate()
+        return chunk
+
+    writer.writerow(_dataset_csv_header(type, factor_labels))
+    yield flush()
+
+    async with session_scope() as session:
+        result = await session.stream(query)
+
+        async for rows in result.partitions(CSV_CHUNK_ROWS):
+            writer.writerows(
+                _dataset_csv_fields(x, model_measure_meta, factor_labels)
+                for x in rows
+            )
+            yield flush()
+
 # collects a set of routes for downloading each model as a CSV
 # since we're going to compile them all into a zip
 download_routes = []
@@ -575,9 +1116,18 @@ for type, family in STATS_MODELS.items():
                 factor:value pairs, each delimited by a colon. For example,
                 "RE:White NH;Sex:Female" is parsed into two filters, RE="White
                 NH" and Sex="Female".
+
+                If 'format' is "binary" (or the request's Accept header is
+                "application/octet-stream"), the values are instead returned as
+                little-endian float32 arrays ordered by the region IDs from
+                /stats/{type}/geoids, with NaN for regions without a value. The
+                arrays are named in the X-Value-Columns header; the rest of the
+                usual response is in the X-Measure-Meta header, as JSON.
                 """
             )
+            @cache(key_builder=fips_value_key_builder(type, model, simple_model_name), coder=ResponseJsonCoder)
             async def get_dataset_fips(
+                request: Request,
                 measure: str,
                 # filter: Optional[FactorsFilter] = json_param(
                 #     "filter", FactorsFilter,
@@ -586,120 +1136,31 @@ for type, family in STATS_MODELS.items():
                 filters : Annotated[
                     str | None, Query(pattern="^([^:]+:[^:;]+;)*([^:]+:[^:;]+)$"),
                 ] = None,
-                session: AsyncSession = Depends(get_session)
+                format: Optional[Literal["json", "binary"]] = None,
+                session: AsyncSession = Depends(get_lazy_session)
             ):
                 print(f"Processing {model.__name__} for measure {measure}")
 
-                # ----------------------------------------------------------------
-                # step 1. build initial queries for rows and statistics
-                # ----------------------------------------------------------------
-
-                # determine the geometry ID field for the model
-                try:
-                    geom_field = getattr(model, 'get_geom_field')(self=model)
-                except AttributeError:
-                    geom_field = model.FIPS
-
-                if model in SCP_TRENDS_MODELS:
-                    # FIXME: ideally this should be a computed field on the model
-                    # but sqlmodel doesn't support computed fields yet.
-                    # note that the SCP 'trends' model is effectively a cancer
-                    # model, so instead of "measure" it has "Site".
-                    query = select(
-                        (
-                            geom_field.label("GEOID"),
-                            # case(
-                            #     (model.trend == 'falling', TREND_MAP['falling']),
-                            #     (model.trend == 'stable', TREND_MAP['stable']),
-                            #     (model.trend == 'rising', TREND_MAP['rising']),
-                            #     else_=TREND_MAP_NONE
-                            # ).label("value")
-                            model.trend.label("value")
-                        )
-                    ).where(model.Site == measure)
-                elif model in CANCER_MODELS:
-                    query = select((geom_field.label("GEOID"), model.AAR.label("value"), model.AAC.label("aac"))).where(model.Site == measure)
-                else:
-                    query = select((geom_field.label("GEOID"), model.value)).where(model.measure == measure)
-
-                if LIMIT_TO_STATE is not None:
-                    query = query.where(model.State == LIMIT_TO_STATE)
+                format = resolve_fips_value_format(request, format)
 
-                # compute mins and maxes so we can build a color scale
-                # # if it's a cancer endpint, we need to use the "Site" column instead of "measure", and "AAR" instead of "value
-                if model in CANCER_MODELS:
-                    stats_query = select(func.min(model.AAR), func.max(model.AAR)).where(model.Site == measure)
-                elif model in SCP_TRENDS_MODELS:
-                    # we compute the min and max over the trends' numeric value, excluding regions without a trend
-                    stats_query = select(
-                        func.min(case(
-                            (model.trend == 'falling', TREND_MAP['falling']),
-                            (model.trend == 'stable', TREND_MAP['stable']),
-                            (model.trend == 'rising', TREND_MAP['rising'])
-                        )),
-                        func.max(case(
-                            (model.trend == 'falling', TREND_MAP['falling']),
-                            (model.trend == 'stable', TREND_MAP['stable']),
-                            (model.trend == 'rising', TREND_MAP['rising'])
-                        ))
-                    ).where(model.Site == measure)
-                else:
-                    stats_query = select(func.min(model.value), func.max(model.value)).where(model.measure == measure)
-                
                 # ----------------------------------------------------------------
-                # step 2. apply factors to the queries
+                # step 1. build the query for rows, with factors applied
                 # ----------------------------------------------------------------
 
-                # apply factor fields to the query, if the model has factors defined
-                factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name, None)
-
-                # takes a string of the form "<factor1>:<value1>;<factor2>:<value2>;..."
-                # and produces a dict of factor-value pairs on which to filter
-                # (unless filters wasn't specified, in which case don't apply any filters)
-                filter_factors = parse_filter_str(filters) if filters is not None else {}
-
-                if factor_labels:
-                    for f, fv in factor_labels.items():
-                        # filter each column of the model identified by the current
-                        # factor, either to the supplied value, its default if available,
-                        # or 'None'
-                        query = query.where(
-                            getattr(model, f) == (
-                                filter_factors.get(f, fv.get("default", None))
-                            )
-                        )
-                        # do the same for the stats query
-                        # FIXME: ideally we wouldn't repeat the above where clause
-                        stats_query = stats_query.where(
-                            getattr(model, f) == (
-                                filter_factors.get(f, fv.get("default", None))
-                            )
-                        )
-
-                elif filters is not None:
-                    # FIXME: should we throw an error, as we do here, or should we just ignore unused params?
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"The 'filters' argument was specified, but the model '{simple_model_name}' has no defined factors"
-                    )
+                query, applied_factors = await build_fips_value_query(
+                    type, model, simple_model_name, measure, filters, session
+                )
 
                 # ----------------------------------------------------------------
-                # step 3. execute queries, return response
+                # step 2. execute the query, return response
                 # ----------------------------------------------------------------
 
-                stats_result = await session.execute(stats_query)
-                stats = stats_result.all()[0]
-
+                # the rows are the only thing we query per request; the factor
+                # defaults and state values are cached per data version, and
+                # the min/max are computed from the rows themselves
                 result = await session.execute(query)
                 objects = result.all()
 
-                # for cancer models, return a dict of FIPS and a sub-dict of AAR and AAC values
-                # for non-cancer models, return a dict of FIPS and values
-                if model in CANCER_MODELS:
-                    values = {x["GEOID"]: {"value": x["value"], "aac": x["aac"]} for x in objects}
-                else:
-                    values = {x["GEOID"]: {"value": x["value"]} for x in objects}
-
                 # determine the unit of measurement for the measure from the metadata
                 # (if available)
                 measure_meta = (
@@ -708,23 +1169,81 @@ for type, family in STATS_MODELS.items():
                         .get(measure, {})
                 )
 
-                # retrieve state values, if available, by querying CCC models
-                state_values = await _query_state_stats(
-                    session, model, factor_constraints=filter_factors, measure_label=measure_meta.get('label', None)
+                # compute mins and maxes so we can build a color scale
+                if model in SCP_TRENDS_MODELS:
+                    # we compute the min and max over the trends' numeric value,
+                    # excluding regions without a trend, then map them back
+                    ordinals = [TREND_MAP[x["value"]] for x in objects if x["value"] in TREND_MAP]
+                    stats = (
+                        INVERTED_TREND_MAP[min(ordinals)] if ordinals else None,
+                        INVERTED_TREND_MAP[max(ordinals)] if ordinals else None
+                    )
+                else:
+                    observed = [x["value"] for x in objects if x["value"] is not None]
+                    stats = (
+                        min(observed) if observed else None,
+                        max(observed) if observed else None
+                    )
+
+                # retrieve state values, if available, from the CCC models
+                state_values = _lookup_state_stats(
+                    await _load_state_stats_index(),
+                    model, factor_constraints=applied_factors, measure_label=measure_meta.get('label', None)
                 )
 
-                return FIPSMeasureResponse(
-                    min=stats[0] if model not in SCP_TRENDS_MODELS else INVERTED_TREND_MAP.get(stats[0], stats[0]),
-                    max=stats[1] if model not in SCP_TRENDS_MODELS else INVERTED_TREND_MAP.get(stats[1], stats[1]),
+                response = FIPSMeasureResponse(
+                    min=stats[0],
+                    max=stats[1],
                     state=state_values.get("value", None),
                     state_source=state_values.get("stat_source", None),
                     source=measure_meta.get("source", None),
                     source_url=measure_meta.get("source_url", None),
                     unit=measure_meta.get("unit", None),
                     order=measure_meta.get("order", None),
-                    values=values
+                    values={}
                 )
 
+                if format == "binary":
+                    # pack the values into arrays aligned with the region IDs,
+                    # rather than producing a dict keyed by region ID
+                    data_version = await get_data_version()
+                    geoids, geoid_positions = await get_sorted_geoids(type)
+
+                    # only cancer models have AAC values
+                    columns = ["value", "aac"] if model in CANCER_MODELS else ["value"]
+
+                    meta = {
+                        **json.loads(response.json(exclude={"values"})),
+                        "count": len(geoids),
+                    }
+
+                    # trends are packed as their ordinal values, so we include
+                    # the mapping from the trend labels to those values
+                    if model in SCP_TRENDS_MODELS:
+                        meta["ordinals"] = TREND_MAP
+
+                    return Response(
+                        content=pack_region_values(
+                            geoid_positions, objects, columns,
+                            convert=TREND_MAP.get if model in SCP_TRENDS_MODELS else None
+                        ),
+                        media_type=FIPS_VALUE_BINARY_MEDIA_TYPE,
+                        headers={
+                            "X-Data-Version": str(data_version),
+                            "X-Value-Columns": ",".join(columns),
+                            "X-Measure-Meta": json.dumps(meta, ensure_ascii=True),
+                        }
+                    )
+
+                # for cancer models, return a dict of FIPS and a sub-dict of AAR and AAC values
+                # for non-cancer models, return a dict of FIPS and values
+                if model in CANCER_MODELS:
+                    response.values = {x["GEOID"]: {"value": x["value"], "aac": x["aac"]} for x in objects}
+                else:
+                    response.values = {x["GEOID"]: {"value": x["value"]} for x in objects}
+
+                return response
+
             # ----------------------------------------------------------------
             # --- a CSV-formatted version of the model for downloading
             # ----------------------------------------------------------------
@@ -735,105 +1254,15 @@ for type, family in STATS_MODELS.items():
                 Autogenerated method; download {type}-level {simple_model_name} data for a given measure, if provided, as a CSV.
                 """
             )
-            async def download_dataset(
-                measure: Optional[str] = None,
-                session: AsyncSession = Depends(get_session)
-            ):
-                # get human labels for measures within this model, if available
-                model_measure_meta = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
-                # get factors associated with this model, if any
-                # (they'll be added as columns to the output)
-                factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name, None)
-
-                # determine the geometry ID field for the model
-                try:
-                    geom_field = getattr(model, 'get_geom_field')(self=model)
-                except AttributeError:
-                    geom_field = model.FIPS
-
-                def model_to_fields(x, factor_labels):
-                    model_measure_label = (
-                        model_measure_meta
-                            .get(x["measure"], {})
-                            .get("label") or x["measure"]
-                    )
-                    
-                    fields = [
-                        x["GEOID"],
-                        getattr(x, "County", None),
-                        x["State"],
-                        model_measure_label,
-                        x["value"],
-                    ]
-
-                    # filter out Nones from fields
-                    fields = [f for f in fields if f is not None]
-
-                    if factor_labels is not None:
-                        fields += [x[f] for f in factor_labels.keys()]
-
-                    return fields
-
-                if model in CANCER_MODELS or model in SCP_TRENDS_MODELS:
-                    value_col = (
-                        model.AAR.label("value") if model in CANCER_MODELS else model.trend.label("value")
-                    )
-
-                    # exports the 'Site' column as 'measure' for consistency with
-                    # other models. also includes all the factors defined on the
-                    # current model as additional columns.
-                    query = select(
-                        (geom_field.label("GEOID"), model.County, model.State, model.Site.label("measure"), value_col, *model.get_factors())
-                    )
-                    
-                    if measure is not None:
-                        query = query.where(model.Site == measure)
-
-                else:
-                    if type in ("county", "tract"):
-                        query = select(
-                            (geom_field.label("GEOID"), model.County, model.State, model.measure, model.value, *model.get_factors())
-                        )
-                    else:
-                        query = select(
-                            (geom_field.label("GEOID"), model.State, model.measure, model.value, *model.get_factors())
-                        )
-
-                    if measure is not None:
-                        query = query.where(model.measure == measure)
-
-                
-                if LIMIT_TO_STATE is not None:
-                    query = query.where(model.State == LIMIT_TO_STATE)
-
-                result = await session.execute(query)
-                objects = result.all()
-
-                with StringIO() as fp:
-                    writer = csv.writer(fp)
-
-                    if type in ("county", "tract"):
-                        header_cols = ["GEOID", "County", "State", "measure", "value"]
-                    else:
-                        header_cols = ["HSR Region", "State", "measure", "value"]
-
-                    if factor_labels is not None:
-                        header_cols += [str(x) for x in factor_labels.keys()]
-
-                    writer.writerow(header_cols)
-                    writer.writerows(
-                        model_to_fields(
-                            x,
-                            factor_labels=factor_labels
-                        )
-                        for x in objects
-                    )
+            async def download_dataset(measure: Optional[str] = None):
+                response = StreamingResponse(
+                    stream_dataset_csv(type, model, measure=measure),
+                    media_type="text/csv"
+                )
+                response.headers["Content-Disposition"] = f"attachment; filename=ECCO_{slugify(measure or simple_model_name)}_{type}.csv"
 
-                    response = StreamingResponse(iter([fp.getvalue()]), media_type="text/csv")
-                    response.headers["Content-Disposition"] = f"attachment; filename=ECCO_{slugify(measure or simple_model_name)}_{type}.csv"
+                return response
 
-                    return response
-            
             # append the endpoint to the download_routes dict; we'll
             # iterate over this later to produce a set of all possible
             # downloadable CSVs
@@ -852,85 +1281,284 @@ for type, family in STATS_MODELS.items():
 # === aggregate download route(s)
 # ============================================================================
 
+# max number of models whose rows are fetched at once while building the zip
+# of all the models; each uses its own connection
+DOWNLOAD_ALL_CONCURRENCY = DB_MAX_CONCURRENT_QUERIES
+
+# max number of finished CSVs buffered per model while it waits to be written
+# to the zip, which bounds how far ahead of the zip each fetch can get
+DOWNLOAD_ALL_BUFFERED_CSVS = 2
+
+class _ZipStream:
+    """
+    A write-only file-like object that holds onto what's written to it until
+    it's drained, so that a ZipFile written to it can be streamed out while
+    it's being built. (ZipFile handles unseekable outputs like this one by
+    writing each entry's sizes after its data.)
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _download_all_zip_path(type, model, measure):
+    """
+    Produces the path within the download-all zip of the CSV for the given
+    model and measure, consisting of the type, the name of the model (aka the
+    measure category), and the measure name.
+    """
+    simple_model_name = slug_modelname_sans_type(model, type)
+
+    # get the human-readable name of the model (aka the measure category), if
+    # available, and default to the model's simple name if not
+    try:
+        model_name = model.Config.label or simple_model_name
+    except AttributeError:
+        model_name = simple_model_name
+
+    # produce a human-readable name for the measure, if available,
+    # from the MEASURE_DESCRIPTIONS entry for this model
+    model_measure_meta = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
+    model_measure_label = model_measure_meta.get(measure, {}).get("label") or measure
+    final_name = f"{model_measure_label}.csv"
+
+    # sanitize() removes only characters known to be problematic, so we may
+    # need to tweak it later if we run into issues.
+    return os.path.join(*(
+        sanitize(x)
+        for x in (type, model_name, final_name)
+    ))
+
+async def _produce_model_csvs(type, model, queue:asyncio.Queue):
+    """
+    Fetches all the rows of the given model in a single query, ordered by
+    measure, and puts a (zip path, CSV text) tuple on 'queue' for each measure
+    as soon as its rows have been read. Puts None on the queue once it's done
+    (or has failed), unless it was cancelled, in which case nothing is reading
+    the queue anymore.
+    """
+    simple_model_name = slug_modelname_sans_type(model, type)
+    model_measure_meta = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
+    factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name, None)
+
+    # SCP trends models resemble cancer models in that their measure column is
+    # 'Site' (but they're not in CANCER_MODELS, since they're handled
+    # differently elsewhere)
+    measure_col = model.Site if model in CANCER_MODELS or model in SCP_TRENDS_MODELS else model.measure
+    query = _dataset_csv_query(type, model).order_by(measure_col)
+
+    cancelled = False
+
+    try:
+        async with session_scope() as session:
+            result = await session.stream(query)
+
+            measure, fp, writer = None, None, None
+
+            async for rows in result.partitions(CSV_CHUNK_ROWS):
+                for x in rows:
+                    # the rows are ordered by measure, so a new measure means
+                    # the previous measure's CSV is complete
+                    if x["measure"] != measure:
+                        if measure is not None:
+                            await queue.put((_download_all_zip_path(type, model, measure), fp.getvalue()))
+
+                        measure, fp = x["measure"], StringIO()
+                        writer = csv.writer(fp)
+                        writer.writerow(_dataset_csv_header(type, factor_labels))
+
+                    writer.writerow(_dataset_csv_fields(x, model_measure_meta, factor_labels))
+
+            if measure is not None:
+                await queue.put((_download_all_zip_path(type, model, measure), fp.getvalue()))
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        # (waiting to put the sentinel on a full queue after being cancelled
+        # would block forever)
+        if not cancelled:
+            await queue.put(None)
+
+async def stream_all_datasets_zip():
+    """
+    Produces a zip file containing a CSV for each measure of each stats model,
+    as an async iterator of byte chunks that are emitted as each CSV is added.
+
+    Up to DOWNLOAD_ALL_CONCURRENCY models are fetched concurrently, ahead of
+    the one currently being written to the zip; the CSVs are still added in
+    the same order as the models in download_routes.
+    """
+    models = [get_keys(route_info, "type", "model") for route_info in download_routes]
+
+    # models are fetched in a sliding window: each time a model's CSVs have
+    # all been written, the fetch for the next model outside the window starts
+    producers = []
+
+    def start_next_producer():
+        if len(producers) < len(models):
+            type, model = models[len(producers)]
+            queue = asyncio.Queue(maxsize=DOWNLOAD_ALL_BUFFERED_CSVS)
+            producers.append((queue, asyncio.create_task(_produce_model_csvs(type, model, queue))))
+
+    for _ in range(DOWNLOAD_ALL_CONCURRENCY):
+        start_next_producer()
+
+    zip_fp = _ZipStream()
+
+    try:
+        with zipfile.ZipFile(zip_fp, "w") as z:
+            for i in range(len(models)):
+                queue, task = producers[i]
+
+                while (entry := await queue.get()) is not None:
+                    zip_path, contents = entry
+                    z.writestr(zip_path, contents)
+                    yield zip_fp.drain()
+
+                # surfaces any exception raised while fetching the model
+                await task
+
+                start_next_producer()
+
+        # writes the zip's central directory
+        yield zip_fp.drain()
+
+    finally:
+        # if the client went away (or something failed), stop fetching, and
+        # wait for the fetches to wind down so their exceptions are retrieved
+        for _, task in producers:
+            task.cancel()
+
+        await asyncio.gather(*(task for _, task in producers), return_exceptions=True)
+
+# the zip of all the models is identical until the data changes, so it's built
+# once per data version and kept on disk; see get_download_all_artifact()
+DOWNLOAD_ALL_FILENAME = "ECCO_All_Measures.zip"
+
+# ensures only one build of the zip is running at a time in this process
+_download_all_lock = asyncio.Lock()
+
+def _download_all_artifact_path(version):
+    return os.path.join(DOWNLOAD_CACHE_DIR, f"ECCO_All_Measures.v{version}.zip")
+
+def _download_all_artifact_versions() -> dict[int, str]:
+    """
+    Returns the paths of the prebuilt zips on disk, by their data version.
+    """
+    versions = {}
+
+    for path in glob.glob(_download_all_artifact_path("*")):
+        match = re.search(r"\.v(\d+)\.zip$", path)
+        if match:
+            versions[int(match[1])] = path
+
+    return versions
+
+def _evict_download_all_artifacts(version):
+    """
+    Removes the prebuilt zips for data versions older than 'version', except
+    for the newest of those. Workers notice a new data version at different
+    times, so a zip for a newer version (or the previous one) may still be
+    being served by another worker, and is kept.
+    """
+    older = sorted(v for v in _download_all_artifact_versions() if v < version)
+
+    for v in older[:-1]:
+        try:
+            os.remove(_download_all_artifact_path(v))
+        except FileNotFoundError:
+            # (another worker got to it first)
+            pass
+
+async def _write_download_all_artifact(path):
+    """
+    Builds the zip of all the models and moves it into place at 'path'. The
+    file operations run in a thread, so that writing hundreds of MB doesn't
+    block the event loop.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        fp = await asyncio.to_thread(open, tmp_path, "wb")
+
+        try:
+            async for chunk in stream_all_datasets_zip():
+                await asyncio.to_thread(fp.write, chunk)
+        finally:
+            await asyncio.to_thread(fp.close)
+
+        await asyncio.to_thread(os.replace, tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            await asyncio.to_thread(os.remove, tmp_path)
+
+async def get_download_all_artifact(version) -> str:
+    """
+    Returns the path to the zip of all the models for the given data version,
+    building it first if it doesn't exist yet.
+
+    Concurrent callers in the same process wait on a single build. The zip is
+    written to a temporary file that's renamed into place once it's complete,
+    so callers never see a partial zip; if several workers happen to build it
+    at once, the last one to finish wins, with identical contents.
+    """
+    path = _download_all_artifact_path(version)
+
+    if os.path.exists(path):
+        return path
+
+    async with _download_all_lock:
+        # it may have been built while we were waiting for the lock
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(DOWNLOAD_CACHE_DIR, exist_ok=True)
+        await _write_download_all_artifact(path)
+        await asyncio.to_thread(_evict_download_all_artifacts, version)
+
+    return path
+
 # ----------------------------------------------------------------
 # --- a CSV-formatted version of the model for downloading
 # ----------------------------------------------------------------
 @router.get(
     f"/download-all",
-    response_class=StreamingResponse,
+    response_class=FileResponse,
     description=f"""
     Produces a CSV of each stats model, then adds them all to a zip file and
     returns the zip file for download.
+
+    The zip is built once per data version and served from disk; byte ranges
+    are supported, so interrupted downloads can be resumed.
     """
 )
-async def download_all(
-    session: AsyncSession = Depends(get_session)
-):
-    with BytesIO() as zip_fp:
-        with zipfile.ZipFile(zip_fp, "w") as z:
-            # iterate over the download_routes dict and add each CSV to the zip
-            for route_info in download_routes:
-                type, model, route = get_keys(route_info, "type", "model", "route")
-                simple_model_name = slug_modelname_sans_type(model, type)
-
-                # get human labels for measures within this model, if available
-                model_measure_meta = MEASURE_DESCRIPTIONS.get(simple_model_name, {})
-
-                # retrieve the measures for the model, depending on what type of model it is
-                # (SCP trends models resemble cancer models in this case but they're handled
-                # differently elsewhere, so we can't add them to CANCER_MODELS. instead, we
-                # just check for either model type here.)
-                if model in CANCER_MODELS or model in SCP_TRENDS_MODELS:
-                    query = select(model.Site).distinct().order_by(model.Site)
-                else:
-                    query = select(model.measure).distinct().order_by(model.measure)
-
-                measures_result = await session.execute(query)
-                measures = measures_result.scalars().all()
-
-                # iterate over the measures for each model
-                for measure in measures:
-                    # query the download csv endpoint
-                    result = await route(measure=measure, session=session)
-
-                    # if you want to parse out the filename, you'd do it like so:
-                    # filename = result.headers["Content-Disposition"].split("filename=", maxsplit=1)[1]
-                    # (but at the moment we're overriding the filename with what
-                    # we know it should be.)
-
-                    # read the response into a buffer, then write it into the zip
-                    with StringIO() as str_fp:
-                        async for chunk in result.body_iterator:
-                            str_fp.write(chunk)
-
-                        # get the human-readable name of the model (aka the
-                        # measure category), if available, and default to the
-                        # model's simple name if not
-                        try:
-                            model_name = model.Config.label or simple_model_name
-                        except AttributeError:
-                            model_name = simple_model_name
-
-                        # produce a human-readable name for the measure, if available,
-                        # from the MEASURE_DESCRIPTIONS entry for this model
-                        model_measure_label = model_measure_meta.get(measure, {}).get("label") or measure
-                        final_name = f"{model_measure_label}.csv"
-                        
-                        # produce a complete path consisting of the type, the
-                        # name of the model (aka measure category), and the
-                        # measure name.
-                        # sanitize() removes only characters known to be
-                        # problematic, so we may need to tweak it later if we
-                        # run into issues.
-                        zip_path = os.path.join(*(
-                            sanitize(x)
-                            for x in (type, model_name, final_name)
-                        ))
-                        
-                        z.writestr(zip_path, str_fp.getvalue())
-
-        # stream the finished zip back to the user           
-        response = StreamingResponse(iter([zip_fp.getvalue()]), media_type="application/zip")
-        response.headers["Content-Disposition"] = f"attachment; filename=ECCO_All_Measures.zip"
-
-        return response
+async def download_all(request: Request):
+    version = await get_data_version()
+
+    # (if the zip is removed after we find it, e.g. by another worker's
+    # eviction, it's built again)
+    for attempt in range(2):
+        path = await get_download_all_artifact(version)
+
+        try:
+            return ranged_file_response(
+                path, request,
+                media_type="application/zip",
+                filename=DOWNLOAD_ALL_FILENAME,
+                etag=data_version_etag(version, request)
+            )
+        except FileNotFoundError:
+            if attempt > 0:
+                raise
@@ -0,0 +1,161 @@
+"""
+API endpoints that return Mapbox Vector Tiles (MVT) of the geometry, so that
+clients only fetch the regions in their viewport.
+"""
+
+from typing import Optional, Annotated
+
+from fastapi import Depends, Query, HTTPException, APIRouter, Response
+from sqlalchemy import func, literal_column
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db import get_lazy_session
+from tools.caching import ResponseJsonCoder, cache
+from tools.strings import slug_modelname_sans_type
+
+from models import STATS_MODELS, CANCER_MODELS
+from routers.statistics import GEOID_FIELDS, build_fips_value_query
+
+router = APIRouter(prefix="/tiles")
+
+
+# media type of the tile responses
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+# the size of a tile in MVT's integer coordinates, and the margin (in the same
+# units) of geometry included around each tile so that strokes along the tile
+# boundaries aren't clipped
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+
+# the deepest zoom level we serve; beyond it, clients should overzoom
+MVT_MAX_ZOOM = 16
+
+# the stats models whose values can be joined into the tiles, by layer (i.e.
+# the type of region, e.g. "county") and simple model name
+TILE_STATS_MODELS = {
+    type: {slug_modelname_sans_type(model, type): model for model in family}
+    for type, family in STATS_MODELS.items()
+    if type in GEOID_FIELDS
+}
+
+async def render_tile(layer, z, x, y, session, model=None, simple_model_name=None, measure=None, filters=None) -> bytes:
+    """
+    Renders the regions of the given layer that intersect tile (z, x, y) as an
+    MVT layer named after 'layer', in a single query.
+
+    Each feature's ID is its ogc_fid, and it carries the region ID as "GEOID".
+    If a stats model and measure are given, the region's "value" (and "aac",
+    for cancer models) for that measure are included too, filtered by factors
+    as in fips-value.
+    """
+    geoid_field = GEOID_FIELDS[layer]
+    geometry_model = geoid_field.class_
+
+    # ST_TileEnvelope() produces the tile's bounds in web mercator (EPSG:3857),
+    # while the geometry is stored in EPSG:4326
+    envelope = func.ST_TileEnvelope(z, x, y)
+
+    columns = [
+        geometry_model.ogc_fid,
+        geoid_field.label("GEOID"),
+        func.ST_AsMVTGeom(
+            func.ST_Transform(geometry_model.wkb_geometry, 3857),
+            envelope, MVT_EXTENT, MVT_BUFFER
+        ).label("geom"),
+    ]
+
+    values = None
+
+    if model is not None:
+        values_query, _ = await build_fips_value_query(
+            layer, model, simple_model_name, measure, filters, session
+        )
+        values = values_query.subquery("measure_values")
+
+        columns.append(values.c.value)
+        if model in CANCER_MODELS:
+            columns.append(values.c.aac)
+
+    # (the intersection test is against the geometry in its stored projection,
+    # so that it can use the spatial index)
+    features = select(*columns).select_from(geometry_model).where(
+        func.ST_Intersects(geometry_model.wkb_geometry, func.ST_Transform(envelope, 4326))
+    )
+
+    if values is not None:
+        features = features.outerjoin(values, values.c.GEOID == geoid_field)
+
+    features = features.subquery("features")
+
+    query = select(
+        func.ST_AsMVT(literal_column("features"), layer, MVT_EXTENT, "geom", "ogc_fid")
+    ).select_from(features)
+
+    result = await session.execute(query)
+    return bytes(result.scalar() or b"")
+
+@router.get("/{layer}/{z}/{x}/{y}.mvt", response_class=Response)
+@cache(coder=ResponseJsonCoder)
+async def get_tile(
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    model: Optional[str] = None,
+    measure: Optional[str] = None,
+    filters : Annotated[
+        str | None, Query(pattern="^([^:]+:[^:;]+;)*([^:]+:[^:;]+)$"),
+    ] = None,
+    session: AsyncSession = Depends(get_lazy_session)
+):
+    """
+    Returns a Mapbox Vector Tile of the regions of the given layer ("county",
+    "tract", or "healthregion") within tile (z, x, y). Each feature's ID is the
+    region's ogc_fid, and its "GEOID" property is the region ID used by the
+    fips-value routes.
+
+    If 'model' (e.g., "sociodemographics", as in
+    /stats/{layer}/{model}/fips-value) and 'measure' are given, each feature
+    also carries the region's "value" (and, for cancer models, "aac") for that
+    measure; 'filters' selects factor values as it does for fips-value.
+
+    Tiles are cached until the data changes. A tile that doesn't intersect any
+    regions is empty.
+    """
+    if layer not in GEOID_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Layer '{layer}' not found")
+
+    if not (0 <= z <= MVT_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail=f"Tile {z}/{x}/{y} not found")
+
+    stats_model = None
+
+    if model is not None or measure is not None:
+        if model is None or measure is None:
+            raise HTTPException(
+                status_code=400,
+                detail="The 'model' and 'measure' arguments must be specified together"
+            )
+
+        stats_model = TILE_STATS_MODELS.get(layer, {}).get(model)
+
+        if stats_model is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Model '{model}' not found for layer '{layer}'"
+            )
+
+    elif filters is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="The 'filters' argument was specified without a 'model' and 'measure'"
+        )
+
+    tile = await render_tile(
+        layer, z, x, y, session,
+        model=stats_model, simple_model_name=model, measure=measure, filters=filters
+    )
+
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE)
@@ -3,6 +3,49 @@ import os
 IS_DEV=os.environ.get("IS_DEV", "") in ("1", "True", "true")
 DATABASE_URL=os.environ.get("DATABASE_URL")
 
+# connection pool settings for the API's async engine
+# (if DB_USE_NULLPOOL is true, pooling is disabled entirely; the test harness
+# sets it, since pooled connections can't be shared across event loops)
+DB_USE_NULLPOOL=os.environ.get("DB_USE_NULLPOOL", "") in ("1", "True", "true")
+DB_POOL_SIZE=int(os.environ.get("DB_POOL_SIZE", 10))
+DB_POOL_MAX_OVERFLOW=int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10))
+# seconds to wait for a connection before giving up
+DB_POOL_TIMEOUT=float(os.environ.get("DB_POOL_TIMEOUT", 30))
+# seconds after which a connection is replaced; -1 disables recycling
+DB_POOL_RECYCLE=int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING=os.environ.get("DB_POOL_PRE_PING", "1") in ("1", "True", "true")
+# max number of queries a single request may run concurrently, each on its own
+# connection (see db.gather_with_sessions())
+DB_MAX_CONCURRENT_QUERIES=int(os.environ.get("DB_MAX_CONCURRENT_QUERIES", max(DB_POOL_SIZE // 2, 1)))
+
+# seconds between checks of the data version (see tools/data_version.py); data
+# imported while the API is running is noticed within this interval
+DATA_VERSION_CHECK_INTERVAL=float(os.environ.get("DATA_VERSION_CHECK_INTERVAL", 10))
+
+# where prebuilt downloads (e.g., the zip of all the data) are kept; only the
+# ones for the current data version are retained
+DOWNLOAD_CACHE_DIR=os.environ.get("DOWNLOAD_CACHE_DIR", "/tmp/ecco-downloads")
+
+# the most bytes of cached responses each API worker keeps in memory, in front
+# of memcached (see tools.caching.LayeredCacheBackend); 0 disables the
+# in-memory tier
+RESPONSE_CACHE_L1_MAX_BYTES=int(os.environ.get("RESPONSE_CACHE_L1_MAX_BYTES", 64 * 1024 * 1024))
+
+# the most seconds a worker holds the lock for computing a cached response, and
+# how often (in seconds) the other workers check whether it's been released
+# (see tools.caching.SingleFlight)
+CACHE_LOCK_TIMEOUT=int(os.environ.get("CACHE_LOCK_TIMEOUT", 60))
+CACHE_LOCK_POLL_INTERVAL=float(os.environ.get("CACHE_LOCK_POLL_INTERVAL", 0.1))
+
+# seconds after which a cached response is stale, i.e. still served, but
+# recomputed in the background; 0 disables this (see tools.caching.cache())
+CACHE_STALE_AFTER=int(os.environ.get("CACHE_STALE_AFTER", 3600))
+
+# the largest piece (in bytes, after compression) in which a cached response is
+# stored in memcached; larger responses are split into several pieces. should be
+# a bit under memcached's item size limit (1 MB by default)
+CACHE_CHUNK_BYTES=int(os.environ.get("CACHE_CHUNK_BYTES", 1000 * 1000))
+
 FRONTEND_DOMAIN=os.environ.get("FRONTEND_DOMAIN")
 
 LIMIT_TO_STATE = "Colorado"
@@ -1,13 +1,35 @@
+import math
+import os
 import sys
 
+import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
 
 sys.path.append("/app")
 
+# pooled connections are bound to the event loop that created them, and the
+# tests create a new loop per test, so disable pooling under the test harness
+os.environ.setdefault("DB_USE_NULLPOOL", "1")
+
 from main import app
+import tools.data_version
+from tools.data_version import refresh_data_version
 
 @pytest_asyncio.fixture()
 async def client():
     with TestClient(app) as c:
         yield c
+
+@pytest.fixture()
+def pinned_data_version(client, monkeypatch):
+    """
+    Stops the API's data version poller and pins the data version as of now,
+    so that nothing queries the database in the background during the test,
+    e.g. while it counts connection checkouts.
+    """
+    client.portal.call(app.state.data_version_poller.cancel)
+    client.portal.call(refresh_data_version)
+
+    # (never old enough that get_data_version() re-reads it)
+    monkeypatch.setitem(tools.data_version._last_version, "checked_at", math.inf)
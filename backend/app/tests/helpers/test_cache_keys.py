@@ -0,0 +1,48 @@
+import sys
+import time
+sys.path.append("/app/src")
+
+import pytest
+from starlette.requests import Request
+
+import tools.data_version
+from tools.caching import request_key_builder
+
+def get_request(query_string: str):
+    return Request({
+        "type": "http", "method": "GET", "path": "/stats/county/scpincidence/fips-value",
+        "headers": [], "query_string": query_string.encode(),
+    })
+
+async def route(measure: str, filters: str = None, request=None, response=None):
+    pass
+
+@pytest.fixture(autouse=True)
+def data_version(monkeypatch):
+    monkeypatch.setattr(
+        tools.data_version, "_last_version", {"version": 1, "checked_at": time.monotonic()}
+    )
+
+@pytest.mark.asyncio
+async def test_key_ignores_order_and_unknown_params():
+    keys = {
+        await request_key_builder(route, request=get_request(query))
+        for query in (
+            "measure=All+Cancer+Sites&filters=sex:Female",
+            "filters=sex:Female&measure=All+Cancer+Sites",
+            "measure=All+Cancer+Sites&filters=sex:Female&utm_source=newsletter",
+        )
+    }
+
+    assert len(keys) == 1
+
+@pytest.mark.asyncio
+async def test_key_is_memcached_safe():
+    """
+    Keys shouldn't contain whitespace, and should be short enough for memcached
+    even for long query strings.
+    """
+    key = await request_key_builder(route, request=get_request("measure=" + "All+Cancer+Sites" * 50))
+
+    assert not any(c.isspace() for c in key)
+    assert len(key) <= 250
@@ -0,0 +1,117 @@
+import os
+import sys
+sys.path.append("/app/src")
+
+import pytest
+
+from tools.caching import ChunkedMemcachedBackend
+
+class DictMemcached:
+    """
+    Stands in for an aiomcache.Client, rejecting items over 'max_item_bytes' as
+    memcached does.
+    """
+
+    def __init__(self, max_item_bytes=1000):
+        self.items = {}
+        self.exptimes = {}
+        self.max_item_bytes = max_item_bytes
+
+    async def get(self, key):
+        return self.items.get(key)
+
+    async def multi_get(self, *keys):
+        return tuple(self.items.get(key) for key in keys)
+
+    async def set(self, key, value, exptime=0):
+        if len(value) > self.max_item_bytes:
+            raise ValueError("object too large for cache")
+        self.items[key] = value
+        self.exptimes[key] = exptime
+        return True
+
+    async def delete(self, key):
+        return self.items.pop(key, None) is not None
+
+@pytest.mark.asyncio
+async def test_small_values_stored_compressed():
+    mc = DictMemcached()
+    backend = ChunkedMemcachedBackend(mc, chunk_bytes=900)
+
+    value = '{"value": "' + "x" * 5000 + '"}'
+    await backend.set("key", value)
+
+    assert len(mc.items) == 1
+    assert await backend.get("key") == value.encode()
+
+@pytest.mark.asyncio
+async def test_large_values_chunked():
+    mc = DictMemcached()
+    backend = ChunkedMemcachedBackend(mc, chunk_bytes=900)
+
+    # (random bytes don't compress, so this needs several chunks)
+    value = os.urandom(5000).hex()
+    await backend.set("key", value)
+
+    assert len(mc.items) > 2
+    assert await backend.get("key") == value.encode()
+
+    # a newer write replaces the value as a whole, chunks and all
+    chunk_count = len(mc.items) - 1
+    newer = os.urandom(5000).hex()
+    await backend.set("key", newer)
+    assert await backend.get("key") == newer.encode()
+    assert len(mc.items) == chunk_count + 1
+
+    # as does a small one
+    await backend.set("key", "small")
+    assert list(mc.items) == [b"key"]
+
+@pytest.mark.asyncio
+async def test_chunks_always_expire():
+    mc = DictMemcached()
+    backend = ChunkedMemcachedBackend(mc, chunk_bytes=900, chunk_expire=100)
+
+    await backend.set("key", os.urandom(5000).hex())
+    await backend.set("other", os.urandom(5000).hex(), expire=10)
+
+    assert mc.exptimes[b"key"] == 0 and mc.exptimes[b"other"] == 10
+    assert {
+        exptime for key, exptime in mc.exptimes.items() if key.startswith(b"chunk:")
+    } == {100, 10}
+
+@pytest.mark.asyncio
+async def test_missing_or_corrupt_chunks_are_misses():
+    mc = DictMemcached()
+    backend = ChunkedMemcachedBackend(mc, chunk_bytes=900)
+
+    await backend.set("key", os.urandom(5000).hex())
+    chunk_keys = [k for k in mc.items if k.startswith(b"chunk:")]
+
+    mc.items[chunk_keys[0]] = b"corrupt"
+    assert await backend.get("key") is None
+
+    del mc.items[chunk_keys[1]]
+    assert await backend.get("key") is None
+
+@pytest.mark.asyncio
+async def test_clear_deletes_chunks():
+    mc = DictMemcached()
+    backend = ChunkedMemcachedBackend(mc, chunk_bytes=900)
+
+    await backend.set("key", os.urandom(5000).hex())
+    await backend.set("other", "value")
+
+    assert await backend.clear(key="key") == 1
+    assert list(mc.items) == [b"other"]
+    assert await backend.clear(key="key") == 0
+
+    with pytest.raises(NotImplementedError):
+        await backend.clear(namespace="fastapi-cache")
+
+@pytest.mark.asyncio
+async def test_uncompressed_values_still_readable():
+    mc = DictMemcached()
+    mc.items[b"key"] = b'{"value": 1}'
+
+    assert await ChunkedMemcachedBackend(mc).get("key") == b'{"value": 1}'
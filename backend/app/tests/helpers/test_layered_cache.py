@@ -0,0 +1,77 @@
+import sys
+import time
+sys.path.append("/app/src")
+
+import pytest
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+import tools.data_version
+from tools.caching import LayeredCacheBackend
+
+@pytest.fixture
+def data_version(monkeypatch):
+    """
+    Pins the data version (so that checking it doesn't need the database), and
+    returns a function that changes it.
+    """
+    def set_version(version):
+        monkeypatch.setattr(
+            tools.data_version, "_last_version",
+            {"version": version, "checked_at": time.monotonic()}
+        )
+
+    set_version(1)
+    return set_version
+
+@pytest.mark.asyncio
+async def test_l1_serves_repeat_gets(data_version):
+    """
+    A value fetched from L2 once should be served from L1 afterward, with each
+    tier's hits and misses counted.
+    """
+    l2 = InMemoryBackend()
+    await l2.set("a", "value-a", 60)
+
+    backend = LayeredCacheBackend(l2, max_bytes=100)
+
+    assert (await backend.get_with_ttl("a"))[1] == "value-a"
+    assert (await backend.get_with_ttl("a"))[1] == "value-a"
+    assert (await backend.get_with_ttl("missing"))[1] is None
+
+    stats = backend.stats()
+    assert stats["l1"]["hits"] == 1 and stats["l1"]["misses"] == 2
+    assert stats["l2"]["hits"] == 1 and stats["l2"]["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_l1_is_byte_bounded_lru(data_version):
+    """
+    L1 should evict its least-recently-used entries to stay within its byte
+    budget, and skip values larger than the budget.
+    """
+    backend = LayeredCacheBackend(InMemoryBackend(), max_bytes=10)
+
+    await backend.set("a", "aaaa")
+    await backend.set("b", "bbbb")
+    await backend.get("a")
+    await backend.set("c", "cccc")
+    await backend.set("big", "x" * 11)
+
+    assert set(backend._entries) == {"a", "c"}
+    assert backend.stats()["l1"]["bytes"] == 8
+
+    # (but everything is still in L2)
+    assert await backend.get("big") == "x" * 11
+
+@pytest.mark.asyncio
+async def test_l1_cleared_on_data_version_change(data_version):
+    """
+    L1 should be emptied the first time it's used after the data version
+    changes.
+    """
+    backend = LayeredCacheBackend(InMemoryBackend(), max_bytes=100)
+
+    await backend.set("v1-key", "value")
+    data_version(2)
+    await backend.get("v2-key")
+
+    assert backend.stats()["l1"]["entries"] == 0
@@ -0,0 +1,25 @@
+import asyncio
+import sys
+import weakref
+sys.path.append("/app/src")
+
+import db
+
+def test_default_engine_stays_with_its_loop(monkeypatch):
+    """
+    Only the first event loop to ask for an engine should get the default
+    one; a later loop, e.g. from a second asyncio.run(), should get its own,
+    even once the first loop is gone.
+    """
+    monkeypatch.setattr(db, "DB_USE_NULLPOOL", False)
+    monkeypatch.setattr(db, "_loop_engines", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(db, "_default_engine_loop", None)
+
+    async def get_engine():
+        return db.get_engine()
+
+    first = asyncio.run(get_engine())
+    second = asyncio.run(get_engine())
+
+    assert first is db.engine
+    assert second is not db.engine
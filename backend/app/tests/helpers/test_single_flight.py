@@ -0,0 +1,94 @@
+import asyncio
+import sys
+sys.path.append("/app/src")
+
+import pytest
+
+from tools.caching import SingleFlight
+
+class DictLock:
+    """
+    Stands in for MemcachedLock, with the "other worker's" locks in a set.
+    """
+    timeout = 1
+
+    def __init__(self):
+        self.held = set()
+
+    async def acquire(self, key):
+        if key in self.held:
+            return False
+        self.held.add(key)
+        return True
+
+    async def release(self, key):
+        self.held.discard(key)
+
+    async def is_held(self, key):
+        return key in self.held
+
+@pytest.mark.asyncio
+async def test_share_runs_one_call():
+    """
+    Concurrent share() calls for the same key should all get the result of a
+    single call.
+    """
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    single_flight = SingleFlight()
+    results = await asyncio.gather(*(single_flight.share("key", compute) for _ in range(10)))
+
+    assert results == ["value"] * 10
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_run_once_followers_wait_for_leader():
+    """
+    With run_once(), callers that arrive while the leader's call is running
+    should only make their calls once it's finished, i.e. once it's filled the
+    cache.
+    """
+    cache = {}
+    computed = []
+
+    async def cached_call():
+        if "key" in cache:
+            return cache["key"]
+        computed.append(1)
+        await asyncio.sleep(0.01)
+        cache["key"] = "value"
+        return "value"
+
+    single_flight = SingleFlight(lock=DictLock())
+    results = await asyncio.gather(*(single_flight.run_once("key", cached_call) for _ in range(10)))
+
+    assert results == ["value"] * 10
+    assert len(computed) == 1
+    assert not single_flight.lock.held
+
+@pytest.mark.asyncio
+async def test_run_once_waits_for_other_workers_lock():
+    """
+    If another worker holds the key's lock, run_once() should wait until it's
+    released before making its call.
+    """
+    lock = DictLock()
+    lock.held.add("key")
+    single_flight = SingleFlight(lock=lock)
+
+    async def release_later():
+        await asyncio.sleep(0.2)
+        lock.held.discard("key")
+
+    released = asyncio.ensure_future(release_later())
+
+    async def call():
+        return "key" in lock.held
+
+    assert await single_flight.run_once("key", call) is False
+    await released
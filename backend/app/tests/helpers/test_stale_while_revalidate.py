@@ -0,0 +1,116 @@
+import asyncio
+import sys
+import time
+sys.path.append("/app/src")
+
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from starlette.requests import Request
+from starlette.responses import Response
+
+import tools.data_version
+from tools.caching import (
+    STALE_AT_PREFIX, LayeredCacheBackend, cache, response_single_flight, route_cache_stats,
+    _pack_entry, _unpack_entry
+)
+
+def get_request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+@pytest.fixture
+def backend():
+    backend = InMemoryBackend()
+    backend._store.clear()
+
+    FastAPICache.init(backend, key_builder=lambda func, namespace, **kwargs: f"swr-test:{func.__name__}")
+    return backend
+
+def test_entries_round_trip():
+    assert _unpack_entry(_pack_entry('{"a": 1}', None)) == (None, '{"a": 1}')
+
+    stale_at, encoded = _unpack_entry(_pack_entry('{"a": 1}', 60).encode())
+    assert stale_at is not None and encoded == b'{"a": 1}'
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_then_refreshed(backend):
+    """
+    A stale entry should be returned as-is, and replaced in the background by
+    a freshly computed one.
+    """
+    calls = []
+
+    @cache(stale_after=60)
+    async def route():
+        calls.append(1)
+        return {"value": "fresh"}
+
+    await backend.set("swr-test:route", f'{STALE_AT_PREFIX}0\n{{"value": "stale"}}')
+
+    assert await route(request=get_request(), response=Response()) == {"value": "stale"}
+
+    await asyncio.gather(*response_single_flight._background.values())
+    assert len(calls) == 1
+
+    assert await route(request=get_request(), response=Response()) == {"value": "fresh"}
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_fresh_entry_not_refreshed(backend):
+    calls = []
+
+    @cache(stale_after=60)
+    async def route():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    before = route_cache_stats().get("/", {"hits": 0, "misses": 0})
+
+    for _ in range(3):
+        assert await route(request=get_request(), response=Response()) == {"value": 1}
+
+    assert not response_single_flight._background
+    assert len(calls) == 1
+
+    # (the first request missed, and the rest hit)
+    after = route_cache_stats()["/"]
+    assert after["hits"] - before["hits"] == 2
+    assert after["misses"] - before["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_stale_entry_refreshed_once_across_workers(backend, monkeypatch):
+    """
+    When several workers each hold a stale copy in their L1 tier, only the
+    first to refresh it should recompute the response; the others should pick
+    up its value from the shared L2 tier.
+    """
+    monkeypatch.setattr(
+        tools.data_version, "_last_version", {"version": 1, "checked_at": time.monotonic()}
+    )
+
+    calls = []
+
+    @cache(stale_after=60)
+    async def route():
+        calls.append(1)
+        return {"value": "fresh"}
+
+    workers = [LayeredCacheBackend(backend, max_bytes=1000) for _ in range(3)]
+
+    await backend.set("swr-test:route", f'{STALE_AT_PREFIX}0\n{{"value": "stale"}}')
+    for worker in workers:
+        await worker.get("swr-test:route")
+
+    for worker in workers:
+        monkeypatch.setattr(FastAPICache, "_backend", worker)
+
+        assert await route(request=get_request(), response=Response()) == {"value": "stale"}
+        await asyncio.gather(*response_single_flight._background.values())
+
+    assert len(calls) == 1
+
+    for worker in workers:
+        monkeypatch.setattr(FastAPICache, "_backend", worker)
+        assert await route(request=get_request(), response=Response()) == {"value": "fresh"}
+
+    assert len(calls) == 1
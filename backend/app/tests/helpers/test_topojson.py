@@ -0,0 +1,110 @@
+import sys
+sys.path.append("/app/src")
+
+from shapely.geometry import MultiPolygon, Polygon, box
+
+from tools.topojson import build_topology
+
+def decode_arcs(topology):
+    """
+    Undoes the delta-encoding of the topology's arcs, producing lists of
+    (quantized) points.
+    """
+    arcs = []
+
+    for arc in topology["arcs"]:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x, y = x + dx, y + dy
+            points.append((x, y))
+        arcs.append(points)
+
+    return arcs
+
+def ring_points(arcs, refs):
+    """
+    Stitches the arcs referenced by a ring back into a closed list of points.
+    """
+    points = []
+
+    for ref in refs:
+        arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+        points += arc if not points else arc[1:]
+
+    return points
+
+def arc_index(ref):
+    return ref if ref >= 0 else ~ref
+
+def test_shared_boundaries_stored_once():
+    """
+    The edge shared by two adjacent squares should be a single arc, referenced
+    in opposite directions by each of them, and each square's rings should
+    decode back to its original outline.
+    """
+    left, right = box(0, 0, 1, 1), box(1, 0, 2, 1)
+
+    topology = build_topology(
+        {"squares": [(1, {"name": "left"}, left), (2, {"name": "right"}, right)]},
+        quantization=3
+    )
+
+    assert topology["type"] == "Topology"
+    left_geom, right_geom = topology["objects"]["squares"]["geometries"]
+    assert left_geom["id"] == 1 and left_geom["properties"] == {"name": "left"}
+
+    shared = (
+        set(map(arc_index, left_geom["arcs"][0])) &
+        set(map(arc_index, right_geom["arcs"][0]))
+    )
+    assert len(shared) == 1
+    assert len(topology["arcs"]) == 3
+
+    arcs = decode_arcs(topology)
+    assert set(ring_points(arcs, left_geom["arcs"][0])) == {(0, 0), (1, 0), (1, 2), (0, 2)}
+    assert set(ring_points(arcs, right_geom["arcs"][0])) == {(1, 0), (2, 0), (2, 2), (1, 2)}
+
+def test_holes_and_multipolygons():
+    """
+    A polygon with a hole that's filled by another polygon should share the
+    hole's ring with it, and multipolygons and missing geometry should be
+    represented as such.
+    """
+    hole = box(1, 1, 2, 2)
+    donut = Polygon(box(0, 0, 3, 3).exterior.coords, [hole.exterior.coords])
+    multi = MultiPolygon([box(4, 4, 5, 5), box(6, 6, 7, 7)])
+
+    topology = build_topology({"shapes": [
+        (1, {}, donut), (2, {}, hole), (3, {}, multi), (4, {}, None)
+    ]})
+
+    donut_geom, hole_geom, multi_geom, empty_geom = topology["objects"]["shapes"]["geometries"]
+
+    assert donut_geom["type"] == "Polygon" and len(donut_geom["arcs"]) == 2
+    assert list(map(arc_index, donut_geom["arcs"][1])) == list(map(arc_index, hole_geom["arcs"][0]))
+
+    assert multi_geom["type"] == "MultiPolygon" and len(multi_geom["arcs"]) == 2
+    assert empty_geom["type"] is None
+
+def test_collapsed_rings_dropped():
+    """
+    Rings that collapse to less than a triangle when quantized, like a hole
+    far smaller than a grid cell, should be dropped rather than becoming
+    degenerate arcs, as should polygons whose exterior collapses.
+    """
+    tiny = box(1, 1, 1 + 1e-7, 1 + 1e-7)
+    holey = Polygon(box(0, 0, 3, 3).exterior.coords, [tiny.exterior.coords])
+
+    topology = build_topology({"shapes": [
+        (1, {}, holey), (2, {}, tiny), (3, {}, MultiPolygon([box(4, 4, 5, 5), tiny]))
+    ]})
+
+    holey_geom, tiny_geom, multi_geom = topology["objects"]["shapes"]["geometries"]
+
+    assert holey_geom["type"] == "Polygon" and len(holey_geom["arcs"]) == 1
+    assert tiny_geom["type"] is None
+    assert multi_geom["type"] == "MultiPolygon" and len(multi_geom["arcs"]) == 1
+
+    arcs = decode_arcs(topology)
+    assert all(len(set(ring_points(arcs, ring))) >= 3 for polygon in multi_geom["arcs"] for ring in polygon)
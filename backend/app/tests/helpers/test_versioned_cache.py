@@ -0,0 +1,38 @@
+import sys
+import time
+sys.path.append("/app/src")
+
+import pytest
+
+import tools.data_version
+from tools.caching import VersionedCache
+
+@pytest.fixture(autouse=True)
+def data_version(monkeypatch):
+    # (pinned, so that checking it doesn't need the database)
+    monkeypatch.setattr(
+        tools.data_version, "_last_version", {"version": 1, "checked_at": time.monotonic()}
+    )
+
+@pytest.mark.asyncio
+async def test_max_entries_keeps_most_recently_used():
+    cache = VersionedCache(max_entries=2)
+    calls = []
+
+    async def get(key):
+        async def compute():
+            calls.append(key)
+            return key.upper()
+
+        return await cache.get_or_compute(key, compute)
+
+    assert await get("a") == "A"
+    assert await get("b") == "B"
+    assert await get("a") == "A"
+
+    # "b" is now the least recently used, so it's the one evicted
+    assert await get("c") == "C"
+    assert await get("a") == "A"
+    assert await get("b") == "B"
+
+    assert calls == ["a", "b", "c", "b"]
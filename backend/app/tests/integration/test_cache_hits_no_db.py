@@ -0,0 +1,54 @@
+import sys
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+sys.path.append("/app/src")
+
+# a sampling of cached routes across the routers (the geometry routes are
+# cached in-process rather than via @cache(), but the same applies)
+CACHED_PATHS = [
+    "/stats/measures",
+    "/stats/by-county/08001",
+    "/stats/county/sociodemographics/fips-value?measure=Total",
+    "/counties",
+    "/healthregions",
+    "/locations",
+]
+
+@pytest.mark.asyncio
+async def test_cache_hits_dont_touch_db(client, pinned_data_version):
+    """
+    Once a cached route's response is in the cache, requesting it again
+    shouldn't check out (or open) a database connection.
+    """
+
+    # first, populate the cache for each route
+    for path in CACHED_PATHS:
+        response = client.get(path)
+        assert response.status_code == 200, path
+
+    # count every connection checkout or new connection from any pool
+    # while we re-request the now-cached routes
+    db_events = []
+
+    def on_checkout(*args):
+        db_events.append("checkout")
+
+    def on_connect(*args):
+        db_events.append("connect")
+
+    event.listen(Pool, "checkout", on_checkout)
+    event.listen(Pool, "connect", on_connect)
+
+    try:
+        for _ in range(3):
+            for path in CACHED_PATHS:
+                response = client.get(path)
+                assert response.status_code == 200, path
+    finally:
+        event.remove(Pool, "checkout", on_checkout)
+        event.remove(Pool, "connect", on_connect)
+
+    assert len(db_events) == 0, f"Cache hits touched the database: {db_events}"
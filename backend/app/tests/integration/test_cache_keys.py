@@ -0,0 +1,92 @@
+import sys
+from urllib.parse import quote_plus
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+from starlette.requests import Request
+
+sys.path.append("/app/src")
+
+from models import SCPIncidenceCounty
+from routers.statistics import fips_value_key_builder
+from tools.queries import _factor_defaults_cache, prime_model_factor_defaults
+
+@pytest.mark.asyncio
+async def test_equivalent_filters_share_cache_entry(client):
+    """
+    fips-value requests whose filters resolve to the same factor values should
+    be answered from the same cache entry.
+    """
+    base = "/stats/county/scpincidence/fips-value?measure=" + quote_plus("All Cancer Sites")
+
+    variants = [
+        "&filters=" + quote_plus("sex:Female;stage:All Stages"),
+        "&filters=" + quote_plus("stage:All Stages;sex:Female"),
+        "&filters=" + quote_plus(" sex : Female ;stage:All Stages"),
+        "&filters=" + quote_plus("sex:Female") + "&unused=1",
+    ]
+
+    # (the variants that name a default only share a key once the defaults
+    # are loaded, which the API otherwise does in the background at startup)
+    client.portal.call(prime_model_factor_defaults)
+
+    first = client.get(base + variants[0])
+    assert first.status_code == 200
+
+    before = client.get("/healthz/cache").json()["tiers"]["l1"]["hits"]
+
+    for variant in variants[1:]:
+        response = client.get(base + variant)
+        assert response.status_code == 200, variant
+        assert response.json() == first.json(), variant
+
+    after = client.get("/healthz/cache").json()["tiers"]["l1"]["hits"]
+    assert after - before == len(variants) - 1
+
+@pytest.mark.asyncio
+async def test_key_build_doesnt_touch_db(client, pinned_data_version):
+    """
+    Building a fips-value cache key shouldn't check out (or open) a database
+    connection, whether or not the model's factor defaults have been loaded,
+    and filters that don't name a default should get the same key either way.
+    """
+    path = "/stats/county/scpincidence/fips-value"
+    query = "measure=" + quote_plus("All Cancer Sites") + "&filters=" + quote_plus("sex:Female")
+
+    # loads the data version and the model's factor defaults
+    assert client.get(f"{path}?{query}").status_code == 200
+
+    key_builder = fips_value_key_builder("county", SCPIncidenceCounty, "scpincidence")
+    request = Request({
+        "type": "http", "method": "GET", "path": path,
+        "query_string": query.encode(), "headers": [],
+    })
+
+    async def build_key(filters):
+        return await key_builder(None, request=request, kwargs={"measure": "All Cancer Sites", "filters": filters})
+
+    db_events = []
+
+    def on_checkout(*args):
+        db_events.append("checkout")
+
+    def on_connect(*args):
+        db_events.append("connect")
+
+    event.listen(Pool, "checkout", on_checkout)
+    event.listen(Pool, "connect", on_connect)
+
+    try:
+        warm_key = await build_key("sex:Female")
+        warm_default_key = await build_key("stage:All Stages;sex:Female")
+
+        # e.g. a worker that hasn't loaded the defaults yet
+        _factor_defaults_cache.clear()
+        cold_key = await build_key("sex: Female;sex:Female")
+    finally:
+        event.remove(Pool, "checkout", on_checkout)
+        event.remove(Pool, "connect", on_connect)
+
+    assert len(db_events) == 0, f"Building a key touched the database: {db_events}"
+    assert warm_key == warm_default_key == cold_key
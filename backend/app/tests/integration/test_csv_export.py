@@ -0,0 +1,39 @@
+import csv
+from io import StringIO
+
+import pytest
+
+import sys
+sys.path.append("/app/src")
+
+from models.base import STATS_MODELS, FACTOR_DESCRIPTIONS
+from tools.strings import slug_modelname_sans_type
+
+
+@pytest.mark.asyncio(loop_scope='function')
+async def test_csv_export_has_header_and_rows(event_loop, client):
+    """
+    Test that each model's CSV export starts with the expected header and
+    contains at least one row.
+    """
+    for type in STATS_MODELS:
+        for model in STATS_MODELS[type]:
+            simple_model_name = slug_modelname_sans_type(model, type)
+            path = f"/stats/{type}/{simple_model_name}/as-csv"
+
+            response = client.get(path)
+            assert response.status_code == 200, path
+            assert response.headers["content-type"].startswith("text/csv"), path
+
+            rows = list(csv.reader(StringIO(response.text)))
+            header = rows[0]
+
+            factor_cols = [str(x) for x in FACTOR_DESCRIPTIONS.get(simple_model_name, {})]
+            leading_cols = (
+                ["GEOID", "County", "State", "measure", "value"]
+                if type in ("county", "tract") else
+                ["HSR Region", "State", "measure", "value"]
+            )
+            assert header == leading_cols + factor_cols, path
+
+            assert len(rows) > 1, path
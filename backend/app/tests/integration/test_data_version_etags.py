@@ -0,0 +1,66 @@
+import sys
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+sys.path.append("/app/src")
+
+# a sampling of routes whose responses are tagged with the data version
+VERSIONED_PATHS = [
+    "/stats/measures",
+    "/stats/by-county/08001",
+    "/stats/county/sociodemographics/fips-value?measure=Total",
+    "/counties",
+    "/healthregions",
+    "/locations",
+]
+
+@pytest.mark.asyncio
+async def test_etag_revalidation(client, pinned_data_version):
+    """
+    Requesting a route with the ETag from a previous response should produce a
+    304 without running the route, and so without touching the database.
+    """
+
+    etags = {}
+
+    for path in VERSIONED_PATHS:
+        response = client.get(path)
+        assert response.status_code == 200, path
+
+        etag = response.headers.get("ETag")
+        assert etag is not None and not etag.startswith("W/"), path
+        etags[path] = etag
+
+    db_events = []
+
+    def on_checkout(*args):
+        db_events.append("checkout")
+
+    event.listen(Pool, "checkout", on_checkout)
+
+    try:
+        for path, etag in etags.items():
+            response = client.get(path, headers={"If-None-Match": etag})
+            assert response.status_code == 304, path
+            assert response.headers.get("ETag") == etag, path
+            assert response.content == b"", path
+    finally:
+        event.remove(Pool, "checkout", on_checkout)
+
+    assert len(db_events) == 0, f"Revalidation touched the database: {db_events}"
+
+@pytest.mark.asyncio
+async def test_etag_varies_with_accept(client):
+    """
+    The JSON and binary forms of a fips-value response should have different
+    ETags, since they're different representations of the same URL.
+    """
+    path = "/stats/county/sociodemographics/fips-value?measure=Total"
+
+    json_response = client.get(path)
+    binary_response = client.get(path, headers={"Accept": "application/octet-stream"})
+
+    assert json_response.status_code == binary_response.status_code == 200
+    assert json_response.headers["ETag"] != binary_response.headers["ETag"]
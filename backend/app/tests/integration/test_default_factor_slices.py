@@ -0,0 +1,50 @@
+import sys
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+sys.path.append("/app/src")
+
+from db import session_scope
+from models import SCPIncidenceCounty, SCPDeathsCounty
+from routers.statistics import build_fips_value_query
+from tools.queries import (
+    get_factor_source, get_model_factor_defaults, get_model_factor_defaults_clause
+)
+
+@pytest.mark.asyncio(loop_scope='function')
+@pytest.mark.parametrize("model, simple_model_name", [
+    (SCPIncidenceCounty, "scpincidence"),
+    (SCPDeathsCounty, "scpdeaths"),
+])
+async def test_slice_matches_table(event_loop, model, simple_model_name):
+    """
+    The default-factor slice should hold exactly the table's rows for the
+    default factor values, and fips-value should return the same rows from it
+    as from the table.
+    """
+    async with session_scope() as session:
+        constraints, clause = await get_model_factor_defaults_clause(model, "county", session)
+        source = await get_factor_source(model, "county", constraints)
+        assert source is not model, "the default-factor slice hasn't been created"
+
+        table_count = (await session.execute(select(func.count()).select_from(model).where(clause))).scalar()
+        slice_count = (await session.execute(select(func.count()).select_from(source))).scalar()
+        assert slice_count == table_count
+
+        # a non-default filter should go to the table itself
+        assert await get_factor_source(model, "county", {"All Cancer Sites": {"sex": "Female"}}) is model
+
+        for measure, factors in list((await get_model_factor_defaults(model, "county")).items())[:3]:
+            query, applied = await build_fips_value_query("county", model, simple_model_name, measure, None, session)
+            from_slice = (await session.execute(query.order_by("GEOID"))).all()
+
+            from_table = (await session.execute(
+                select(model.FIPS, model.AAR, model.AAC)
+                    .where(model.Site == measure)
+                    .where(*(getattr(model, f) == v for f, v in applied.items()))
+                    .order_by(model.FIPS)
+            )).all()
+
+            assert [tuple(x) for x in from_slice] == [tuple(x) for x in from_table], measure
@@ -0,0 +1,68 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from urllib.parse import quote_plus
+
+import sys
+sys.path.append("/app/src")
+
+from models.base import STATS_MODELS, MEASURE_DESCRIPTIONS, CANCER_MODELS
+from models.scp import SCP_TRENDS_MODELS, TREND_MAP
+from tools.strings import slug_modelname_sans_type
+
+
+@pytest.mark.asyncio(loop_scope='function')
+async def test_binary_matches_json(event_loop, client):
+    """
+    Test that the packed values in a binary fips-value response match the
+    values in the corresponding JSON response, when aligned with the region
+    IDs from /stats/{type}/geoids.
+    """
+    for type in STATS_MODELS:
+        response = client.get(f"/stats/{type}/geoids")
+        assert response.status_code == 200, type
+        geoids = response.json()["geoids"]
+        positions = {geoid: i for i, geoid in enumerate(geoids)}
+
+        for model in STATS_MODELS[type]:
+            simple_model_name = slug_modelname_sans_type(model, type)
+
+            # one measure per model is enough to check the encoding
+            for measure in list(MEASURE_DESCRIPTIONS[simple_model_name])[:1]:
+                encoded_measure = quote_plus(measure)
+                path = f"/stats/{type}/{simple_model_name}/fips-value?measure={encoded_measure}"
+
+                json_data = client.get(path).json()
+                response = client.get(path, headers={"Accept": "application/octet-stream"})
+
+                assert response.status_code == 200, path
+                assert response.headers["content-type"] == "application/octet-stream", path
+
+                columns = response.headers["X-Value-Columns"].split(",")
+                meta = json.loads(response.headers["X-Measure-Meta"])
+                packed = np.frombuffer(response.content, dtype="<f4").reshape(len(columns), -1)
+
+                assert columns == (["value", "aac"] if model in CANCER_MODELS else ["value"])
+                assert meta["count"] == len(geoids) == packed.shape[1], path
+                assert meta["unit"] == json_data["unit"], path
+                assert meta["min"] == json_data["min"] and meta["max"] == json_data["max"], path
+
+                for geoid, values in json_data["values"].items():
+                    if geoid not in positions:
+                        continue
+
+                    i = positions[geoid]
+
+                    for c, col in enumerate(columns):
+                        expected = values.get(col)
+
+                        if model in SCP_TRENDS_MODELS:
+                            expected = TREND_MAP.get(expected)
+
+                        if expected is None:
+                            assert math.isnan(packed[c, i]), f"{path} {geoid} {col}"
+                        else:
+                            assert packed[c, i] == pytest.approx(expected, rel=1e-6), f"{path} {geoid} {col}"
@@ -39,3 +39,62 @@ async def test_geom_populated(client):
             assert len(data) == 1249
         elif type == "healthregion":
             assert len(data) == 21
+
+@pytest.mark.asyncio
+async def test_simplified_geom_matches_full(client):
+    """
+    Each simplified detail level should return the same regions, in the same
+    order, as the full-resolution geometry, with smaller geometry.
+    """
+
+    for path in ("/counties", "/tracts", "/healthregions"):
+        full = client.get(path)
+        assert full.status_code == 200, path
+
+        for detail in ("low", "medium"):
+            simplified = client.get(path, params={"detail": detail})
+            assert simplified.status_code == 200, (path, detail)
+
+            assert [x["ogc_fid"] for x in simplified.json()] == [x["ogc_fid"] for x in full.json()], (path, detail)
+            assert len(simplified.content) <= len(full.content), (path, detail)
+
+        # zoom levels past the simplified levels' max zoom get the full geometry
+        assert client.get(path, params={"zoom": 14}).content == full.content, path
+
+@pytest.mark.asyncio
+async def test_topojson_matches_json(client):
+    """
+    The TopoJSON form of each geometry route should have one geometry per
+    region, with the same IDs as the JSON form, and should be smaller.
+    """
+
+    for path, name in (("/counties", "county"), ("/tracts", "tract"), ("/healthregions", "healthregion")):
+        full = client.get(path)
+        topo = client.get(path, params={"format": "topojson"})
+        assert topo.status_code == 200, path
+
+        topology = topo.json()
+        assert topology["type"] == "Topology", path
+
+        geometries = topology["objects"][name]["geometries"]
+        assert [x["id"] for x in geometries] == [x["ogc_fid"] for x in full.json()], path
+        assert len(topo.content) < len(full.content), path
+
+@pytest.mark.asyncio
+async def test_geom_fields_projection(client):
+    """
+    Requesting specific fields should return just those fields for every
+    region, without the geometry unless it's asked for, and reject fields the
+    model doesn't have.
+    """
+
+    full = client.get("/counties").json()
+    response = client.get("/counties", params={"fields": "us_fips,full,cent_lat,cent_long"})
+    assert response.status_code == 200
+
+    assert response.json() == [
+        {k: x[k] for k in ("full", "cent_lat", "cent_long", "us_fips")}
+        for x in full
+    ]
+
+    assert client.get("/counties", params={"fields": "us_fips,nope"}).status_code == 400
@@ -0,0 +1,77 @@
+import sys
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+sys.path.append("/app/src")
+
+from db import session_scope
+from models import SCPIncidenceCounty, SociodemographicsCounty
+from routers.statistics import build_fips_value_query, _county_measures_query
+from tools.queries import get_factor_source, get_model_factor_defaults_clause
+
+def plan_nodes(plan):
+    """
+    Yields every node of an EXPLAIN (FORMAT JSON) plan.
+    """
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+async def explain(session, query):
+    """
+    Returns the nodes of the plan for the given query, with sequential and
+    bitmap scans disabled, so that the plan shows whether the query can be
+    answered from an index alone regardless of how small the tables are.
+    """
+    sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    await session.execute(text("SET LOCAL enable_bitmapscan = off"))
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+
+    return list(plan_nodes(result.scalar()[0]["Plan"]))
+
+@pytest.mark.asyncio(loop_scope='function')
+@pytest.mark.parametrize("type, simple_model_name, model, measure", [
+    ("county", "scpincidence", SCPIncidenceCounty, "All Cancer Sites"),
+    ("county", "sociodemographics", SociodemographicsCounty, "Total"),
+])
+async def test_fips_value_index_only(event_loop, type, simple_model_name, model, measure):
+    """
+    The fips-value query for a measure (with its default factors) should be an
+    index-only scan of the by-measure covering index of the table (or of its
+    default-factor slice, if it has one.)
+    """
+    async with session_scope() as session:
+        query, _ = await build_fips_value_query(type, model, simple_model_name, measure, None, session)
+        nodes = await explain(session, query)
+
+    scans = [x for x in nodes if "Relation Name" in x]
+    assert [x["Node Type"] for x in scans] == ["Index Only Scan"], scans
+    assert scans[0]["Relation Name"] in (model.__tablename__, f"{model.__tablename__}_default_factors")
+    assert scans[0]["Index Name"] == f"ix_{scans[0]['Relation Name']}_by_measure"
+
+@pytest.mark.asyncio(loop_scope='function')
+async def test_by_county_index_only(event_loop):
+    """
+    The by-county query for a county, built as get_county_measures() builds
+    it, should be an index-only scan of the by-region covering index of the
+    table (or of its default-factor slice, if it has one.)
+    """
+    model = SCPIncidenceCounty
+
+    async with session_scope() as session:
+        constraints, clause = await get_model_factor_defaults_clause(model, "county", session)
+        source = await get_factor_source(model, "county", constraints)
+
+        query = _county_measures_query(
+            model, "scpincidence", clause if source is model else None, source=source
+        ).where(source.FIPS == "08031")
+        nodes = await explain(session, query)
+
+    scans = [x for x in nodes if "Relation Name" in x]
+    assert [x["Node Type"] for x in scans] == ["Index Only Scan"], scans
+    assert scans[0]["Relation Name"] in (model.__tablename__, f"{model.__tablename__}_default_factors")
+    assert scans[0]["Index Name"] == f"ix_{scans[0]['Relation Name']}_by_region"
@@ -0,0 +1,49 @@
+import sys
+
+import pytest
+
+sys.path.append("/app/src")
+
+# the Colorado State Capitol, in Denver County (08031)
+DENVER = {"lat": 39.7393, "lon": -104.9848}
+# the middle of the Atlantic, which isn't in any region
+NOWHERE = {"lat": 30.0, "lon": -40.0}
+
+@pytest.mark.asyncio
+async def test_point_lookup(client):
+    """
+    A point in Denver should resolve to Denver County and to a tract and
+    health region, and a point outside the state to nothing.
+    """
+    response = client.get("/lookup/point", params=DENVER)
+    assert response.status_code == 200
+
+    result = response.json()
+    assert result["county"]["us_fips"] == "08031"
+    assert result["tract"]["fips"].startswith("08031")
+    assert result["healthregion"] is not None
+    assert "wkb_geometry" not in result["county"]
+
+    response = client.get("/lookup/point", params=NOWHERE)
+    assert response.status_code == 200
+    assert response.json()["county"] is None
+
+    assert client.get("/lookup/point", params={"lat": 100, "lon": 0}).status_code == 422
+
+@pytest.mark.asyncio
+async def test_batch_point_lookup(client):
+    """
+    The batch form should return the same results as the single-point form,
+    in the order of the points.
+    """
+    points = [DENVER, NOWHERE] * 500
+
+    response = client.post("/lookup/points", json={"points": points})
+    assert response.status_code == 200
+
+    results = response.json()
+    single = client.get("/lookup/point", params=DENVER).json()
+
+    assert len(results) == len(points)
+    assert results[0] == single
+    assert all(x["county"] is None for x in results[1::2])
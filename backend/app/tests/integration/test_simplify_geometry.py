@@ -0,0 +1,58 @@
+import sys
+
+import pytest
+from sqlalchemy import text
+
+sys.path.append("/app/src")
+
+from commands.simplify_geometry import SIMPLIFY_LAYER_SQL, SIMPLIFY_MAX_AREA_CHANGE
+from db import session_scope
+
+# two regions that share a jagged boundary, whose jags are smaller than the
+# tolerance, so that simplifying that boundary changes it substantially
+JAGGED_EDGE = ", ".join(
+    f"{1 + (0.003 if i % 2 else -0.003)} {i / 20}" for i in range(1, 20)
+)
+REGIONS = [
+    (1, f"POLYGON((0 0, 1 0, {JAGGED_EDGE}, 1 1, 0 1, 0 0))"),
+    (2, f"POLYGON((1 0, 2 0, 2 1, 1 1, {', '.join(reversed(JAGGED_EDGE.split(', ')))}, 1 0))"),
+]
+
+@pytest.mark.asyncio(loop_scope='function')
+async def test_simplified_neighbors_dont_gap_or_overlap(event_loop):
+    """
+    Simplifying adjacent regions should leave them covering the same area as
+    before, without gaps or overlaps between them.
+    """
+    async with session_scope() as session:
+        await session.execute(text(
+            "CREATE TEMPORARY TABLE simplify_test (ogc_fid integer, wkb_geometry geometry) ON COMMIT DROP"
+        ))
+        for ogc_fid, wkt in REGIONS:
+            await session.execute(
+                text("INSERT INTO simplify_test VALUES (:ogc_fid, ST_GeomFromText(:wkt, 4326))"),
+                {"ogc_fid": ogc_fid, "wkt": wkt}
+            )
+
+        result = await session.execute(
+            text(f"""
+                WITH simplified AS ({SIMPLIFY_LAYER_SQL.format(layer="simplify_test")})
+                SELECT
+                    (SELECT ST_Area(ST_Union(wkb_geometry)) FROM simplified),
+                    (SELECT ST_Area(ST_Union(wkb_geometry)) FROM simplify_test),
+                    (
+                        SELECT ST_Area(ST_Intersection(a.wkb_geometry, b.wkb_geometry))
+                        FROM simplified AS a, simplified AS b
+                        WHERE a.ogc_fid = 1 AND b.ogc_fid = 2
+                    ),
+                    (SELECT ST_NPoints(wkb_geometry) FROM simplified WHERE ogc_fid = 1)
+            """),
+            {"tolerance": 0.005, "max_area_change": SIMPLIFY_MAX_AREA_CHANGE}
+        )
+        simplified_area, original_area, overlap, points = result.one()
+
+    assert simplified_area == pytest.approx(original_area, rel=1e-9)
+    assert overlap == pytest.approx(0, abs=1e-12)
+
+    # (the jags should be gone, i.e. it should actually have been simplified)
+    assert points < len(REGIONS[0][1].split(","))
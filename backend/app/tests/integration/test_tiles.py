@@ -0,0 +1,44 @@
+import sys
+
+import pytest
+
+sys.path.append("/app/src")
+
+# a zoom-6 tile that covers most of Colorado
+COLORADO_TILE = "6/13/24"
+
+@pytest.mark.asyncio
+async def test_tiles_populated(client):
+    """
+    Each layer's tile over Colorado should contain features, both with and
+    without a measure's values joined in.
+    """
+    for layer in ("county", "tract", "healthregion"):
+        path = f"/tiles/{layer}/{COLORADO_TILE}.mvt"
+        response = client.get(path)
+
+        assert response.status_code == 200, path
+        assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile", path
+        assert len(response.content) > 0, path
+
+    path = f"/tiles/county/{COLORADO_TILE}.mvt"
+    plain = client.get(path)
+    with_values = client.get(path, params={"model": "sociodemographics", "measure": "Total"})
+
+    assert with_values.status_code == 200
+    assert len(with_values.content) > len(plain.content)
+
+@pytest.mark.asyncio
+async def test_tiles_invalid(client):
+    """
+    Unknown layers and tiles outside the zoom level's grid should be 404s, as
+    should unknown models.
+    """
+    assert client.get(f"/tiles/nope/{COLORADO_TILE}.mvt").status_code == 404
+    assert client.get("/tiles/county/2/4/0.mvt").status_code == 404
+    assert client.get(
+        f"/tiles/county/{COLORADO_TILE}.mvt", params={"model": "nope", "measure": "Total"}
+    ).status_code == 404
+    assert client.get(
+        f"/tiles/county/{COLORADO_TILE}.mvt", params={"model": "sociodemographics"}
+    ).status_code == 400
@@ -1,31 +1,868 @@
+import asyncio
+import base64
+import hashlib
+import inspect
+import json
+import logging
+import secrets
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+import aiomcache
 from fastapi import Request
-from starlette.responses import Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends import Backend
+from fastapi_cache.coder import JsonCoder
+from fastapi_cache.decorator import cache as fastapi_cache
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db import LazySession
+from settings import (
+    CACHE_LOCK_TIMEOUT, CACHE_LOCK_POLL_INTERVAL, CACHE_STALE_AFTER, CACHE_CHUNK_BYTES
+)
+from tools.data_version import get_cached_data_version, get_data_version
+
+
+logger = logging.getLogger(__name__)
 
-def request_key_builder(
+# query strings longer than this are hashed in cache keys, so that the keys
+# stay within memcached's 250-byte limit
+MAX_KEY_QUERY_LENGTH = 160
+
+async def request_key_builder(
     func,
     namespace: str = "",
     *,
     request: Request = None,
     response: Response = None,
+    params: Optional[dict[str, str]] = None,
     **kwargs,
 ) -> str:
     """
-    This key builder builds a cache key based on the request method, path, and
-    query parameters.
+    This key builder builds a cache key based on the data version and the
+    request method, path, and query parameters. Including the data version
+    means responses cached before an import are never served after it.
     
     This is to circumvent the default key builder's behavior of using the
     arguments to the method since in our case these are in-memory handles (like
     database sessions) that are newly created with each request, causing a cache
     miss every time.
 
+    Only the query parameters that the route takes are included, in sorted
+    order, so that requests that differ only in their order or in parameters
+    that the route ignores share a key. 'params', if given, replaces the
+    request's query parameters, e.g. with normalized values.
+
     Lifted from the docs, https://github.com/long2ice/fastapi-cache?tab=readme-ov-file#custom-key-builder.
     """
 
+    query = ""
+
+    if request:
+        route_params = inspect.signature(func).parameters if func else None
+        params = request.query_params if params is None else params
+
+        # (url-encoded, since memcached keys can't contain whitespace)
+        query = urlencode(sorted(
+            (k, v) for k, v in params.items()
+            if route_params is None or k in route_params
+        ))
+
+        if len(query) > MAX_KEY_QUERY_LENGTH:
+            query = hashlib.sha1(query.encode()).hexdigest()
+
     return ":".join(
         [
             namespace,
+            f"v{await get_data_version()}",
             (request.method.lower() if request else ""),
-            (request.url.path if request else ""),
-            repr(sorted(request.query_params.items())) if request else "",
+            (quote(request.url.path) if request else ""),
+            query,
         ]
     )
+
+class ResponseJsonCoder(JsonCoder):
+    """
+    Like fastapi-cache's JsonCoder, but also handles routes that return a raw
+    (non-JSON) Response, e.g. the binary form of fips-value, by storing its
+    body base64-encoded along with its media type and headers.
+    """
+
+    @classmethod
+    def encode(cls, value: Any) -> str:
+        if isinstance(value, Response) and not isinstance(value, JSONResponse):
+            return json.dumps({
+                "__response__": base64.b64encode(value.body).decode("ascii"),
+                "status_code": value.status_code,
+                "media_type": value.media_type,
+                "headers": {
+                    k: v for k, v in value.headers.items()
+                    if k not in ("content-length", "content-type")
+                },
+            })
+
+        return super().encode(value)
+
+    @classmethod
+    def decode(cls, value: str) -> Any:
+        result = super().decode(value)
+
+        if isinstance(result, dict) and "__response__" in result:
+            return Response(
+                content=base64.b64decode(result["__response__"]),
+                status_code=result["status_code"],
+                media_type=result["media_type"],
+                headers=result["headers"],
+            )
+
+        return result
+
+
+class MemcachedLock:
+    """
+    A lock shared by every API worker, held by adding a key to memcached
+    (which only succeeds if the key doesn't already exist). Locks expire after
+    'timeout' seconds, so a worker that dies while holding one can't block the
+    others for long.
+    """
+
+    def __init__(self, mc: aiomcache.Client, timeout: int = CACHE_LOCK_TIMEOUT):
+        self.mc = mc
+        self.timeout = timeout
+
+    @staticmethod
+    def _lock_key(key: str) -> bytes:
+        # (cache keys can be longer than, or contain characters that aren't
+        # allowed in, memcached keys)
+        return f"lock:{hashlib.sha1(key.encode()).hexdigest()}".encode()
+
+    async def acquire(self, key: str) -> bool:
+        return await self.mc.add(self._lock_key(key), b"1", exptime=self.timeout)
+
+    async def release(self, key: str):
+        await self.mc.delete(self._lock_key(key))
+
+    async def is_held(self, key: str) -> bool:
+        return await self.mc.get(self._lock_key(key)) is not None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key, so that only one of them does
+    the work at a time.
+
+    Within a worker, share() runs a single call for all of the concurrent
+    callers and gives each its result. run_once() is for calls that fill a
+    shared cache: the first caller (in any worker, if 'lock' is given) makes
+    the call while the rest wait for it to finish, then make theirs, which are
+    expected to find the value in the cache. run_in_background() is for
+    refreshing such a cache without anyone waiting.
+    """
+
+    def __init__(self, lock: Optional[MemcachedLock] = None):
+        self.lock = lock
+        self._inflight = {}
+        self._background = {}
+
+    async def share(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # (shielded, so that a caller that's cancelled, e.g. when its client
+        # disconnects, doesn't cancel the call for the others)
+        return await asyncio.shield(task)
+
+    async def run_once(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        leader = self._inflight.get(key)
+
+        if leader is not None:
+            # wait for the leader to fill the cache, whether or not it
+            # succeeded, then make our own call
+            await asyncio.wait([leader])
+            return await call()
+
+        leader = asyncio.ensure_future(self._lead(key, call))
+        self._inflight[key] = leader
+
+        try:
+            return await leader
+        finally:
+            if self._inflight.get(key) is leader:
+                del self._inflight[key]
+
+    def run_in_background(self, key: str, call: Callable[[], Awaitable[Any]]):
+        """
+        Starts call() in the background, unless a background call for the same
+        key is already running in this worker, or (if 'lock' is given) another
+        worker holds the key's lock.
+        """
+        if key in self._background:
+            return
+
+        async def run():
+            try:
+                if self.lock is not None and not await self.lock.acquire(key):
+                    return
+
+                try:
+                    await call()
+                finally:
+                    if self.lock is not None:
+                        await self.lock.release(key)
+            except Exception:
+                logger.warning(f"Error in the background call for '{key}':", exc_info=True)
+
+        task = asyncio.ensure_future(run())
+        self._background[key] = task
+        task.add_done_callback(lambda _: self._background.pop(key, None))
+
+    async def _lead(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        if self.lock is None:
+            return await call()
+
+        try:
+            acquired = await self.lock.acquire(key)
+        except Exception:
+            logger.warning(f"Error acquiring the lock for '{key}':", exc_info=True)
+            return await call()
+
+        if not acquired:
+            # another worker is computing this key; wait for it to finish (or
+            # for its lock to expire) before making our call
+            deadline = time.monotonic() + self.lock.timeout
+
+            try:
+                while time.monotonic() < deadline and await self.lock.is_held(key):
+                    await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+            except Exception:
+                logger.warning(f"Error checking the lock for '{key}':", exc_info=True)
+
+            return await call()
+
+        try:
+            return await call()
+        finally:
+            try:
+                await self.lock.release(key)
+            except Exception:
+                logger.warning(f"Error releasing the lock for '{key}':", exc_info=True)
+
+# coalesces the computation of @cache()'d responses; main.startup() gives it a
+# MemcachedLock so that it works across workers, too
+response_single_flight = SingleFlight()
+
+# marks a cached response stored along with the time after which it's stale
+STALE_AT_PREFIX = "stale-at:"
+
+def _pack_entry(encoded: str, stale_after: Optional[int]) -> str:
+    """
+    Prefixes a coder-encoded response with the (wall-clock) time after which
+    it's stale, if 'stale_after' is given.
+    """
+    if not stale_after:
+        return encoded
+
+    return f"{STALE_AT_PREFIX}{int(time.time()) + stale_after}\n{encoded}"
+
+def _unpack_entry(stored) -> Tuple[Optional[int], Any]:
+    """
+    Undoes _pack_entry() for a value read from the cache backend (as a str or
+    bytes), returning the time after which it's stale (or None, if it doesn't
+    go stale) and the coder-encoded response.
+    """
+    prefix = STALE_AT_PREFIX.encode() if isinstance(stored, bytes) else STALE_AT_PREFIX
+
+    if not stored.startswith(prefix):
+        return None, stored
+
+    header, _, encoded = stored.partition(b"\n" if isinstance(stored, bytes) else "\n")
+    return int(header[len(prefix):]), encoded
+
+# the hits and misses of each @cache()'d route in this worker, by the route's
+# path (e.g. "/stats/county/scpincidence/fips-value"); see route_cache_stats()
+_route_counts = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+def route_cache_stats() -> dict:
+    """
+    Returns the hit and miss counts, and the resulting hit rate, of each
+    @cache()'d route in this worker since it started, by the route's path.
+    Requests that bypass the cache aren't counted.
+    """
+    return {
+        path: {**counts, "hit_rate": counts["hits"] / (counts["hits"] + counts["misses"])}
+        for path, counts in sorted(_route_counts.items())
+    }
+
+def cache(
+    expire: Optional[int] = None,
+    coder=None,
+    key_builder: Optional[Callable[..., Any]] = None,
+    namespace: str = "",
+    stale_after: Optional[int] = CACHE_STALE_AFTER,
+):
+    """
+    Like fastapi-cache's @cache(), with two additions:
+
+    - When several requests miss the same key at once, only one of them
+      (across all workers) computes the response; the rest wait for it and are
+      then answered from the cache. See SingleFlight.run_once().
+    - Responses go stale 'stale_after' seconds after they're computed (unless
+      it's 0 or None). A stale response is still returned right away, but it's
+      recomputed in the background, once across all workers, for the requests
+      after it. 'expire' (by default, FastAPICache's) and the data version in
+      the key still determine how long a response can be served at all.
+    """
+    def wrapper(func):
+        params = inspect.signature(func).parameters
+        takes_request = "request" in params
+        takes_response = "response" in params
+
+        # (fastapi-cache's decorator adds 'request' and 'response' to the
+        # route's parameters; it also handles the requests that bypass the cache)
+        bypassed = fastapi_cache(expire=expire, coder=coder, key_builder=key_builder, namespace=namespace)(func)
+
+        async def call(args, kwargs):
+            kwargs = dict(kwargs)
+            if not takes_request:
+                kwargs.pop("request", None)
+            if not takes_response:
+                kwargs.pop("response", None)
+            return await func(*args, **kwargs)
+
+        @wraps(bypassed)
+        async def inner(*args, **kwargs):
+            request: Optional[Request] = kwargs.get("request")
+            response: Optional[Response] = kwargs.get("response")
+
+            if (
+                request is None or request.method != "GET" or
+                request.headers.get("Cache-Control") in ("no-store", "no-cache") or
+                not FastAPICache.get_enable()
+            ):
+                return await bypassed(*args, **kwargs)
+
+            value_coder = coder or FastAPICache.get_coder()
+            value_expire = expire or FastAPICache.get_expire()
+            backend = FastAPICache.get_backend()
+
+            cache_key = (key_builder or FastAPICache.get_key_builder())(
+                func, namespace,
+                request=request, response=response, args=args,
+                kwargs={k: v for k, v in kwargs.items() if k not in ("request", "response")},
+            )
+            if inspect.isawaitable(cache_key):
+                cache_key = await cache_key
+
+            async def store(value):
+                try:
+                    await backend.set(
+                        cache_key, _pack_entry(value_coder.encode(value), stale_after), value_expire
+                    )
+                except Exception:
+                    logger.warning(f"Error setting cache key '{cache_key}' in backend:", exc_info=True)
+
+            async def refresh():
+                # another worker may have refreshed the key already (with this
+                # worker's L1 tier still holding the stale copy), in which case
+                # take its value rather than recomputing it
+                try:
+                    stored = await getattr(backend, "reload", backend.get)(cache_key)
+                except Exception:
+                    logger.warning(f"Error reloading cache key '{cache_key}' from backend:", exc_info=True)
+                    stored = None
+
+                if stored is not None:
+                    stale_at, _ = _unpack_entry(stored)
+                    if stale_at is None or time.time() < stale_at:
+                        return
+
+                # the request's session is closed once it's been answered, so
+                # the recomputation gets its own
+                session = LazySession()
+                try:
+                    await store(await call(args, {
+                        k: session if isinstance(v, LazySession) else v
+                        for k, v in kwargs.items()
+                    }))
+                finally:
+                    await session.close()
+
+            async def lookup():
+                try:
+                    ttl, stored = await backend.get_with_ttl(cache_key)
+                except Exception:
+                    logger.warning(f"Error retrieving cache key '{cache_key}' from backend:", exc_info=True)
+                    return None
+
+                if stored is None:
+                    return None
+
+                stale_at, encoded = _unpack_entry(stored)
+                if stale_at is not None and time.time() >= stale_at:
+                    response_single_flight.run_in_background(cache_key, refresh)
+
+                return ttl, value_coder.decode(encoded)
+
+            async def fill():
+                # (another request may have filled the cache while we waited)
+                hit = await lookup()
+                if hit is not None:
+                    return hit
+
+                value = await call(args, kwargs)
+                await store(value)
+                return value_expire, value
+
+            hit = await lookup()
+
+            route = request.scope.get("route")
+            _route_counts[route.path if route is not None else request.url.path][
+                "hits" if hit is not None else "misses"
+            ] += 1
+
+            ttl, value = hit or await response_single_flight.run_once(cache_key, fill)
+
+            if response is not None and ttl:
+                response.headers["Cache-Control"] = f"max-age={ttl}"
+
+            return value
+
+        return inner
+
+    return wrapper
+
+class VersionedCache:
+    """
+    An in-process cache for values derived from the data, e.g. lookups that
+    would otherwise be recomputed from the database on every request.
+
+    Entries are only valid for the data version under which they were computed;
+    all entries are discarded the first time the cache is accessed after the
+    data version changes. If 'max_entries' is given, only that many of the
+    most recently-used entries are kept.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+
+        self._version = None
+        self._entries = OrderedDict()
+        self._single_flight = SingleFlight()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the value for 'key' under the current data version, calling
+        (and awaiting) compute() to produce it if it isn't cached. Concurrent
+        calls for the same uncached key share a single call to compute().
+        """
+        version = await get_data_version()
+
+        if version != self._version:
+            self._entries = OrderedDict()
+            self._version = version
+
+        try:
+            value = self._entries[key]
+        except KeyError:
+            pass
+        else:
+            self._entries.move_to_end(key)
+            return value
+
+        value = await self._single_flight.share((version, key), compute)
+
+        # don't store the value if the version changed while we were computing
+        if self._version == version:
+            self._entries[key] = value
+
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the value for 'key' if it's cached under the most recently-read
+        data version (see get_cached_data_version()), otherwise 'default'.
+        Unlike get_or_compute(), it never computes the value or queries the
+        database.
+        """
+        if self._version is None or self._version != get_cached_data_version():
+            return default
+
+        return self._entries.get(key, default)
+
+    def clear(self):
+        self._entries = OrderedDict()
+
+
+# the TTL reported for entries stored without an expiry; it's what fastapi-cache's
+# MemcachedBackend reports for every key, since memcached can't tell us
+UNKNOWN_TTL = 3600
+
+class ChunkedMemcachedBackend(Backend):
+    """
+    A fastapi-cache backend that stores values in memcached compressed, and
+    splits those that are still larger than memcached's item size limit
+    (1 MB by default) into chunks.
+
+    A chunked value is stored as its chunks, under keys that include a token
+    unique to that write, followed by a manifest under the value's own key that
+    names the token, the number of chunks, and a hash of the whole value. Since
+    the manifest is written last and a reader only assembles the chunks it
+    names, a reader never sees a mix of two writes; a value whose chunks are
+    missing (e.g., evicted) or don't match the hash is treated as a miss.
+    Once a value is replaced, the chunks of the value it replaced are deleted.
+    """
+
+    # the first byte of each stored item, which tells single compressed values
+    # and manifests apart (and both apart from values stored before this
+    # backend, which are JSON, or prefixed with STALE_AT_PREFIX)
+    COMPRESSED = b"z"
+    MANIFEST = b"m"
+
+    def __init__(
+        self, mc: aiomcache.Client, chunk_bytes: int = CACHE_CHUNK_BYTES,
+        chunk_expire: int = 4 * (CACHE_STALE_AFTER or UNKNOWN_TTL),
+    ):
+        self.mc = mc
+        self.chunk_bytes = chunk_bytes
+        # chunks always expire, even if their value doesn't, so that any left
+        # behind (e.g., by a write that failed partway) are reclaimed; a value
+        # whose chunks expired is just a miss
+        self.chunk_expire = chunk_expire
+
+    @staticmethod
+    def _chunk_key(key: str, token: str, i: int) -> bytes:
+        return f"chunk:{hashlib.sha1(key.encode()).hexdigest()}:{token}:{i}".encode()
+
+    async def _delete_chunks(self, key: str, stored: Optional[bytes]):
+        """
+        Deletes the chunks named by 'stored', the item stored under 'key', if
+        it's a manifest.
+        """
+        if stored is None or not stored.startswith(self.MANIFEST):
+            return
+
+        token, count, _ = stored[1:].decode().split(":")
+
+        for i in range(int(count)):
+            await self.mc.delete(self._chunk_key(key, token, i))
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        stored = await self.mc.get(key.encode())
+
+        if stored is None:
+            return 0, None
+
+        if stored.startswith(self.COMPRESSED):
+            return UNKNOWN_TTL, zlib.decompress(stored[1:])
+
+        if not stored.startswith(self.MANIFEST):
+            return UNKNOWN_TTL, stored
+
+        token, count, digest = stored[1:].decode().split(":")
+        chunks = await self.mc.multi_get(*(self._chunk_key(key, token, i) for i in range(int(count))))
+
+        if any(x is None for x in chunks):
+            return 0, None
+
+        compressed = b"".join(chunks)
+        if hashlib.sha1(compressed).hexdigest() != digest:
+            logger.warning(f"The chunks of cache key '{key}' don't match its manifest")
+            return 0, None
+
+        return UNKNOWN_TTL, zlib.decompress(compressed)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value, expire: Optional[int] = None) -> None:
+        if isinstance(value, str):
+            value = value.encode()
+
+        # (level 1 is much faster than the default, and nearly as small for
+        # the JSON we store)
+        compressed = zlib.compress(value, 1)
+
+        # the chunks of the value we're replacing, if any, are deleted once
+        # the new value is stored
+        previous = await self.mc.get(key.encode())
+
+        if len(compressed) < self.chunk_bytes:
+            await self.mc.set(key.encode(), self.COMPRESSED + compressed, exptime=expire or 0)
+            await self._delete_chunks(key, previous)
+            return
+
+        token = secrets.token_hex(8)
+        count = 0
+        chunk_expire = min(expire, self.chunk_expire) if expire else self.chunk_expire
+
+        for i in range(0, len(compressed), self.chunk_bytes):
+            await self.mc.set(
+                self._chunk_key(key, token, count), compressed[i:i + self.chunk_bytes],
+                exptime=chunk_expire
+            )
+            count += 1
+
+        digest = hashlib.sha1(compressed).hexdigest()
+        await self.mc.set(
+            key.encode(), self.MANIFEST + f"{token}:{count}:{digest}".encode(),
+            exptime=expire or 0
+        )
+        await self._delete_chunks(key, previous)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        Deletes 'key', along with its chunks if it's chunked, returning the
+        number of keys deleted (0 or 1).
+
+        Clearing a whole namespace isn't supported, since memcached can't list
+        the keys in it; raises a NotImplementedError if no key is given. Every
+        key includes the data version, so bumping it (e.g. with
+        commands/bump_data_version.py) retires every cached response instead.
+        """
+        if key is None:
+            raise NotImplementedError(
+                "memcached can't clear a namespace; bump the data version to "
+                "retire every cached response instead"
+            )
+
+        await self._delete_chunks(key, await self.mc.get(key.encode()))
+
+        return int(await self.mc.delete(key.encode()))
+
+
+class LayeredCacheBackend(Backend):
+    """
+    A fastapi-cache backend that keeps recently-used responses in this
+    worker's memory (the "L1" tier) in front of another backend, e.g.
+    memcached (the "L2" tier), so that hot keys don't cost a round trip and
+    a transfer of the whole response from the L2 backend.
+
+    The L1 tier is a least-recently-used cache of at most 'max_bytes' bytes
+    (approximately, by the length of each value); values larger than that are
+    only stored in the L2 tier. Like VersionedCache, it's discarded when the
+    data version changes. Hits and misses are counted per tier; see stats().
+    """
+
+    def __init__(self, l2: Backend, max_bytes: int):
+        self.l2 = l2
+        self.max_bytes = max_bytes
+
+        # key -> (value, expiry time by time.monotonic() or None, size)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+
+        self._counts = {
+            "l1": {"hits": 0, "misses": 0},
+            "l2": {"hits": 0, "misses": 0},
+        }
+
+    async def _check_version(self):
+        version = await get_data_version()
+
+        if version != self._version:
+            self._clear_l1()
+            self._version = version
+
+    def _clear_l1(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove_l1(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _set_l1(self, key: str, value, expire: Optional[int]):
+        self._remove_l1(key)
+
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, time.monotonic() + expire if expire else None, size)
+        self._bytes += size
+
+        # evict the least-recently-used entries until we're within budget
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def _get_l1(self, key: str) -> Tuple[int, Any]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return 0, None
+
+        value, expires_at, _ = entry
+
+        if expires_at is None:
+            ttl = UNKNOWN_TTL
+        else:
+            ttl = int(expires_at - time.monotonic())
+            if ttl <= 0:
+                self._remove_l1(key)
+                return 0, None
+
+        self._entries.move_to_end(key)
+        return ttl, value
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[str]]:
+        await self._check_version()
+
+        ttl, value = self._get_l1(key)
+
+        if value is not None:
+            self._counts["l1"]["hits"] += 1
+            return ttl, value
+
+        self._counts["l1"]["misses"] += 1
+
+        ttl, value = await self.l2.get_with_ttl(key)
+
+        if value is None:
+            self._counts["l2"]["misses"] += 1
+            return ttl, value
+
+        self._counts["l2"]["hits"] += 1
+        self._set_l1(key, value, ttl if ttl > 0 else None)
+
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        await self._check_version()
+
+        self._set_l1(key, value, expire)
+        await self.l2.set(key, value, expire)
+
+    async def reload(self, key: str) -> Optional[str]:
+        """
+        Reads 'key' from the L2 tier, bypassing (and then replacing) this
+        worker's L1 copy, e.g. to pick up a value another worker has stored
+        since.
+        """
+        await self._check_version()
+
+        ttl, value = await self.l2.get_with_ttl(key)
+
+        if value is None:
+            self._remove_l1(key)
+        else:
+            self._set_l1(key, value, ttl if ttl > 0 else None)
+
+        return value
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        Deletes 'key' from both tiers, or clears a namespace if the L2 tier
+        supports it; ChunkedMemcachedBackend doesn't (see its clear()), though
+        the L1 tier is emptied either way.
+        """
+        if key is not None:
+            self._remove_l1(key)
+        else:
+            self._clear_l1()
+
+        return await self.l2.clear(namespace, key)
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counts for each tier since the worker started,
+        along with the L1 tier's current size.
+        """
+        return {
+            "l1": {
+                **self._counts["l1"],
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            },
+            "l2": dict(self._counts["l2"]),
+        }
+
+
+def data_version_etag(version: int, request: Request) -> str:
+    """
+    Produces a strong ETag for the response to 'request' under the given data
+    version. Besides the version, the tag depends on the URL and the Accept and
+    Accept-Encoding headers, since e.g. fips-value can return JSON or binary
+    for the same URL, and the geometry routes gzipped or uncompressed bytes.
+    """
+    variant = hashlib.sha1(
+        "\n".join([
+            request.url.path,
+            request.url.query,
+            request.headers.get("accept", ""),
+            request.headers.get("accept-encoding", ""),
+        ]).encode()
+    ).hexdigest()[:16]
+
+    return f'"{version}-{variant}"'
+
+class DataVersionETagMiddleware:
+    """
+    Tags successful GET responses under the given path prefixes with an ETag
+    derived from the data version (see data_version_etag()), and answers
+    requests whose If-None-Match matches the current tag with a 304 without
+    calling the route at all.
+
+    The responses of these routes only change when the data does, so the data
+    version alone is enough to tell whether a client's copy is current.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: tuple[str, ...] = ("/",)):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http" or
+            scope["method"] not in ("GET", "HEAD") or
+            not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        etag = data_version_etag(await get_data_version(), request)
+
+        if_none_match = [
+            x.strip() for x in request.headers.get("if-none-match", "").split(",")
+        ]
+
+        if etag in if_none_match or "*" in if_none_match:
+            response = Response(status_code=304, headers={"ETag": etag, "Vary": "Accept, Accept-Encoding"})
+            await response(scope, receive, send)
+            return
+
+        async def send_with_etag(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                # replaces the weak, per-process ETag set by fastapi-cache
+                headers["ETag"] = etag
+
+                # (the route may have set Vary already, e.g. to Accept-Encoding)
+                vary = [x.strip() for x in headers.get("vary", "").split(",") if x.strip()]
+                headers["Vary"] = ", ".join(
+                    vary + [x for x in ("Accept", "Accept-Encoding") if x not in vary]
+                )
+
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,143 @@
+"""
+Helpers for reading and incrementing the data version, a counter that changes
+whenever the data in the database changes (i.e., when an import command runs).
+
+Anything that's derived from the data and kept around between requests should
+be tied to the data version, so it can be discarded once the version changes.
+"""
+
+import asyncio
+import logging
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+
+from db import session_scope
+from models.data_version import DataVersion, DATA_VERSION_ID
+from settings import DATA_VERSION_CHECK_INTERVAL
+
+
+logger = logging.getLogger(__name__)
+
+# the most recently-read data version, and when it was read
+# (by time.monotonic())
+_last_version = {"version": None, "checked_at": 0.0}
+
+async def query_data_version(session) -> int:
+    """
+    Reads the current data version from the database. Returns 0 if it hasn't
+    been set yet.
+    """
+    result = await session.execute(
+        select(DataVersion.version).where(DataVersion.id == DATA_VERSION_ID)
+    )
+    return result.scalar() or 0
+
+async def get_data_version() -> int:
+    """
+    Returns the current data version. To avoid a query per call, the version is
+    only re-read from the database if it was last read more than
+    DATA_VERSION_CHECK_INTERVAL seconds ago, so changes can take up to that long
+    to be noticed.
+    """
+    if (
+        _last_version["version"] is None or
+        time.monotonic() - _last_version["checked_at"] > DATA_VERSION_CHECK_INTERVAL
+    ):
+        return await refresh_data_version()
+
+    return _last_version["version"]
+
+def get_cached_data_version() -> Optional[int]:
+    """
+    Returns the data version as it was last read from the database (by
+    get_data_version(), refresh_data_version(), or poll_data_version()), or
+    None if it hasn't been read yet. Never queries the database.
+    """
+    return _last_version["version"]
+
+async def refresh_data_version() -> int:
+    """
+    Re-reads the data version from the database, regardless of when it was
+    last read, and returns it.
+    """
+    now = time.monotonic()
+
+    async with session_scope() as session:
+        _last_version["version"] = await query_data_version(session)
+    _last_version["checked_at"] = now
+
+    return _last_version["version"]
+
+async def poll_data_version(on_change: Optional[Callable[[int], Awaitable[Any]]] = None):
+    """
+    Re-reads the data version twice every DATA_VERSION_CHECK_INTERVAL seconds,
+    forever, so that get_data_version() never has to query the database while
+    handling a request. Meant to be run as a background task by the API.
+
+    If 'on_change' is given, it's called (and awaited) with the version the
+    first time it's read, and whenever it changes afterward, e.g. to reload
+    values derived from the data before a request needs them; if it fails,
+    it's called again on the next poll.
+    """
+    seen = None
+
+    while True:
+        try:
+            version = await refresh_data_version()
+
+            if on_change is not None and version != seen:
+                await on_change(version)
+                seen = version
+        except Exception:
+            # keep polling; get_data_version() will query if we fall behind
+            logger.warning("Error refreshing the data version:", exc_info=True)
+
+        await asyncio.sleep(DATA_VERSION_CHECK_INTERVAL / 2)
+
+async def bump_data_version(source:str=None) -> int:
+    """
+    Increments the data version (creating it if it doesn't exist), recording
+    'source' as the reason for the change. Returns the new version.
+    """
+    query = (
+        insert(DataVersion)
+            .values(id=DATA_VERSION_ID, version=1, source=source, updated_at=func.now())
+            .on_conflict_do_update(
+                index_elements=[DataVersion.id],
+                set_={
+                    "version": DataVersion.version + 1,
+                    "source": source,
+                    "updated_at": func.now(),
+                }
+            )
+            .returning(DataVersion.version)
+    )
+
+    async with session_scope() as session:
+        result = await session.execute(query)
+        version = result.scalar()
+        await session.commit()
+
+    # we know the version changed, so don't wait to notice it
+    _last_version["version"] = version
+    _last_version["checked_at"] = time.monotonic()
+
+    return version
+
+def bumps_data_version(func):
+    """
+    Decorates an async import function so that the data version is incremented
+    once it completes successfully.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        result = await func(*args, **kwargs)
+        await bump_data_version(source=func.__name__)
+        return result
+
+    return wrapper
@@ -15,6 +15,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import engine
+from tools.data_version import bumps_data_version
 
 
 # ==========================================================================
@@ -125,6 +126,7 @@ def _zero_pad(fips: str) -> str:
         raise ValueError(f"FIPS code {fips} doesn't start with '08'")
     return result
 
+@bumps_data_version
 async def import_measures_from_sheets(
     excel_path,
     sheets_meta: list[MeasureCategoryDict],
@@ -5,25 +5,34 @@ over the entities in the ECCO data model.
 
 
 from collections import defaultdict
-from typing import Any
-from models import CANCER_MODELS, FACTOR_DESCRIPTIONS
+from typing import Any, Optional
+from db import session_scope
+from models import STATS_MODELS, CANCER_MODELS, FACTOR_DESCRIPTIONS
 from models.base import BaseStatsModel
 from models.scp import SCP_TRENDS_MODELS
 from tools.accessors import omit
+from tools.caching import VersionedCache
 from tools.strings import slug_modelname_sans_type
 
 
-from sqlalchemy import and_, or_, distinct, func
+from sqlalchemy import Column, Index, MetaData, Table, and_, or_, distinct, false, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import aliased
+from sqlalchemy.schema import CreateIndex
 from sqlmodel import select
 
 
-async def get_category_factors_with_values(model:BaseStatsModel, type:str, session, measures:list[str]=None):
+async def get_category_factors_with_values(model:BaseStatsModel, type:str, session, measures:list[str]=None, include_unlabeled:bool=False):
     """
     Given a model (i.e. measure category), produces factors and the set of
     factor values observed in the data for each measure under that category. If
     'measures', a list, is supplied, filters the response down to just those
     measures.
 
+    By default, only observed values that have a label in FACTOR_DESCRIPTIONS
+    are included. If 'include_unlabeled' is True, every observed value is
+    included (sorted, and labeled with itself if it has no label).
+
     Response is of the form:
     {
         <measure>: {
@@ -81,6 +90,21 @@ async def get_category_factors_with_values(model:BaseStatsModel, type:str, sessi
     result = await session.execute(query)
     factor_results = result.mappings().all()
 
+    def factor_values(factor, observed):
+        labels = factor_descs[factor]["values"]
+
+        if include_unlabeled:
+            return {
+                value: labels.get(value, value) or value
+                for value in sorted(x for x in observed if x is not None)
+            }
+
+        return {
+            value: label
+            for value, label in labels.items() if
+            value in observed
+        }
+
     # produce a response that looks very much like the factor response
     # for a specific measure, but over all measures
     return {
@@ -88,11 +112,7 @@ async def get_category_factors_with_values(model:BaseStatsModel, type:str, sessi
             k: {
                 "label": str(factor_descs[k]["label"] or k),
                 "default": factor_descs[k].get("default"),
-                "values": {
-                    value: label
-                    for value, label in factor_descs[k]["values"].items() if
-                    value in v
-                }
+                "values": factor_values(k, v)
             }
             for k, v in omit(x, 'measure').items()
         }
@@ -133,6 +153,99 @@ def factor_default_clauses(constraints:dict[str,dict[str,Any]], model:BaseStatsM
     # OR all of the clauses together and return that
     return or_(*clauses).self_group()
 
+async def _resolve_model_factor_defaults(model, type, session):
+    """
+    Resolves the "effective" default value of each factor for every measure in
+    the given model: the default from FACTOR_DESCRIPTIONS if it occurs in the
+    data for that measure, otherwise the first value that does occur.
+
+    Returns a dict of the form { <measure>: { <factor>: <value> } }, which is
+    empty if the model has no factors.
+    """
+
+    # first, resolve the 'simple' model name (i.e., normalized and without the
+    # geometry type) so we can retrieve the factor defaults from the metadata
+    simple_model_name = slug_modelname_sans_type(model, type)
+
+    # if the model has factors, constrain them to their default values
+    # for example, for SCP models, this selects the following factor values:
+    # "sex": "All", "stage": "All Stages", "race": "All Races (includes Hispanic)", "age": "All Ages"
+    factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name, None)
+
+    if not factor_labels:
+        return {}
+
+    all_factor_values = await get_category_factors_with_values(model, type, session)
+
+    factor_defaults = defaultdict(dict)
+
+    for f, fv in factor_labels.items():
+        for measure in all_factor_values:
+            # get a list of observed factor values for this measure
+            # (we get .keys() here because those are the 'internal' factor
+            # names; the .values() portion of the dict is the human-readable
+            # labels)
+            measure_values = list(all_factor_values[measure][f]["values"].keys())
+
+            # this is the hardcoded default value, regardless of what's in the data
+            naive_default = fv.get("default")
+
+            if len(measure_values) > 0:
+                # get the default if it occurs in the data
+                # otherwise get the first value that actually occurs
+                effective_default = naive_default if naive_default in measure_values else measure_values[0]
+            else:
+                # we have no data for this factor, so just use the default
+                effective_default = fv.get("default")
+
+            factor_defaults[measure][f] = effective_default
+
+    return dict(factor_defaults)
+
+# the resolved factor defaults only change when the data does, so we keep them
+# around for each model until the data version changes
+_factor_defaults_cache = VersionedCache()
+
+async def get_model_factor_defaults(model, type):
+    """
+    Returns the effective default factor values for each measure in the given
+    model, of the form { <measure>: { <factor>: <value> } }; see
+    _resolve_model_factor_defaults() for how they're determined.
+
+    The result is cached in-process for the current data version, so the
+    database is only consulted the first time a model's defaults are requested
+    after an import. Callers shouldn't modify the returned dict.
+
+    Concurrent callers share a single resolution, so it runs on a session of
+    its own rather than on any one caller's.
+    """
+    async def resolve():
+        async with session_scope() as session:
+            return await _resolve_model_factor_defaults(model, type, session)
+
+    return await _factor_defaults_cache.get_or_compute((model, type), resolve)
+
+async def prime_model_factor_defaults(*args):
+    """
+    Loads the effective default factor values of every model with factors for
+    the current data version (see get_model_factor_defaults()), so that
+    they're available to peek_model_factor_defaults() from the start, e.g.
+    right after startup or an import. Ignores its arguments, so it can be used
+    as poll_data_version()'s 'on_change'.
+    """
+    for type, family in STATS_MODELS.items():
+        for model in family:
+            if FACTOR_DESCRIPTIONS.get(slug_modelname_sans_type(model, type)):
+                await get_model_factor_defaults(model, type)
+
+def peek_model_factor_defaults(model, type) -> Optional[dict[str, dict[str, Any]]]:
+    """
+    Like get_model_factor_defaults(), but only returns the defaults if they're
+    already cached for the current data version, and otherwise None; it never
+    queries the database.
+    """
+    return _factor_defaults_cache.peek((model, type))
+
 async def get_model_factor_defaults_clause(model, type, session, measures:list[str]=None, choices:dict[str,dict[str,Any]]=None):
     """
     For a given model, returns a clause that can be applied to a query to limit
@@ -154,15 +267,8 @@ async def get_model_factor_defaults_clause(model, type, session, measures:list[s
         the factor values specified in the first element.
     """
 
-    # first, resolve the 'simple' model name (i.e., normalized and without the
-    # geometry type) so we can retrieve the factor defaults from the metadata
     simple_model_name = slug_modelname_sans_type(model, type)
-
-    # if the model has factors, constrain them to their default values
-    # for example, for SCP models, this selects the following factor values:
-    # "sex": "All", "stage": "All Stages", "race": "All Races (includes Hispanic)", "age": "All Ages"
     factor_labels = FACTOR_DESCRIPTIONS.get(simple_model_name, None)
-    all_factor_values = await get_category_factors_with_values(model, type, session, measures=measures)
 
     # determine the measure column ('Site' for cancer-related, 'measure' otherwise)
     measure_col = (
@@ -175,33 +281,19 @@ async def get_model_factor_defaults_clause(model, type, session, measures:list[s
     factor_constraints = defaultdict(dict)
 
     if factor_labels:
-        for f, fv in factor_labels.items():
-            for measure in all_factor_values:
-                # if a choice was specified for this measure in choices, just
-                # use that and abort
-                if choices and measure in choices and f in choices[measure]:
-                    factor_constraints[measure][f] = choices[measure][f]
-                    continue
-
-                # get a list of observed factor values for this measure
-                # (we get .keys() here because those are the 'internal' factor
-                # names; the .values() portion of the dict is the human-readable
-                # labels)
-                measure_values = list(all_factor_values[measure][f]["values"].keys())
+        factor_defaults = await get_model_factor_defaults(model, type)
 
-                # this is the hardcoded default value, regardless of what's in the data
-                naive_default = fv.get("default")
+        for measure, defaults in factor_defaults.items():
+            if measures is not None and measure not in measures:
+                continue
 
-                if len(measure_values) > 0:
-                    # get the default if it occurs in the data
-                    # otherwise get the first value that actually occurs
-                    effective_default = naive_default if naive_default in measure_values else measure_values[0]
+            for f, effective_default in defaults.items():
+                # if a choice was specified for this measure in choices, use
+                # that instead of the default
+                if choices and measure in choices and f in choices[measure]:
+                    factor_constraints[measure][f] = choices[measure][f]
                 else:
-                    # we have no data for this factor, so just use the default
-                    effective_default = fv.get("default")
-
-                # populate factor_constraints with the effective default
-                factor_constraints[measure][f] = effective_default
+                    factor_constraints[measure][f] = effective_default
 
         # create a big OR'd where here, because each measure has its own set of possible factor values
         factor_clause = factor_default_clauses(factor_constraints, model, measure_col)
@@ -209,3 +301,140 @@ async def get_model_factor_defaults_clause(model, type, session, measures:list[s
         return factor_constraints, factor_clause
 
     return factor_constraints, None
+
+
+# ============================================================================
+# === default-factor slices
+# ============================================================================
+
+# most queries for a factored model only want each measure's effective default
+# factor values (e.g., sex="All", stage="All Stages", etc.), so we keep those
+# rows of each factored cancer table (which hold every combination of several
+# factors, and so are by far the largest) in a much smaller materialized view,
+# its "default-factor slice", which queries for the defaults read instead.
+
+def has_default_factor_slice(model, type) -> bool:
+    """
+    Returns whether the given model's table has a default-factor slice.
+    """
+    return (
+        (model in CANCER_MODELS or model in SCP_TRENDS_MODELS) and
+        bool(FACTOR_DESCRIPTIONS.get(slug_modelname_sans_type(model, type)))
+    )
+
+# (the slices aren't part of SQLModel's metadata, since they're created by
+# refresh_default_factor_slice() rather than by migrations)
+_slice_metadata = MetaData()
+
+def _default_factor_slice_table(model) -> Table:
+    """
+    Returns a Table for the default-factor slice of the given model's table,
+    which has the same columns as the table, and copies of its by-measure and
+    by-region covering indexes.
+    """
+    name = f"{model.__tablename__}_default_factors"
+
+    if name in _slice_metadata.tables:
+        return _slice_metadata.tables[name]
+
+    table = Table(
+        name, _slice_metadata,
+        *(Column(c.name, c.type) for c in model.__table__.columns)
+    )
+
+    for index in model.__table__.indexes:
+        if index.name.endswith(("_by_measure", "_by_region")):
+            Index(
+                index.name.replace(model.__tablename__, name, 1),
+                *(table.c[c.name] for c in index.columns),
+                postgresql_include=index.dialect_options["postgresql"]["include"],
+            )
+
+    return table
+
+async def refresh_default_factor_slice(model, type, session):
+    """
+    (Re)creates the default-factor slice of the given factored model from its
+    table's current contents. The effective defaults depend on the data, so the
+    view is recreated rather than refreshed.
+
+    Should be run after the model's data changes, in the same transaction as
+    the change, so that the slice never disagrees with its table; see
+    commands/refresh_default_slices.py.
+    """
+    slice_table = _default_factor_slice_table(model)
+
+    # (we resolve the defaults from the data directly rather than through
+    # get_model_factor_defaults(), since the cached defaults might predate the
+    # change that we're refreshing the slice for)
+    defaults = await _resolve_model_factor_defaults(model, type, session)
+    measure_col = model.Site if model in CANCER_MODELS or model in SCP_TRENDS_MODELS else model.measure
+
+    query = select(model.__table__).where(
+        factor_default_clauses(defaults, model, measure_col) if defaults else false()
+    )
+
+    dialect = postgresql.dialect()
+    sql = query.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+
+    await session.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS "{slice_table.name}"'))
+    await session.execute(text(f'CREATE MATERIALIZED VIEW "{slice_table.name}" AS {sql}'))
+
+    for index in slice_table.indexes:
+        await session.execute(text(str(CreateIndex(index).compile(dialect=dialect))))
+
+async def refresh_default_factor_slices(session, models=None) -> list[str]:
+    """
+    Refreshes the default-factor slice of each stats model that has one (or,
+    if given, just those of the models in 'models'), once per table. Returns
+    the names of the refreshed tables.
+    """
+    refreshed = []
+
+    for type, family in STATS_MODELS.items():
+        for model in family:
+            if not has_default_factor_slice(model, type) or model.__tablename__ in refreshed:
+                continue
+            if models is not None and model not in models:
+                continue
+
+            await refresh_default_factor_slice(model, type, session)
+            refreshed.append(model.__tablename__)
+
+    return refreshed
+
+# whether each model's slice exists, which only changes along with the data
+_default_factor_slice_exists = VersionedCache()
+
+async def get_factor_source(model, type, constraints:dict[str,dict[str,Any]]):
+    """
+    Returns the entity from which to select the given model's rows for a query
+    limited to 'constraints', a dict of the form { <measure>: { <factor>: <value> } }
+    as produced by get_model_factor_defaults_clause().
+
+    If every measure in 'constraints' is limited to its effective default
+    factor values, and the model's default-factor slice has been created, the
+    result is an alias of the model over the slice, which can be used just like
+    the model in a query; otherwise, it's the model itself.
+    """
+    if not constraints or not has_default_factor_slice(model, type):
+        return model
+
+    factor_defaults = await get_model_factor_defaults(model, type)
+
+    if any(factor_defaults.get(measure) != values for measure, values in constraints.items()):
+        return model
+
+    slice_table = _default_factor_slice_table(model)
+
+    async def slice_exists():
+        async with session_scope() as session:
+            result = await session.execute(
+                select(func.to_regclass(slice_table.name).isnot(None))
+            )
+            return result.scalar()
+
+    if not await _default_factor_slice_exists.get_or_compute(slice_table.name, slice_exists):
+        return model
+
+    return aliased(model, slice_table, adapt_on_names=True)
@@ -0,0 +1,85 @@
+"""
+Helpers for producing responses that FastAPI/Starlette don't provide on their
+own.
+"""
+
+import os
+import re
+
+from fastapi import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+# size of the chunks in which a byte range of a file is read and sent
+FILE_RANGE_CHUNK_SIZE = 64 * 1024
+
+def _iter_file_range(path: str, start: int, end: int):
+    """
+    Yields the bytes of the file at 'path' from 'start' to 'end', inclusive,
+    in chunks. (Starlette runs sync iterators like this one in a threadpool.)
+    """
+    with open(path, "rb") as fp:
+        fp.seek(start)
+        remaining = end - start + 1
+
+        while remaining > 0:
+            chunk = fp.read(min(FILE_RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def ranged_file_response(path: str, request: Request, media_type: str, filename: str, etag: str = None) -> Response:
+    """
+    Serves the file at 'path' as an attachment named 'filename', honoring a
+    single-range "Range: bytes=..." request header with a 206 response (the
+    Starlette version we use doesn't support ranges in FileResponse.)
+
+    If 'etag' is given, it's included in the response, and a Range header is
+    only honored if the request's If-Range (if any) matches it, so that a
+    resumed download can't mix the bytes of two different files.
+
+    Requests without a usable Range header (including multi-range requests,
+    which we don't support) get the whole file via FileResponse.
+    """
+    # (stat'd here, rather than when the response is sent, so that a missing
+    # file raises FileNotFoundError to the caller)
+    stat_result = os.stat(path)
+    file_size = stat_result.st_size
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+    if etag is not None:
+        headers["ETag"] = etag
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip()) if range_header else None
+
+    if match is None or (match[1] == "" and match[2] == "") or (if_range is not None and if_range != etag):
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+    if match[1] == "":
+        # a suffix range, i.e. the last N bytes of the file
+        start, end = max(file_size - int(match[2]), 0), file_size - 1
+    else:
+        start = int(match[1])
+        end = min(int(match[2]), file_size - 1) if match[2] != "" else file_size - 1
+
+    if start >= file_size or start > end:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{file_size}"}
+        )
+
+    return StreamingResponse(
+        _iter_file_range(path, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{file_size}",
+            "Content-Length": str(end - start + 1),
+        }
+    )
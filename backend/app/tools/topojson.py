@@ -0,0 +1,225 @@
+"""
+Builds quantized TopoJSON topologies from shapely geometry, so that boundaries
+shared between regions (e.g., neighboring counties) are encoded only once.
+
+See https://github.com/topojson/topojson-specification for the format.
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+import shapely
+from shapely.geometry import MultiPolygon, Polygon
+from shapely.geometry.base import BaseGeometry
+
+# the number of distinct values each coordinate is quantized to; 1e5 keeps the
+# error well under a meter for a state-sized extent
+TOPOJSON_QUANTIZATION = 100_000
+
+def _quantize_ring(coords, translate, scale) -> list[tuple[int, int]]:
+    """
+    Quantizes a closed ring's coordinates to the integer grid given by
+    'translate' and 'scale', dropping points that collapse onto the previous
+    one. The result is still closed, i.e. its first and last points match.
+    """
+    quantized = np.round((np.asarray(coords)[:, :2] - translate) / scale).astype(np.int64)
+    keep = np.concatenate(([True], np.any(np.diff(quantized, axis=0) != 0, axis=1)))
+
+    return list(map(tuple, quantized[keep].tolist()))
+
+def _find_junctions(rings) -> set[tuple[int, int]]:
+    """
+    Returns the points at which arcs have to start and end, i.e. those at which
+    the rings that pass through them don't all share the same neighbors (and so
+    where a shared boundary begins or ends.)
+    """
+    neighbors = {}
+    junctions = set()
+
+    for ring in rings:
+        # (the rings are closed, so the last point repeats the first)
+        n = len(ring) - 1
+
+        for i in range(n):
+            prev, next = ring[i - 1 if i > 0 else n - 1], ring[i + 1]
+            pair = (prev, next) if prev <= next else (next, prev)
+
+            seen = neighbors.setdefault(ring[i], pair)
+            if seen != pair:
+                junctions.add(ring[i])
+
+    return junctions
+
+class _ArcIndex:
+    """
+    Collects the distinct arcs of a topology, identifying an arc that's already
+    been seen (in either direction) so that it's only stored once.
+    """
+
+    def __init__(self):
+        self.arcs = []
+        self._indices = {}
+
+    def add(self, points: list[tuple[int, int]]) -> int:
+        """
+        Returns the TopoJSON reference to the given arc, i.e. its index, or
+        the ones' complement of its index if it was seen in reverse.
+        """
+        key = tuple(points)
+
+        if key in self._indices:
+            return self._indices[key]
+
+        reverse_key = key[::-1]
+        if reverse_key in self._indices:
+            return ~self._indices[reverse_key]
+
+        self._indices[key] = len(self.arcs)
+        self.arcs.append(points)
+        return self._indices[key]
+
+    def add_ring(self, ring: list[tuple[int, int]]) -> int:
+        """
+        Like add(), for a closed ring without junctions; it's rotated to start
+        at its smallest point, so the same ring is recognized wherever it
+        started (and in either direction.)
+        """
+        points = ring[:-1]
+        start = points.index(min(points))
+        forward = points[start:] + points[:start + 1]
+
+        reverse = points[::-1]
+        start = reverse.index(min(reverse))
+        reverse = reverse[start:] + reverse[:start + 1]
+
+        if tuple(reverse) in self._indices:
+            return ~self._indices[tuple(reverse)]
+
+        return self.add(forward)
+
+def _cut_ring(ring, junctions, arc_index) -> list[int]:
+    """
+    Splits a closed ring into arcs at the given junctions, returning the
+    references to those arcs.
+    """
+    points = ring[:-1]
+    cuts = [i for i, p in enumerate(points) if p in junctions]
+
+    if not cuts:
+        return [arc_index.add_ring(ring)]
+
+    # rotate the ring to start (and end) at its first junction
+    points = points[cuts[0]:] + points[:cuts[0] + 1]
+    cuts = [i - cuts[0] for i in cuts] + [len(points) - 1]
+
+    return [
+        arc_index.add(points[start:end + 1])
+        for start, end in zip(cuts, cuts[1:])
+    ]
+
+def _quantize_polygon(polygon: Polygon, translate, scale) -> Optional[list[list[tuple[int, int]]]]:
+    """
+    Quantizes a polygon's rings (see _quantize_ring()), dropping rings that
+    collapse to fewer than 4 points (i.e., to less than a triangle), such as a
+    sliver or hole within a single grid cell. Returns None if the exterior
+    ring collapses, since then the whole polygon has.
+    """
+    rings = [
+        _quantize_ring(ring.coords, translate, scale)
+        for ring in [polygon.exterior, *polygon.interiors]
+    ]
+
+    if len(rings[0]) < 4:
+        return None
+
+    return [ring for ring in rings if len(ring) >= 4]
+
+def _polygons(geometry: Optional[BaseGeometry]) -> list[Polygon]:
+    if isinstance(geometry, Polygon):
+        return [geometry]
+    if isinstance(geometry, MultiPolygon):
+        return list(geometry.geoms)
+    return []
+
+def _delta_encode(arc) -> list[list[int]]:
+    encoded = [list(arc[0])]
+    encoded += [[x - px, y - py] for (px, py), (x, y) in zip(arc, arc[1:])]
+    return encoded
+
+def build_topology(
+    objects: dict[str, list[tuple[Any, dict, Optional[BaseGeometry]]]],
+    quantization: int = TOPOJSON_QUANTIZATION
+) -> dict:
+    """
+    Builds a TopoJSON topology from 'objects', a dict of object names to lists
+    of (id, properties, geometry) tuples, where each geometry is a shapely
+    Polygon or MultiPolygon (or None.) Each object becomes a
+    GeometryCollection in the topology.
+
+    The coordinates are quantized to a 'quantization'-by-'quantization' grid
+    over the geometries' bounds and delta-encoded; boundaries that the
+    geometries share exactly (after quantization) are stored as a single arc.
+    """
+    geometries = [g for features in objects.values() for _, _, g in features if g is not None]
+    x0, y0, x1, y1 = shapely.total_bounds(geometries) if geometries else (0, 0, 0, 0)
+
+    translate = np.array([x0, y0])
+    scale = np.array([
+        (x1 - x0) / (quantization - 1) if x1 > x0 else 1,
+        (y1 - y0) / (quantization - 1) if y1 > y0 else 1,
+    ])
+
+    # quantize every ring first, since finding the junctions needs all of them
+    # (polygons that collapse entirely are dropped)
+    quantized = {
+        name: [
+            [
+                rings
+                for polygon in _polygons(geometry)
+                if (rings := _quantize_polygon(polygon, translate, scale)) is not None
+            ]
+            for _, _, geometry in features
+        ]
+        for name, features in objects.items()
+    }
+
+    junctions = _find_junctions(
+        ring
+        for polygons_by_feature in quantized.values()
+        for polygons in polygons_by_feature
+        for polygon in polygons
+        for ring in polygon
+    )
+
+    arc_index = _ArcIndex()
+    topology_objects = {}
+
+    for name, features in objects.items():
+        collection = []
+
+        for (id, properties, geometry), polygons in zip(features, quantized[name]):
+            arcs = [
+                [_cut_ring(ring, junctions, arc_index) for ring in polygon]
+                for polygon in polygons
+            ]
+
+            feature = {"id": id, "properties": properties}
+
+            if not arcs:
+                feature["type"] = None
+            elif isinstance(geometry, Polygon):
+                feature.update(type="Polygon", arcs=arcs[0])
+            else:
+                feature.update(type="MultiPolygon", arcs=arcs)
+
+            collection.append(feature)
+
+        topology_objects[name] = {"type": "GeometryCollection", "geometries": collection}
+
+    return {
+        "type": "Topology",
+        "bbox": [x0, y0, x1, y1],
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": topology_objects,
+        "arcs": [_delta_encode(arc) for arc in arc_index.arcs],
+    }
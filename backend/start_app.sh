@@ -49,6 +49,15 @@ fi
 # apply migrations at startup
 alembic upgrade head
 
+# the geometry was just reloaded above, so rebuild its simplified versions
+# (this also bumps the data version, invalidating anything derived from the
+# geometry, e.g. cached responses and ETags)
+./commands/simplify_geometry.py
+
+# (re)create the default-factor slices of the cancer tables, in case they
+# predate the current data or don't exist yet
+./commands/refresh_default_slices.py
+
 
 # ========================================
 # === start the app